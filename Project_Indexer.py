@@ -1,73 +1,703 @@
-import os
-import json
-import argparse
-
-from parser import extract_types_and_members_from_file_for_typescript
-from parser.parser import extract_types_and_members_from_file_for_csharp, extract_types_and_members_from_file_for_python, extract_types_and_members_from_file_for_javascript
-
-def index_project_structure(root_dir: str, extract_imports: bool = False):
-    """
-    Walks through the directory tree starting at root_dir.
-    Extracts type definitions and members from each file and creates a structured index.
-    """
-    project_index = {}
-    print(f"Indexing project structure starting at: {root_dir}")
-    # Walk through the directory tree
-    for subdir, _, files in os.walk(root_dir):
-        for file in files:
-            # Process only supported file types
-            if (not file.endswith('.cs') and not file.endswith('.py') and 
-                not file.endswith('.tsx') and not file.endswith('.ts') and 
-                not file.endswith('.js')):
-                print(f"Skipping unsupported file: {file}")
-                continue
-                
-            # Construct the full file path and relative path
-            file_path = os.path.join(subdir, file)
-            relative_path = os.path.relpath(file_path, root_dir)
-            
-            if file.endswith('.cs'):
-                # Extract C# types and members
-                details = extract_types_and_members_from_file_for_csharp(file_path)
-            elif file.endswith('.py'):
-                # Extract Python types and members
-                details = extract_types_and_members_from_file_for_python(file_path, extract_imports)
-            elif file.endswith('.tsx') or file.endswith('.ts'):
-                # Extract TypeScript types and members
-                details = extract_types_and_members_from_file_for_typescript(file_path)
-            elif file.endswith('.js'):
-                # Extract JavaScript types and members
-                details = extract_types_and_members_from_file_for_javascript(file_path, extract_imports)
-                
-            # Include in the index only if any type or member was found
-            project_index_details = details.__to_dict__()
-            if any(project_index_details.values()):
-                project_index[relative_path] = project_index_details
-                
-    return project_index
-
-if __name__ == "__main__":
-    # Specify pwd as default root directory and argument --path if provided
-    root_directory = os.getcwd()  # Default to current working directory
-    # Check if a path argument is provided 
-    parser = argparse.ArgumentParser(description='Index project structure for C# and Python files.')
-    parser.add_argument('--path', type=str, help='Path to the project directory to index')
-    parser.add_argument('--imports', action='store_true', help='Extract imports from Python files', default=False)
-    args = parser.parse_args()
-    if args.path:
-        root_directory = args.path
-    # Check if the provided path exists
-    if not os.path.exists(root_directory):
-        print(f"Provided path does not exist: {root_directory}")
-        exit(1)
-    # Check if the provided path is a directory
-    if not os.path.isdir(root_directory):
-        print(f"Provided path is not a directory: {root_directory}")
-        exit(1)
-    # Index the project structure starting at the specified root directory  
-    index = index_project_structure(root_directory, args.imports)
-    # Export file renamed to ProjectIndex.json
-    export_filename = f"{root_directory}/ProjectIndex.json"
-    with open(export_filename, 'w', encoding='utf-8') as index_file:
-        json.dump(index, index_file, indent=4)
-    print(f"Project structure indexed successfully and exported to {export_filename}.")
\ No newline at end of file
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import contextlib
+
+from parser.parser import extract_types_and_members_from_file, extract_types_and_members_from_source, should_skip_file
+from parser.source import open_source
+from parser.limits import DEFAULT_MAX_FILE_SIZE, DEFAULT_PARSE_TIMEOUT, ParseLimits, SkippedFile, apply_limits
+from parser.timing import collect_timings
+from indexer.blob_cache import BLOB_CACHE_FILENAME, DEFAULT_MAX_SIZE, BlobCache, default_blob_cache_dir
+from indexer.cache import CACHE_FILENAME, ParseCache, buffer_hash
+from indexer.git import GitError, git_source_files
+from indexer.ignore import IgnoreEngine
+from indexer.lookup import ProjectIndex
+from indexer.stats import STATS_FILENAME, IndexStats, profile_run
+from indexer.symbols import LANGUAGES, SYMBOL_KINDS
+from indexer.walker import walk_order_key, walk_source_files
+
+logger = logging.getLogger(__name__)
+
+# CPU profile written next to ProjectIndex.json by --profile cpu
+PROFILE_FILENAME = "ProjectIndex.prof"
+
+# Concurrent file reads of the asyncio pipeline
+DEFAULT_READERS = 8
+
+def _index_file(file_path: str, extract_imports: bool, limits: ParseLimits = None, source: bytes = None,
+                ranges: bool = False, hashed: bool = False) -> tuple:
+    """Extract the index details of a single file.
+
+    Args:
+        file_path: Path to the source file
+        extract_imports: Whether to extract import statements
+        limits: Optional limits; a file exceeding them gets the details {'skipped': reason}
+        source: The content of the file if it was already read, otherwise the file is read
+        ranges: Whether to add the source range of every symbol, see indexer.symbols.Symbol.range
+        hashed: Whether to return the content hash of a file read here, for the parse cache
+
+    Returns:
+        tuple: (details dict, None, timings, digest) on success or (None, error message, timings,
+        None) on failure, where timings maps the phases of the parser to seconds and digest is the
+        buffer_hash of the parsed content if hashed and the file was read here, otherwise None
+    """
+    digest = None
+    with collect_timings() as timings, apply_limits(limits):
+        try:
+            if source is not None:
+                details = extract_types_and_members_from_source(file_path, source, extract_imports)
+            elif hashed and not should_skip_file(file_path):
+                # Hash the buffer that is parsed instead of reading the file again to cache it
+                with open_source(file_path) as source:
+                    digest = buffer_hash(source)
+                    details = extract_types_and_members_from_source(file_path, source, extract_imports)
+            else:
+                details = extract_types_and_members_from_file(file_path, extract_imports)
+            return details.__to_dict__(ranges), None, timings, digest
+        except SkippedFile as e:
+            return {'skipped': e.reason}, None, timings, None
+        except Exception as e:
+            return None, f"{type(e).__name__}: {e}", timings, None
+
+def _index_file_isolated(file_path: str, extract_imports: bool, limits: ParseLimits = None,
+                         source: bytes = None, ranges: bool = False, hashed: bool = False) -> tuple:
+    """Index a single file in its own worker process so a crash only affects that file."""
+    from concurrent.futures import ProcessPoolExecutor
+    from concurrent.futures.process import BrokenProcessPool
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        try:
+            return executor.submit(_index_file, file_path, extract_imports, limits, source, ranges,
+                                   hashed).result()
+        except BrokenProcessPool:
+            return None, "worker process crashed", None, None
+
+def _run_worker_pool(files: list, extract_imports: bool, jobs: int, finished: set, limits: ParseLimits = None,
+                     ranges: bool = False, hashed: bool = False):
+    """Index files on a pool of worker processes, yielding (file, _index_file outcome) as they complete.
+
+    The relative path of every completed file is added to finished. Files whose worker
+    process died are not yielded.
+    """
+    # Only parallel runs pay for importing multiprocessing; workers load grammars on first use
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from concurrent.futures.process import BrokenProcessPool
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = {executor.submit(_index_file, file[0], extract_imports, limits, None, ranges, hashed): file
+                   for file in files}
+        for future in as_completed(futures):
+            try:
+                outcome = future.result()
+            except BrokenProcessPool:
+                continue
+            file = futures[future]
+            finished.add(file[1])
+            yield file, outcome
+
+def _index_files_in_parallel(files: list, extract_imports: bool, jobs: int, limits: ParseLimits = None,
+                             ranges: bool = False, hashed: bool = False):
+    """Index files on a pool of worker processes, largest files first, yielding (file, _index_file outcome).
+
+    A worker that crashes takes the whole pool down with it. The executor hands out
+    work in submission order and keeps at most jobs + 1 calls in flight, so the crashing
+    file is among the first jobs + 1 unfinished files: those are retried one at a time in
+    isolation and the remaining files go to a fresh pool.
+    """
+    finished = set()
+    pending = sorted(files, key=lambda file: file[2].st_size, reverse=True)
+    while pending:
+        yield from _run_worker_pool(pending, extract_imports, jobs, finished, limits, ranges, hashed)
+        unfinished = [file for file in pending if file[1] not in finished]
+        suspects, pending = unfinished[:jobs + 1], unfinished[jobs + 1:]
+        for file in suspects:
+            finished.add(file[1])
+            yield file, _index_file_isolated(file[0], extract_imports, limits, None, ranges, hashed)
+
+def _index_files(files, extract_imports: bool, jobs: int, cache: ParseCache, limits: ParseLimits = None,
+                 ranges: bool = False):
+    """Index files, serving unchanged ones from the cache.
+
+    Serial runs parse each file as the walk reaches it; parallel runs collect the files
+    to parse first so the largest can be scheduled first.
+
+    Yields:
+        tuple: (file, (details, error, timings, digest), cached) in completion order
+    """
+    # Parsed files are hashed from the buffer they were parsed from, for the cache
+    hashed = cache is not None
+    to_parse = []
+    for file in files:
+        file_path, relative_path, stat_result = file
+        details = cache.lookup(relative_path, file_path, stat_result) if cache is not None else None
+        if details is not None:
+            yield file, (details, None, None, None), True
+        elif jobs <= 1:
+            yield file, _index_file(file_path, extract_imports, limits, None, ranges, hashed), False
+        else:
+            to_parse.append(file)
+
+    if len(to_parse) > 1:
+        outcomes = _index_files_in_parallel(to_parse, extract_imports, jobs, limits, ranges, hashed)
+    else:
+        outcomes = ((file, _index_file(file[0], extract_imports, limits, None, ranges, hashed))
+                    for file in to_parse)
+    for file, outcome in outcomes:
+        yield file, outcome, False
+
+def _source_files(root_dir: str, ignore: IgnoreEngine, cache: ParseCache, git: bool):
+    """Return the files to index: listed by git if asked to and root_dir is a checkout, otherwise walked."""
+    if git:
+        try:
+            return git_source_files(root_dir, ignore, cache)
+        except GitError as e:
+            logger.warning("Cannot list the files with git, walking the directory tree instead: %s", e)
+    return walk_source_files(root_dir, ignore)
+
+class _IndexRun:
+    """Records the outcome of every file of a run in the cache and stats, and logs the totals.
+
+    Shared by iter_project_index and iter_project_index_async.
+    """
+    def __init__(self, cache: ParseCache = None, stats: IndexStats = None):
+        self.cache = cache
+        self.stats = stats
+        self.failed = 0
+        self.skipped = 0
+
+    def add(self, file: tuple, outcome: tuple, cached: bool):
+        """Record the (details, error, timings, digest) outcome of a (file_path, relative_path, stat_result) file.
+
+        The digest is the content hash of the file if it is already known, see ParseCache.store.
+
+        Returns:
+            tuple: (relative_path, details) if the file belongs in the index, otherwise None
+        """
+        file_path, relative_path, stat_result = file
+        details, error, timings, digest = outcome
+        is_skipped = details is not None and 'skipped' in details
+        if self.stats is not None:
+            self.stats.add_file(relative_path, stat_result.st_size, timings, cached, bool(error), is_skipped)
+        if is_skipped:
+            self.skipped += 1
+            logger.debug("Skipped file %s: %s", relative_path, details['skipped'])
+        if error:
+            self.failed += 1
+            logger.warning("Error indexing file %s: %s", relative_path, error)
+            return None
+        if self.cache is not None and not cached:
+            self.cache.store(relative_path, file_path, details, stat_result, digest)
+        # Include in the index only if any type or member was found
+        return (relative_path, details) if any(details.values()) else None
+
+    def finish(self):
+        """Save the cache and log the totals of the run."""
+        if self.cache is not None:
+            self.cache.save()
+            if self.cache.blobs is not None:
+                logger.info("Parse cache: %d unchanged, %d from the shared cache, %d parsed.",
+                            self.cache.hits, self.cache.shared_hits, self.cache.misses)
+            else:
+                logger.info("Parse cache: %d unchanged, %d parsed.", self.cache.hits, self.cache.misses)
+        if self.skipped:
+            logger.info("%d file(s) skipped, see the 'skipped' entries of the index.", self.skipped)
+        if self.failed:
+            logger.warning("%d file(s) could not be indexed.", self.failed)
+
+def iter_project_index(root_dir: str, extract_imports: bool = False, jobs: int = 1,
+                       cache: ParseCache = None, ignore: IgnoreEngine = None, stats: IndexStats = None,
+                       limits: ParseLimits = None, git: bool = False, ranges: bool = False):
+    """
+    Indexes the project like index_project_structure, but yields each file as soon as it
+    has been parsed instead of building the whole index in memory.
+    Files without any type or member and files that fail to parse are not yielded.
+    Files exceeding the optional limits are yielded with the details {'skipped': reason}.
+    Serial runs yield in walk order; with jobs > 1 cached files come first and the
+    others follow in completion order. The cache is saved once the generator is exhausted.
+    Timings and counters of the walk and of every file are added to the optional stats.
+    With git the files are listed by git instead of walking the tree, see indexer.git.
+    With ranges the details of every file list the source range of each of its symbols.
+
+    Yields:
+        tuple: (relative_path, details dict)
+    """
+    logger.info("Indexing project structure starting at: %s", root_dir)
+    if ignore is None:
+        ignore = IgnoreEngine(root_dir)
+    if stats is not None:
+        with stats.phase('walk'):
+            files = _source_files(root_dir, ignore, cache, git)
+        files = stats.timed_iter('walk', files)
+    else:
+        files = _source_files(root_dir, ignore, cache, git)
+
+    run = _IndexRun(cache, stats)
+    for file, outcome, cached in _index_files(files, extract_imports, jobs, cache, limits, ranges):
+        entry = run.add(file, outcome, cached)
+        if entry is not None:
+            yield entry
+    run.finish()
+
+def index_project_structure(root_dir: str, extract_imports: bool = False, jobs: int = 1,
+                            cache: ParseCache = None, ignore: IgnoreEngine = None, stats: IndexStats = None,
+                            limits: ParseLimits = None, git: bool = False, ranges: bool = False):
+    """
+    Walks through the directory tree starting at root_dir.
+    Extracts type definitions and members from each file and creates a structured index.
+    Directories excluded by the ignore engine (by default: .gitignore files plus the
+    usual build and dependency folders) are pruned before they are entered.
+    With jobs > 1 the files are parsed on a pool of worker processes; the resulting
+    index is identical to a serial run. Files found unchanged in the optional cache
+    are not read again, and the cache is saved with the results of this run.
+    Files that look generated or minified, are too large or take too long to parse under
+    the optional limits are recorded as {'skipped': reason} instead of their types and members.
+    With git, a git checkout is indexed from the files git lists, and files git reports
+    unchanged since the cached run are served from the cache without being checked.
+    With ranges, the details of every file get a 'ranges' list holding the
+    [start_line, end_line, start_byte, end_byte] range of each symbol, in the order
+    indexer.symbols.iter_symbols yields them; see indexer.snippets to read them back.
+    """
+    entries = iter_project_index(root_dir, extract_imports, jobs, cache, ignore, stats, limits, git, ranges)
+    # Sort into walk order so the output doesn't depend on the scheduling
+    return dict(sorted(entries, key=lambda entry: walk_order_key(entry[0])))
+
+def _read_source_file(file: tuple, limits: ParseLimits, hashed: bool) -> tuple:
+    """Read a (file_path, relative_path, stat_result) file on a reader thread of the asyncio pipeline.
+
+    Returns:
+        tuple: (source, read timings, digest) if the file has to be parsed, otherwise
+        (None, outcome, None) with the final (details, error, timings, digest) outcome of the file
+    """
+    file_path, _, stat_result = file
+    if should_skip_file(file_path):
+        return None, ({}, None, None, None), None
+    try:
+        # Checks that need the whole file are left to the worker
+        if limits is not None:
+            limits.check_generated(file_path)
+            limits.check_size(stat_result.st_size)
+        start = time.perf_counter()
+        with open(file_path, 'rb') as f:
+            source = f.read()
+        timings = {'read': time.perf_counter() - start}
+    except SkippedFile as e:
+        return None, ({'skipped': e.reason}, None, None, None), None
+    except OSError as e:
+        return None, (None, f"{type(e).__name__}: {e}", None, None), None
+    return source, timings, buffer_hash(source) if hashed else None
+
+async def iter_project_index_async(root_dir: str, extract_imports: bool = False, jobs: int = 1,
+                                   cache: ParseCache = None, ignore: IgnoreEngine = None, stats: IndexStats = None,
+                                   limits: ParseLimits = None, readers: int = DEFAULT_READERS,
+                                   git: bool = False, ranges: bool = False):
+    """
+    Indexes the project like iter_project_index without blocking the event loop, and
+    overlaps reading files with parsing them, which pays off on network file systems.
+    The walk and cache lookups run on a thread and up to readers files are read at once
+    on others. The contents are handed through bounded queues to jobs worker processes
+    (at least one: tree-sitter holds the GIL while parsing), so at most readers + 2 * jobs
+    files are held in memory. Files are yielded in completion order; the entries are the
+    same as those of iter_project_index.
+
+    Yields:
+        tuple: (relative_path, details dict)
+    """
+    import asyncio
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+    from concurrent.futures.process import BrokenProcessPool
+    logger.info("Indexing project structure starting at: %s", root_dir)
+    if ignore is None:
+        ignore = IgnoreEngine(root_dir)
+    jobs = max(jobs, 1)
+    loop = asyncio.get_running_loop()
+    # One thread more than readers for the walk
+    io_pool = ThreadPoolExecutor(readers + 1, thread_name_prefix='indexer-io')
+    if stats is not None:
+        with stats.phase('walk'):
+            files = await loop.run_in_executor(io_pool, _source_files, root_dir, ignore, cache, git)
+        files = stats.timed_iter('walk', files)
+    else:
+        files = await loop.run_in_executor(io_pool, _source_files, root_dir, ignore, cache, git)
+    files = iter(files)
+    cpu_pools = [ProcessPoolExecutor(jobs)]
+    to_read = asyncio.Queue(readers)
+    to_parse = asyncio.Queue(jobs)
+    # Outcomes hold no file contents, so only the queues before the workers are bounded
+    outcomes = asyncio.Queue()
+
+    async def walk():
+        while (file := await loop.run_in_executor(io_pool, next, files, None)) is not None:
+            details = None
+            if cache is not None:
+                details = await loop.run_in_executor(io_pool, cache.lookup, file[1], file[0], file[2])
+            if details is not None:
+                outcomes.put_nowait((file, (details, None, None, None), True))
+            else:
+                await to_read.put(file)
+        for _ in range(readers):
+            await to_read.put(None)
+
+    async def read():
+        while (file := await to_read.get()) is not None:
+            source, result, digest = await loop.run_in_executor(
+                io_pool, _read_source_file, file, limits, cache is not None)
+            if source is None:
+                outcomes.put_nowait((file, result, False))
+            else:
+                await to_parse.put((file, source, result, digest))
+
+    async def parse():
+        while (item := await to_parse.get()) is not None:
+            file, source, read_timings, digest = item
+            pool = cpu_pools[0]
+            try:
+                details, error, timings, _ = await loop.run_in_executor(
+                    pool, _index_file, file[0], extract_imports, limits, source, ranges)
+            except BrokenProcessPool:
+                # Every file in flight fails with the pool, so each is retried in isolation
+                if cpu_pools[0] is pool:
+                    pool.shutdown(wait=False)
+                    cpu_pools[0] = ProcessPoolExecutor(jobs)
+                details, error, timings, _ = await loop.run_in_executor(
+                    io_pool, _index_file_isolated, file[0], extract_imports, limits, source, ranges)
+            outcomes.put_nowait((file, (details, error, dict(read_timings, **(timings or {})), digest), False))
+
+    async def produce():
+        try:
+            await walk()
+            await asyncio.gather(*readers_tasks)
+            for _ in range(jobs):
+                await to_parse.put(None)
+            await asyncio.gather(*parse_tasks)
+        finally:
+            outcomes.put_nowait(None)
+
+    readers_tasks = [asyncio.ensure_future(read()) for _ in range(readers)]
+    parse_tasks = [asyncio.ensure_future(parse()) for _ in range(jobs)]
+    producer = asyncio.ensure_future(produce())
+    run = _IndexRun(cache, stats)
+    completed = False
+    try:
+        while (item := await outcomes.get()) is not None:
+            entry = run.add(*item)
+            if entry is not None:
+                yield entry
+        await producer
+        completed = True
+    finally:
+        for task in readers_tasks + parse_tasks + [producer]:
+            task.cancel()
+        io_pool.shutdown(wait=completed, cancel_futures=True)
+        cpu_pools[0].shutdown(wait=completed, cancel_futures=True)
+    run.finish()
+
+async def index_project_structure_async(root_dir: str, extract_imports: bool = False, jobs: int = 1,
+                                        cache: ParseCache = None, ignore: IgnoreEngine = None,
+                                        stats: IndexStats = None, limits: ParseLimits = None,
+                                        readers: int = DEFAULT_READERS, git: bool = False, ranges: bool = False):
+    """
+    Builds the same index as index_project_structure from within an event loop, without
+    blocking it; see iter_project_index_async.
+    """
+    entries = [entry async for entry in iter_project_index_async(
+        root_dir, extract_imports, jobs, cache, ignore, stats, limits, readers, git, ranges)]
+    return dict(sorted(entries, key=lambda entry: walk_order_key(entry[0])))
+
+def _iterate_async(entries):
+    """Iterate an async generator from synchronous code, on an event loop of its own."""
+    import asyncio
+    loop = asyncio.new_event_loop()
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(entries.__anext__())
+            except StopAsyncIteration:
+                return
+    finally:
+        loop.run_until_complete(entries.aclose())
+        loop.close()
+
+def write_project_index(project_index: dict, export_filename: str):
+    """Write the index to export_filename as indented JSON."""
+    with open(export_filename, 'w', encoding='utf-8') as index_file:
+        json.dump(project_index, index_file, indent=4)
+
+def write_project_index_ndjson(entries, export_filename: str) -> int:
+    """Write index entries to export_filename as newline delimited JSON, one file per line.
+
+    Every line is flushed as soon as it is written, so the file can be read while
+    entries are still being produced.
+
+    Args:
+        entries: Iterable of (relative_path, details) tuples, e.g. iter_project_index(...) or index.items()
+        export_filename: Path of the file to write
+
+    Returns:
+        int: The number of lines written
+    """
+    count = 0
+    with open(export_filename, 'w', encoding='utf-8') as index_file:
+        for relative_path, details in entries:
+            index_file.write(json.dumps({'file': relative_path, 'details': details}) + '\n')
+            index_file.flush()
+            count += 1
+    return count
+
+def _run_query(args, root_dir: str):
+    """Answer the query subcommand from the newest index file found in root_dir."""
+    from indexer.binary_index import BINARY_INDEX_FILENAME, BinaryIndex
+    from indexer.shards import MANIFEST_FILENAME, SHARD_DIRNAME, ShardedIndex
+    index_path = args.index
+    if index_path is None:
+        candidates = [os.path.join(root_dir, name) for name in
+                      ('ProjectIndex.json', 'ProjectIndex.ndjson', BINARY_INDEX_FILENAME,
+                       os.path.join(SHARD_DIRNAME, MANIFEST_FILENAME))]
+        candidates = [candidate for candidate in candidates if os.path.exists(candidate)]
+        if not candidates:
+            logger.error("No index found in %s; index the project first.", root_dir)
+            exit(1)
+        index_path = max(candidates, key=os.path.getmtime)
+    start = time.perf_counter()
+    filters = dict(kind=args.kind, language=args.language, path_prefix=args.path_prefix, limit=args.limit)
+    if os.path.basename(index_path) == MANIFEST_FILENAME:
+        index_path = os.path.dirname(index_path)
+    # Shards are loaded on demand and the binary index only decodes the files declaring the
+    # names it finds, so their loading time counts as query time
+    if os.path.isdir(index_path):
+        project_index = ShardedIndex(index_path)
+    elif index_path.endswith('.bin'):
+        project_index = BinaryIndex(index_path)
+    else:
+        project_index = ProjectIndex.load(index_path)
+    loaded = time.perf_counter()
+    if args.fuzzy:
+        matches = project_index.fuzzy_search(args.name, **filters)
+    elif args.prefix or not args.name:
+        matches = [(symbol, None) for symbol in project_index.search_prefix(args.name, **filters)]
+    else:
+        matches = [(symbol, None) for symbol in project_index.lookup(args.name, **filters)]
+    finished = time.perf_counter()
+    if isinstance(project_index, ShardedIndex):
+        source = (f"{len(project_index)} symbols, {project_index.loaded_shard_count} of "
+                  f"{len(project_index.shards)} shard(s) loaded from {index_path}")
+    elif isinstance(project_index, BinaryIndex):
+        source = f"{project_index.symbol_count} symbols in {index_path}"
+        project_index.close()
+    else:
+        source = f"{len(project_index)} symbols loaded from {index_path}"
+    for symbol, distance in matches:
+        qualified_name = f"{symbol.container}.{symbol.name}" if symbol.container else symbol.name
+        line = f"{symbol.kind:<9} {qualified_name}  {symbol.path}" + (f"  {symbol.signature}" if symbol.signature else '')
+        print(line if distance is None else f"{distance:<5g} {line}")
+        if args.snippet:
+            _print_snippet(root_dir, symbol)
+    print(f"{len(matches)} result(s) in {(finished - loaded) * 1000:.2f} ms ({source} in {loaded - start:.2f}s).")
+
+def _print_snippet(root_dir: str, symbol):
+    """Print the source of a query result below it, indented."""
+    from indexer.snippets import SnippetError, read_snippet
+    try:
+        snippet = read_snippet(root_dir, symbol)
+    except SnippetError as e:
+        logger.warning("%s", e)
+        return
+    start_line = symbol.range[0]
+    for number, text in enumerate(snippet.splitlines(), start_line):
+        print(f"    {number:>5}  {text}")
+
+def _configure_logging(level: int):
+    """Log progress to stdout and warnings and errors to stderr, as plain messages."""
+    stdout_handler = logging.StreamHandler(sys.stdout)
+    stdout_handler.addFilter(lambda record: record.levelno < logging.WARNING)
+    stderr_handler = logging.StreamHandler(sys.stderr)
+    stderr_handler.setLevel(logging.WARNING)
+    logging.basicConfig(level=level, format='%(message)s', handlers=[stdout_handler, stderr_handler])
+
+if __name__ == "__main__":
+    # Specify pwd as default root directory and argument --path if provided
+    root_directory = os.getcwd()  # Default to current working directory
+    # Check if a path argument is provided
+    parser = argparse.ArgumentParser(description='Index project structure for C# and Python files.')
+    parser.add_argument('--path', type=str, help='Path to the project directory to index')
+    parser.add_argument('--imports', action='store_true', help='Extract imports from Python files', default=False)
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='Number of worker processes used for parsing (0 = one per CPU, default: 1)')
+    parser.add_argument('--readers', type=int, default=0, metavar='N',
+                        help='Read up to N files at once on threads while the --jobs workers (at least one) parse, '
+                             'which pays off on network file systems (default: 0, read every file while parsing it)')
+    parser.add_argument('--no-cache', action='store_true', default=False,
+                        help=f'Parse every file again instead of reusing {CACHE_FILENAME}')
+    parser.add_argument('--shared-cache', action='store_true', default=False,
+                        help='Also reuse what was extracted from identical files in any project, checkout or branch, '
+                             f'through a cache in {os.path.join(default_blob_cache_dir(), BLOB_CACHE_FILENAME)}')
+    parser.add_argument('--shared-cache-size', type=int, default=DEFAULT_MAX_SIZE // (1024 * 1024), metavar='MB',
+                        help='Size of the shared cache beyond which the least recently used entries are evicted '
+                             f'(default: {DEFAULT_MAX_SIZE // (1024 * 1024)})')
+    parser.add_argument('--ranges', action='store_true', default=False,
+                        help='Record the start and end line and byte offset of every symbol, '
+                             'which query --snippet needs to print its source')
+    parser.add_argument('--exclude', action='append', default=[], metavar='PATTERN',
+                        help='Skip files and directories matching a .gitignore style pattern (repeatable)')
+    parser.add_argument('--git', action='store_true', default=False,
+                        help='In a git checkout, index the files listed by git instead of walking the tree, and '
+                             'trust git about which files changed since the last run (submodules are not indexed)')
+    parser.add_argument('--no-gitignore', action='store_true', default=False,
+                        help='Do not honor .gitignore files')
+    parser.add_argument('--no-default-excludes', action='store_true', default=False,
+                        help='Also walk folders like .git, node_modules, bin, obj, venv, dist and build')
+    parser.add_argument('--watch', action='store_true', default=False,
+                        help='Keep running and update the index incrementally whenever a file changes')
+    parser.add_argument('--watch-memory', type=int, default=256,
+                        help='Memory budget in MB for syntax trees retained in watch mode (default: 256)')
+    parser.add_argument('--format', choices=['json', 'ndjson', 'binary'], default='json',
+                        help='Write ProjectIndex.json, stream one line per file to ProjectIndex.ndjson '
+                             'while indexing, or write the memory-mappable ProjectIndex.bin (default: json)')
+    parser.add_argument('--sqlite', action='store_true', default=False,
+                        help='Also write the index to the SQLite database ProjectIndex.db, '
+                             'rewriting only the rows of changed files')
+    parser.add_argument('--stats', action='store_true', default=False,
+                        help=f'Log timings and counters per phase, per language and for the slowest files, '
+                             f'and write them to {STATS_FILENAME}')
+    parser.add_argument('--slowest', type=int, default=10, metavar='N',
+                        help='Number of slowest files listed by --stats (default: 10)')
+    parser.add_argument('--profile', choices=['cpu', 'memory'],
+                        help=f'Profile the run with cProfile (also written to {PROFILE_FILENAME}) '
+                             'or tracemalloc and log the top entries')
+    verbosity = parser.add_mutually_exclusive_group()
+    verbosity.add_argument('--quiet', action='store_true', default=False,
+                           help='Only log warnings and errors, to stderr; nothing is written to stdout while indexing')
+    verbosity.add_argument('--verbose', action='store_true', default=False,
+                           help='Also log what the parsers find in every file')
+    parser.add_argument('--max-file-size', type=int, default=DEFAULT_MAX_FILE_SIZE // 1024, metavar='KB',
+                        help='Record larger files as skipped instead of parsing them, 0 for no limit '
+                             f'(default: {DEFAULT_MAX_FILE_SIZE // 1024})')
+    parser.add_argument('--parse-timeout', type=float, default=DEFAULT_PARSE_TIMEOUT, metavar='SECONDS',
+                        help='Record files that take longer to parse as skipped, 0 for no limit '
+                             f'(default: {DEFAULT_PARSE_TIMEOUT:g})')
+    parser.add_argument('--keep-minified', action='store_true', default=False,
+                        help='Also parse files that look minified, which are skipped by default')
+    parser.add_argument('--keep-generated', action='store_true', default=False,
+                        help='Also parse generated files like *.Designer.cs, *.g.cs, *.min.js, *.d.ts and files '
+                             'marked <auto-generated> or @generated, which are skipped by default')
+    parser.add_argument('--shard-depth', type=int, metavar='DEPTH',
+                        help='Also write the index to ProjectIndex.shards, one shard per directory at this depth '
+                             '(1 = top-level directories), rewriting only the shards that changed')
+    subparsers = parser.add_subparsers(dest='command', metavar='command')
+    query_parser = subparsers.add_parser('query', help='Look up symbols in the index of the project at --path')
+    query_parser.add_argument('name', nargs='?', default='',
+                              help='Symbol name, optionally qualified like OrderService.Submit; '
+                                   'without a name every symbol matching the filters is listed')
+    query_parser.add_argument('--prefix', action='store_true', default=False,
+                              help='Match every name starting with NAME, ignoring case')
+    query_parser.add_argument('--fuzzy', action='store_true', default=False,
+                              help='Rank the names closest to NAME, tolerating typos and abbreviations')
+    query_parser.add_argument('--kind', action='append', choices=SYMBOL_KINDS,
+                              help='Only return symbols of this kind (repeatable)')
+    query_parser.add_argument('--language', choices=sorted(set(LANGUAGES.values())),
+                              help='Only return symbols declared in files of this language')
+    query_parser.add_argument('--in', dest='path_prefix', metavar='PATH',
+                              help='Only return symbols declared in this file or below this directory')
+    query_parser.add_argument('--snippet', action='store_true', default=False,
+                              help='Print the source of every result, read from the byte range recorded by --ranges')
+    query_parser.add_argument('--limit', type=int, default=50, help='Maximum number of results (default: 50)')
+    query_parser.add_argument('--index', metavar='FILE',
+                              help='Index file or shard directory to load (default: the newest ProjectIndex.json, '
+                                   '.ndjson, .bin or .shards in --path)')
+    args = parser.parse_args()
+    _configure_logging(logging.WARNING if args.quiet else logging.DEBUG if args.verbose else logging.INFO)
+    if args.path:
+        root_directory = args.path
+    # Check if the provided path exists
+    if not os.path.exists(root_directory):
+        logger.error("Provided path does not exist: %s", root_directory)
+        exit(1)
+    # Check if the provided path is a directory
+    if not os.path.isdir(root_directory):
+        logger.error("Provided path is not a directory: %s", root_directory)
+        exit(1)
+    if args.shard_depth is not None and args.shard_depth < 1:
+        logger.error("--shard-depth must be at least 1, got %d", args.shard_depth)
+        exit(1)
+    if args.command == 'query':
+        _run_query(args, root_directory)
+        exit(0)
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count() or 1
+    ignore = IgnoreEngine(root_directory, args.exclude, not args.no_gitignore, not args.no_default_excludes)
+    limits = ParseLimits(args.max_file_size * 1024, args.parse_timeout, not args.keep_minified,
+                         not args.keep_generated)
+    cache = None
+    if not args.no_cache:
+        blobs = BlobCache(max_size=args.shared_cache_size * 1024 * 1024) if args.shared_cache else None
+        cache = ParseCache(os.path.join(root_directory, CACHE_FILENAME), args.imports, limits, blobs, args.ranges)
+    stats = IndexStats(args.slowest)
+    if args.profile:
+        if jobs > 1:
+            logger.warning("--profile only covers the main process, the %d worker processes are not profiled.", jobs)
+        profiling = profile_run(args.profile, os.path.join(root_directory, PROFILE_FILENAME))
+    else:
+        profiling = contextlib.nullcontext()
+    with profiling:
+        # Index the project structure starting at the specified root directory
+        if args.readers > 0:
+            entries = _iterate_async(iter_project_index_async(root_directory, args.imports, jobs, cache, ignore,
+                                                              stats, limits, args.readers, args.git, args.ranges))
+        else:
+            entries = iter_project_index(root_directory, args.imports, jobs, cache, ignore, stats, limits, args.git,
+                                         args.ranges)
+        if args.format == 'ndjson':
+            export_filename = f"{root_directory}/ProjectIndex.ndjson"
+            # Lines are written as files complete, so serializing is part of the per-file loop;
+            # only watch mode, SQLite and shards need the whole index
+            index = {}
+            if args.watch or args.sqlite or args.shard_depth:
+                entries = ((relative_path, index.setdefault(relative_path, details))
+                           for relative_path, details in entries)
+            write_project_index_ndjson(entries, export_filename)
+            index = dict(sorted(index.items(), key=lambda entry: walk_order_key(entry[0])))
+            write_index = lambda project_index: write_project_index_ndjson(project_index.items(), export_filename)
+        else:
+            if args.format == 'binary':
+                from indexer.binary_index import BINARY_INDEX_FILENAME, write_binary_index
+                export_filename = f"{root_directory}/{BINARY_INDEX_FILENAME}"
+                writer = write_binary_index
+            else:
+                # Export file renamed to ProjectIndex.json
+                export_filename = f"{root_directory}/ProjectIndex.json"
+                writer = write_project_index
+            # Sort into walk order so the output doesn't depend on the scheduling
+            index = dict(sorted(entries, key=lambda entry: walk_order_key(entry[0])))
+            with stats.phase('serialize'):
+                writer(index, export_filename)
+            write_index = lambda project_index: writer(project_index, export_filename)
+        logger.info("Project structure indexed successfully and exported to %s.", export_filename)
+        if args.sqlite:
+            from indexer.sqlite_index import SQLITE_INDEX_FILENAME, write_sqlite_index
+            sqlite_filename = f"{root_directory}/{SQLITE_INDEX_FILENAME}"
+            with stats.phase('sqlite'):
+                write_sqlite_index(index, sqlite_filename)
+            write_file_index = write_index
+            def write_index(project_index: dict):
+                write_file_index(project_index)
+                write_sqlite_index(project_index, sqlite_filename)
+        if args.shard_depth:
+            from indexer.shards import SHARD_DIRNAME, write_sharded_index
+            shard_dir = f"{root_directory}/{SHARD_DIRNAME}"
+            with stats.phase('shards'):
+                write_sharded_index(index, shard_dir, args.shard_depth)
+            write_unsharded_index = write_index
+            def write_index(project_index: dict):
+                write_unsharded_index(project_index)
+                write_sharded_index(project_index, shard_dir, args.shard_depth)
+    if args.stats:
+        stats_filename = f"{root_directory}/{STATS_FILENAME}"
+        with open(stats_filename, 'w', encoding='utf-8') as stats_file:
+            json.dump(stats.to_dict(), stats_file, indent=4)
+        stats.log_summary()
+        logger.info("Indexing statistics written to %s.", stats_filename)
+    if args.watch:
+        from indexer.watch import WatchIndexer
+        watch_indexer = WatchIndexer(root_directory, index, write_index,
+                                     args.imports, args.watch_memory * 1024 * 1024, ignore=ignore, limits=limits,
+                                     ranges=args.ranges)
+        watch_indexer.run()
@@ -1,132 +1,226 @@
+import io
 import json
 from pathlib import Path
 import time
 import argparse
+import concurrent.futures
+import contextlib
+import getpass
+import multiprocessing
 import os
+import socket
+import stat
+import subprocess
 import sys
+import tempfile
 
-# --- Set Environment Variable for Pythonnet Runtime ---
-print("Setting PYTHONNET_RUNTIME=coreclr environment variable...")
-os.environ['PYTHONNET_RUNTIME'] = 'coreclr'
-
-# --- Pythonnet Setup ---
-try:
-    import clr
-    print("pythonnet library imported.")
-    runtime_env = os.environ.get('PYTHONNET_RUNTIME')
-    if runtime_env and runtime_env.lower() == 'coreclr':
-        print("Confirmed PYTHONNET_RUNTIME=coreclr is set.")
-    else:
-        print("Warning: PYTHONNET_RUNTIME might not be 'coreclr'. Issues may occur.")
-
-except ImportError:
-    print("Error: pythonnet library not found.")
-    print("Please install it using: pip install pythonnet")
-    sys.exit(1)
-except Exception as e:
-    print(f"Error during pythonnet import or runtime check: {e}")
-    sys.exit(1)
-
-
-# --- Load Roslyn Assemblies ---
-roslyn_loaded = False
-try:
-    roslyn_version = "4.8.0"
-    target_framework = "netstandard2.0"
-    nuget_base_path = Path.home() / ".nuget" / "packages"
-
-    # Construct correct paths for the assemblies
-    analysis_common_pkg_path = nuget_base_path / "microsoft.codeanalysis.common" / roslyn_version / "lib" / target_framework
-    analysis_dll = analysis_common_pkg_path / "Microsoft.CodeAnalysis.dll"
-
-    csharp_pkg_path = nuget_base_path / "microsoft.codeanalysis.csharp" / roslyn_version / "lib" / target_framework
-    csharp_dll = csharp_pkg_path / "Microsoft.CodeAnalysis.CSharp.dll"
-
-    # Debug prints for paths
-    print(f"Attempting to load Roslyn v{roslyn_version} from NuGet cache:")
-    print(f" - Analysis DLL: {analysis_dll}")
-    print(f" - CSharp DLL: {csharp_dll}")
-
-    # Verify paths exist
-    if not analysis_dll.exists():
-        raise FileNotFoundError(f"Microsoft.CodeAnalysis.dll not found at expected NuGet path: {analysis_dll}")
-    if not csharp_dll.exists():
-        raise FileNotFoundError(f"Microsoft.CodeAnalysis.CSharp.dll not found at expected NuGet path: {csharp_dll}")
-
-    # Load the assemblies
-    clr.AddReference(str(analysis_dll))
-    clr.AddReference(str(csharp_dll))
-    roslyn_loaded = True
-    print("Roslyn assemblies loaded successfully from NuGet cache.")
-
-    # Import namespaces after loading assemblies
-    import Microsoft.CodeAnalysis as MSAnalysis
-    import Microsoft.CodeAnalysis.CSharp as MSCSharp
-    import Microsoft.CodeAnalysis.CSharp.Syntax as MSSyntax
-    print("Roslyn namespaces imported successfully.")
-
-except Exception as e:
-    print(f"Error: Failed to load or import Roslyn assemblies. {e}")
-    sys.exit(1)
-
-
-def get_parent_context(node):
-    """Finds the parent context (namespace, class, etc.) for a given node."""
-    parent = node.Parent
-    while parent is not None:
-        if isinstance(parent, MSSyntax.BaseTypeDeclarationSyntax):  # Class, Struct, Interface, Enum, Record
-            return parent.Identifier.ValueText
-        elif isinstance(parent, MSSyntax.NamespaceDeclarationSyntax):
-            return parent.Name.ToString()
-        parent = parent.Parent
-    return None
-
-
-def index_csharp_and_razor_files(root_dir, output_file="ProjectIndex.json"):
-    """Indexes C# and Razor files in the given directory."""
+# Roslyn namespaces, imported by load_roslyn
+MSAnalysis = None
+MSCSharp = None
+MSSyntax = None
+# Parse options shared by every file, created by load_roslyn
+PARSE_OPTIONS = None
+
+ROSLYN_VERSION = "4.8.0"
+TARGET_FRAMEWORK = "netstandard2.0"
+
+# Version of the requests understood by the worker started with --serve
+PROTOCOL_VERSION = 1
+# Seconds the worker waits for a job before it exits
+DEFAULT_IDLE_TIMEOUT = 30 * 60
+# Directories never entered by the walk
+EXCLUDED_DIR_NAMES = {"obj", "bin"}
+# A parse process costs a CLR boot and a Roslyn load, so each must get at least this many files
+MIN_FILES_PER_PROCESS = 50
+# Pool of parse processes, kept across the jobs of a worker started with --serve
+_process_pool = None
+_process_pool_size = 0
+
+# Seconds a newly started worker may take to boot the CLR and load Roslyn
+WORKER_START_TIMEOUT = 60
+
+
+def load_roslyn():
+    """Boots CoreCLR through pythonnet and loads the Roslyn assemblies, once per process."""
+    global MSAnalysis, MSCSharp, MSSyntax, PARSE_OPTIONS
+    if MSSyntax is not None:
+        return
+
+    # --- Set Environment Variable for Pythonnet Runtime ---
+    print("Setting PYTHONNET_RUNTIME=coreclr environment variable...")
+    os.environ['PYTHONNET_RUNTIME'] = 'coreclr'
+
+    # --- Pythonnet Setup ---
+    try:
+        import clr
+        print("pythonnet library imported.")
+        runtime_env = os.environ.get('PYTHONNET_RUNTIME')
+        if runtime_env and runtime_env.lower() == 'coreclr':
+            print("Confirmed PYTHONNET_RUNTIME=coreclr is set.")
+        else:
+            print("Warning: PYTHONNET_RUNTIME might not be 'coreclr'. Issues may occur.")
+
+    except ImportError:
+        print("Error: pythonnet library not found.")
+        print("Please install it using: pip install pythonnet")
+        sys.exit(1)
+    except Exception as e:
+        print(f"Error during pythonnet import or runtime check: {e}")
+        sys.exit(1)
+
+    # --- Load Roslyn Assemblies ---
+    try:
+        nuget_base_path = Path.home() / ".nuget" / "packages"
+
+        # Construct correct paths for the assemblies
+        analysis_common_pkg_path = nuget_base_path / "microsoft.codeanalysis.common" / ROSLYN_VERSION / "lib" / TARGET_FRAMEWORK
+        analysis_dll = analysis_common_pkg_path / "Microsoft.CodeAnalysis.dll"
+
+        csharp_pkg_path = nuget_base_path / "microsoft.codeanalysis.csharp" / ROSLYN_VERSION / "lib" / TARGET_FRAMEWORK
+        csharp_dll = csharp_pkg_path / "Microsoft.CodeAnalysis.CSharp.dll"
+
+        # Debug prints for paths
+        print(f"Attempting to load Roslyn v{ROSLYN_VERSION} from NuGet cache:")
+        print(f" - Analysis DLL: {analysis_dll}")
+        print(f" - CSharp DLL: {csharp_dll}")
+
+        # Verify paths exist
+        if not analysis_dll.exists():
+            raise FileNotFoundError(f"Microsoft.CodeAnalysis.dll not found at expected NuGet path: {analysis_dll}")
+        if not csharp_dll.exists():
+            raise FileNotFoundError(f"Microsoft.CodeAnalysis.CSharp.dll not found at expected NuGet path: {csharp_dll}")
+
+        # Load the assemblies
+        clr.AddReference(str(analysis_dll))
+        clr.AddReference(str(csharp_dll))
+        print("Roslyn assemblies loaded successfully from NuGet cache.")
+
+        # Import namespaces after loading assemblies
+        import Microsoft.CodeAnalysis as analysis
+        import Microsoft.CodeAnalysis.CSharp as csharp
+        import Microsoft.CodeAnalysis.CSharp.Syntax as syntax
+        MSAnalysis, MSCSharp, MSSyntax = analysis, csharp, syntax
+        PARSE_OPTIONS = MSCSharp.CSharpParseOptions(languageVersion=MSCSharp.LanguageVersion.Latest)
+        print("Roslyn namespaces imported successfully.")
+
+    except Exception as e:
+        print(f"Error: Failed to load or import Roslyn assemblies. {e}")
+        sys.exit(1)
+
+
+def find_source_files(root_path):
+    """Finds the .cs and .razor files below root_path in one walk, without entering obj and bin directories.
+
+    Returns:
+        tuple: (C# file paths, Razor file paths), each sorted by directory and name
+    """
+    cs_files = []
+    razor_files = []
+    for dir_path, dir_names, file_names in os.walk(root_path):
+        dir_names[:] = sorted(name for name in dir_names if name.lower() not in EXCLUDED_DIR_NAMES)
+        for file_name in sorted(file_names):
+            extension = os.path.splitext(file_name)[1].lower()
+            if extension == ".cs":
+                cs_files.append(os.path.join(dir_path, file_name))
+            elif extension == ".razor":
+                razor_files.append(os.path.join(dir_path, file_name))
+    return cs_files, razor_files
+
+
+def _collect_definitions(members, relative_path_str, parent, definitions):
+    """Adds the classes and namespaces declared by members and their nested declarations to definitions.
+
+    Only namespace and type declarations are descended into: classes can't be declared
+    anywhere else, so method bodies, properties and statements are never visited.
+    """
+    for member in members:
+        if isinstance(member, MSSyntax.ClassDeclarationSyntax):
+            name = member.Identifier.ValueText
+            # Add class definition as [name, path, parent]
+            definitions.append([name, relative_path_str, parent])
+            _collect_definitions(member.Members, relative_path_str, name, definitions)
+        elif isinstance(member, MSSyntax.NamespaceDeclarationSyntax):
+            name = member.Name.ToString()
+            # Add namespace definition as [name, path, None]
+            definitions.append([name, relative_path_str, None])
+            _collect_definitions(member.Members, relative_path_str, name, definitions)
+        elif isinstance(member, MSSyntax.TypeDeclarationSyntax):  # Struct, Interface, Record
+            _collect_definitions(member.Members, relative_path_str, member.Identifier.ValueText, definitions)
+        elif isinstance(member, MSSyntax.FileScopedNamespaceDeclarationSyntax):
+            _collect_definitions(member.Members, relative_path_str, parent, definitions)
+
+
+def index_csharp_file(file_path, relative_path_str):
+    """Parses a C# file and returns its class and namespace definitions."""
+    with open(file_path, "r", encoding="utf-8") as f:
+        content = f.read()
+    syntax_tree = MSCSharp.CSharpSyntaxTree.ParseText(content, options=PARSE_OPTIONS, path=file_path)
+    definitions = []
+    _collect_definitions(syntax_tree.GetCompilationUnitRoot().Members, relative_path_str, None, definitions)
+    return definitions
+
+
+def _index_csharp_file_safely(job):
+    """Runs index_csharp_file for a (path, relative path) job, returning (definitions, error message)."""
+    file_path, relative_path_str = job
+    try:
+        return index_csharp_file(file_path, relative_path_str), None
+    except Exception as e:
+        return [], f"Error processing file {relative_path_str}: {e}"
+
+
+def _init_parse_process():
+    # The loading messages of every process would drown the progress of the run
+    with contextlib.redirect_stdout(io.StringIO()):
+        load_roslyn()
+
+
+def _get_process_pool(workers):
+    """Returns a pool of workers parse processes, reusing the previous one if it has the same size."""
+    global _process_pool, _process_pool_size
+    if _process_pool is not None and _process_pool_size != workers:
+        _process_pool.shutdown()
+        _process_pool = None
+    if _process_pool is None:
+        # The CLR doesn't survive a fork, every process boots its own
+        _process_pool = concurrent.futures.ProcessPoolExecutor(
+            workers, mp_context=multiprocessing.get_context("spawn"), initializer=_init_parse_process)
+        _process_pool_size = workers
+    return _process_pool
+
+
+def index_csharp_and_razor_files(root_dir, output_file="ProjectIndex.json", workers=None):
+    """Indexes C# and Razor files in the given directory.
+
+    C# files are parsed by up to workers processes (default: one per CPU), fewer for small
+    projects, where booting the CLR in every process would cost more than it saves.
+    """
+    load_roslyn()
     start_time = time.time()
     all_definitions = []
     root_path = Path(root_dir).resolve()
 
     print(f"Starting indexing in: {root_path}")
 
-    # Find all .cs and .razor files
-    all_files = list(root_path.rglob("*.cs")) + list(root_path.rglob("*.razor"))
-    print(f"Found {len(all_files)} .cs and .razor files.")
-
-    excluded_dir_names = {"obj", "bin"}
-    files_to_process = [f for f in all_files if not any(part.lower() in excluded_dir_names for part in f.parts)]
+    cs_files, razor_files = find_source_files(root_path)
+    print(f"Found {len(cs_files) + len(razor_files)} .cs and .razor files.")
 
-    for file_path in files_to_process:
-        relative_path_str = str(file_path.relative_to(root_path)).replace("\\", "/")
-        file_extension = file_path.suffix.lower()
+    jobs = [(file_path, os.path.relpath(file_path, root_path).replace("\\", "/")) for file_path in cs_files]
+    workers = min(workers or os.cpu_count() or 1, len(jobs) // MIN_FILES_PER_PROCESS)
+    if workers > 1:
+        print(f"Parsing with {workers} processes.")
+        pool = _get_process_pool(workers)
+        results = pool.map(_index_csharp_file_safely, jobs, chunksize=max(1, len(jobs) // (workers * 8)))
+    else:
+        results = map(_index_csharp_file_safely, jobs)
+    for definitions, error in results:
+        if error:
+            print(error)
+        all_definitions.extend(definitions)
 
-        try:
-            content = file_path.read_text(encoding="utf-8")
-
-            if file_extension == ".cs":
-                parse_options = MSCSharp.CSharpParseOptions(languageVersion=MSCSharp.LanguageVersion.Latest)
-                syntax_tree = MSCSharp.CSharpSyntaxTree.ParseText(content, options=parse_options, path=str(file_path))
-                root = syntax_tree.GetRoot()
-                
-                for node in root.DescendantNodes():
-                    # Only index high-level definitions
-                    if isinstance(node, MSSyntax.ClassDeclarationSyntax):
-                        name = node.Identifier.ValueText
-                        parent = get_parent_context(node)
-                        # Add class definition as [name, path, parent]
-                        all_definitions.append([name, relative_path_str, parent])
-                    elif isinstance(node, MSSyntax.NamespaceDeclarationSyntax):
-                        name = node.Name.ToString()
-                        # Add namespace definition as [name, path, None]
-                        all_definitions.append([name, relative_path_str, None])
-
-            elif file_extension == ".razor":
-                # Add Razor file path only as a string
-                all_definitions.append(relative_path_str)
-
-        except Exception as e:
-            print(f"Error processing file {relative_path_str}: {e}")
+    for file_path in razor_files:
+        # Add Razor file path only as a string
+        all_definitions.append(os.path.relpath(file_path, root_path).replace("\\", "/"))
 
     # Output results
     try:
@@ -140,6 +234,181 @@ def index_csharp_and_razor_files(root_dir, output_file="ProjectIndex.json"):
     print(f"Indexing completed in {time.time() - start_time:.2f} seconds.")
 
 
+def default_socket_path():
+    """Returns the per-user socket path of the worker started with --serve.
+
+    Without $XDG_RUNTIME_DIR the socket goes in a cSharpIndexer-<uid> directory of the temp directory that
+    only the current user can enter, so another user can't put their own socket at the path beforehand.
+    """
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if not hasattr(os, "getuid"):
+        # No Unix users (nor Unix domain sockets for the worker) on this platform
+        runtime_dir = runtime_dir or tempfile.gettempdir()
+    elif not runtime_dir:
+        runtime_dir = os.path.join(tempfile.gettempdir(), f"cSharpIndexer-{os.getuid()}")
+        os.makedirs(runtime_dir, mode=0o700, exist_ok=True)
+        info = os.lstat(runtime_dir)
+        if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or stat.S_IMODE(info.st_mode) & 0o077:
+            print(f"Error: {runtime_dir} is not a private directory of the current user; "
+                  f"remove it or pass --socket.")
+            sys.exit(1)
+    return os.path.join(runtime_dir, f"cSharpIndexer-{getpass.getuser()}.sock")
+
+
+def _owned_by_current_user(path):
+    """Returns whether the file at path belongs to the current user; raises FileNotFoundError if there is none."""
+    return os.lstat(path).st_uid == os.getuid()
+
+
+def send_request(socket_path, request, timeout=None):
+    """Sends one request to a running worker and returns its reply, or None if no worker is listening."""
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    # The worker reads and writes whatever the request names, so it must be our own
+    try:
+        if not _owned_by_current_user(socket_path):
+            print(f"Warning: {socket_path} belongs to another user, not using it.")
+            return None
+    except FileNotFoundError:
+        return None
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.settimeout(timeout)
+    try:
+        client.connect(socket_path)
+    except (FileNotFoundError, ConnectionRefusedError, socket.timeout):
+        client.close()
+        return None
+    with client, client.makefile("rwb") as stream:
+        stream.write(json.dumps(dict(request, version=PROTOCOL_VERSION)).encode("utf-8") + b"\n")
+        stream.flush()
+        reply = stream.readline()
+    return json.loads(reply) if reply else None
+
+
+def _handle_request(connection):
+    """Runs the request read from a client connection; returns False if the worker should stop."""
+    with connection, connection.makefile("rwb") as stream:
+        # A client gets a few seconds to send its request, the job itself may take as long as it needs
+        connection.settimeout(10)
+        try:
+            request = json.loads(stream.readline())
+        except (OSError, ValueError) as e:
+            print(f"Ignoring malformed request: {e}")
+            return True
+        connection.settimeout(None)
+
+        command = request.get("command", "index")
+        if request.get("version") != PROTOCOL_VERSION:
+            reply = {"ok": False, "output": f"Error: worker speaks protocol version {PROTOCOL_VERSION}, "
+                                            f"not {request.get('version')}. Stop it and start it again.\n"}
+        elif command in ("ping", "stop"):
+            reply = {"ok": True, "output": "", "pid": os.getpid()}
+        elif command == "index":
+            # The job prints its progress like a local run; the client shows it
+            output = io.StringIO()
+            ok = True
+            with contextlib.redirect_stdout(output):
+                try:
+                    index_csharp_and_razor_files(request["root_dir"], request["output"], request.get("workers"))
+                except Exception as e:
+                    print(f"Error: indexing failed in the worker: {e}")
+                    ok = False
+            reply = {"ok": ok, "output": output.getvalue()}
+            print(f"Job for {request['root_dir']} {'done' if ok else 'failed'}.")
+        else:
+            reply = {"ok": False, "output": f"Error: unknown command '{command}'.\n"}
+
+        try:
+            stream.write(json.dumps(reply).encode("utf-8") + b"\n")
+            stream.flush()
+        except OSError as e:
+            print(f"Could not reply to client: {e}")
+        return command != "stop"
+
+
+def serve(socket_path, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+    """Keeps the CLR and Roslyn loaded and runs the index jobs sent to socket_path, one at a time.
+
+    The worker exits on a 'stop' request or after idle_timeout seconds without a job (0 to never exit).
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        print("Error: the worker needs Unix domain sockets, which this platform does not support.")
+        sys.exit(1)
+    if os.path.exists(socket_path):
+        if send_request(socket_path, {"command": "ping"}, timeout=5) is not None:
+            print(f"A worker is already listening on {socket_path}.")
+            return
+        # Left behind by a worker that didn't shut down cleanly
+        try:
+            if not _owned_by_current_user(socket_path):
+                print(f"Error: {socket_path} belongs to another user; pass another --socket.")
+                sys.exit(1)
+            os.remove(socket_path)
+        except FileNotFoundError:
+            pass
+        except PermissionError as e:
+            print(f"Error: cannot remove the stale socket {socket_path}: {e}")
+            sys.exit(1)
+
+    load_roslyn()
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    # Only the current user may connect and make the worker read and write their files
+    previous_umask = os.umask(0o077)
+    try:
+        server.bind(socket_path)
+    finally:
+        os.umask(previous_umask)
+    server.listen()
+    server.settimeout(idle_timeout or None)
+    print(f"Worker {os.getpid()} listening on {socket_path}.", flush=True)
+
+    try:
+        while True:
+            try:
+                connection, _ = server.accept()
+            except socket.timeout:
+                print(f"No job for {idle_timeout} seconds, stopping.")
+                break
+            if not _handle_request(connection):
+                print("Stop requested.")
+                break
+            sys.stdout.flush()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        try:
+            os.remove(socket_path)
+        except OSError:
+            pass
+
+
+def start_server(socket_path, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+    """Starts a worker in the background and waits until it accepts jobs; returns whether it does."""
+    if send_request(socket_path, {"command": "ping"}, timeout=5) is not None:
+        print(f"A worker is already listening on {socket_path}.")
+        return True
+    log_path = socket_path + ".log"
+    print(f"Starting worker on {socket_path} (log: {log_path})...")
+    with open(log_path, "ab") as log:
+        process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--serve",
+             "--socket", socket_path, "--idle-timeout", str(idle_timeout)],
+            stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT,
+            start_new_session=True)
+    deadline = time.time() + WORKER_START_TIMEOUT
+    while time.time() < deadline:
+        if send_request(socket_path, {"command": "ping"}, timeout=5) is not None:
+            print("Worker started.")
+            return True
+        if process.poll() is not None:
+            break
+        time.sleep(0.2)
+    print(f"Error: the worker did not start, see {log_path}.")
+    return False
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Index C# and Razor project definitions.")
     parser.add_argument(
@@ -153,11 +422,70 @@ if __name__ == "__main__":
         default="ProjectIndex.json",
         help="Output JSON file name (default: ProjectIndex.json)."
     )
+    parser.add_argument(
+        "-j", "--workers",
+        type=int,
+        default=None,
+        help="Number of processes parsing C# files (default: one per CPU, fewer for small projects)."
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Run a worker that keeps the CLR and Roslyn loaded and indexes the projects sent to it."
+    )
+    parser.add_argument(
+        "--start-server",
+        action="store_true",
+        help="Start a worker in the background, then index the root directory through it."
+    )
+    parser.add_argument(
+        "--stop-server",
+        action="store_true",
+        help="Stop the running worker and exit."
+    )
+    parser.add_argument(
+        "--no-server",
+        action="store_true",
+        help="Index in this process even if a worker is running."
+    )
+    parser.add_argument(
+        "--socket",
+        default=None,
+        help="Socket of the worker (default: cSharpIndexer-<user>.sock in $XDG_RUNTIME_DIR or in a private "
+             "cSharpIndexer-<uid> directory of the temp directory)."
+    )
+    parser.add_argument(
+        "--idle-timeout",
+        type=int,
+        default=DEFAULT_IDLE_TIMEOUT,
+        help=f"Seconds a worker waits for a job before exiting, 0 to never exit (default: {DEFAULT_IDLE_TIMEOUT})."
+    )
     args = parser.parse_args()
+    socket_path = args.socket or default_socket_path()
+
+    if args.serve:
+        serve(socket_path, args.idle_timeout)
+        sys.exit(0)
+    if args.stop_server:
+        if send_request(socket_path, {"command": "stop"}, timeout=5) is None:
+            print(f"No worker is listening on {socket_path}.")
+        else:
+            print("Worker stopped.")
+        sys.exit(0)
 
     target_dir = Path(args.root_dir)
     if not target_dir.is_dir():
         print(f"Error: Provided root directory '{args.root_dir}' not found or is not a directory.")
         sys.exit(1)
 
-    index_csharp_and_razor_files(target_dir, args.output)
\ No newline at end of file
+    if args.start_server and not start_server(socket_path, args.idle_timeout):
+        sys.exit(1)
+    if not args.no_server:
+        # The worker has its own working directory, so it gets an absolute path
+        reply = send_request(socket_path, {"command": "index", "root_dir": str(target_dir.resolve()),
+                                           "output": args.output, "workers": args.workers})
+        if reply is not None:
+            print(reply["output"], end="")
+            sys.exit(0 if reply["ok"] else 1)
+
+    index_csharp_and_razor_files(target_dir, args.output, args.workers)
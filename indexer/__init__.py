@@ -0,0 +1,3 @@
+from .cache import CACHE_FILENAME, ParseCache, content_hash
+from .symbols import Symbol, iter_symbols
+from .lookup import ProjectIndex
@@ -0,0 +1,597 @@
+import os
+import json
+import mmap
+import struct
+import argparse
+import itertools
+
+from .fuzzy import TrigramIndex, rank_names, trigrams
+from .symbols import in_container, iter_symbols, normalize_filters, path_matches
+
+# Binary index written next to ProjectIndex.json
+BINARY_INDEX_FILENAME = "ProjectIndex.bin"
+
+# Layout, integers are little-endian, varints are LEB128:
+#   header
+#   strings:      string_count UTF-8 strings, unique and sorted by their bytes so comparing
+#                 string ids compares the strings. Blocks of STRING_BLOCK strings are front
+#                 coded: every string is a varint length of the prefix it shares with the
+#                 previous string of the block, a varint length of the rest and the rest.
+#   string blocks: u32 offset of every block into the strings
+#   file table:   per file in index order: varint path string, varint details length, varint
+#                 symbol count; the details follow each other in the value data
+#   name index:   per distinct symbol name, by string id: varint string id delta from the
+#                 previous name, varint file count, varint file id deltas of the files declaring it
+#   name blocks:  u32 string id and u32 offset into the name index of every NAME_BLOCK-th name
+#   value data:   the details of every file, encoded as tagged values (see _encode_value)
+#   trigram table: per trigram of the lower case symbol names, sorted by its UTF-8 bytes: the
+#                 bytes padded with NULs to the key width (3 unless a name isn't ASCII) and
+#                 the u32 offset of its postings; optional, see encode_binary_index
+#   postings:     per trigram, varint string id deltas of the sorted names containing it
+#
+# Symbols aren't stored: they are listed from the details of the files the name index
+# points to, so names, containers and signatures aren't stored twice.
+MAGIC = b'PIDX'
+FORMAT_VERSION = 4
+HEADER = struct.Struct('<4sIIIIIII9Q')
+STRING_BLOCK = 16
+NAME_BLOCK = 32
+# string id of the first name of the block, offset into the name index
+NAME_BLOCK_ENTRY = struct.Struct('<II')
+U32 = struct.Struct('<I')
+# Number of leading characters of a prefix search whose case variants bound the scanned names
+PREFIX_CASE_CHARS = 3
+
+# Value tags
+_NULL, _FALSE, _TRUE, _INT, _FLOAT, _STRING, _LIST, _DICT = range(8)
+_DOUBLE = struct.Struct('<d')
+
+def _write_varint(out: bytearray, value: int):
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def _read_varint(buffer, pos: int) -> tuple:
+    result = shift = 0
+    while True:
+        byte = buffer[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+def _collect_strings(value, strings: set):
+    """Add every string of a JSON value, including dict keys, to strings."""
+    if isinstance(value, str):
+        strings.add(value)
+    elif isinstance(value, list):
+        for item in value:
+            _collect_strings(item, strings)
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            strings.add(key)
+            _collect_strings(item, strings)
+
+def _encode_value(value, string_ids: dict, out: bytearray):
+    """Append a JSON value as a tag byte followed by its payload; strings are string table ids."""
+    if value is None:
+        out.append(_NULL)
+    elif value is True:
+        out.append(_TRUE)
+    elif value is False:
+        out.append(_FALSE)
+    elif isinstance(value, int):
+        out.append(_INT)
+        # Zigzag so small negative numbers stay small
+        _write_varint(out, value * 2 if value >= 0 else -value * 2 - 1)
+    elif isinstance(value, float):
+        out.append(_FLOAT)
+        out += _DOUBLE.pack(value)
+    elif isinstance(value, str):
+        out.append(_STRING)
+        _write_varint(out, string_ids[value])
+    elif isinstance(value, list):
+        out.append(_LIST)
+        _write_varint(out, len(value))
+        for item in value:
+            _encode_value(item, string_ids, out)
+    elif isinstance(value, dict):
+        out.append(_DICT)
+        _write_varint(out, len(value))
+        for key, item in value.items():
+            _write_varint(out, string_ids[key])
+            _encode_value(item, string_ids, out)
+    else:
+        raise TypeError(f"Cannot encode value of type {type(value).__name__}")
+
+def _case_variants(text: str) -> list:
+    """Return every spelling of text in upper and lower case, stopping at a character without a single-character case."""
+    variants = ['']
+    for char in text:
+        cases = {char.lower(), char.upper(), char}
+        if any(len(case) != 1 for case in cases):
+            break
+        variants = [variant + case for variant in variants for case in sorted(cases)]
+    return variants
+
+def _shared_prefix_length(a: bytes, b: bytes) -> int:
+    length = min(len(a), len(b))
+    for i in range(length):
+        if a[i] != b[i]:
+            return i
+    return length
+
+def _encode_strings(encoded_strings: list) -> tuple:
+    """Front code sorted strings in blocks, returning (strings section, block offsets section)."""
+    data = bytearray()
+    blocks = bytearray()
+    previous = b''
+    for i, string in enumerate(encoded_strings):
+        if i % STRING_BLOCK == 0:
+            blocks += U32.pack(len(data))
+            previous = b''
+        shared = _shared_prefix_length(previous, string)
+        _write_varint(data, shared)
+        _write_varint(data, len(string) - shared)
+        data += string[shared:]
+        previous = string
+    return data, blocks
+
+def _encode_trigrams(name_trigrams: dict, string_ids: dict) -> tuple:
+    """Encode the trigram postings of the names, returning (key width, trigram table, postings)."""
+    postings = {}
+    for name, grams in name_trigrams.items():
+        for gram in grams:
+            postings.setdefault(gram.encode('utf8'), []).append(string_ids[name])
+    key_width = max(map(len, postings), default=3)
+    trigram_table = bytearray()
+    postings_data = bytearray()
+    for key in sorted(postings):
+        trigram_table += key.ljust(key_width, b'\0') + U32.pack(len(postings_data))
+        previous_id = 0
+        for name_id in sorted(postings[key]):
+            _write_varint(postings_data, name_id - previous_id)
+            previous_id = name_id
+    return key_width, trigram_table, postings_data
+
+def encode_binary_index(project_index: dict, trigram_index: bool = True) -> bytes:
+    """Encode a project index, as written to ProjectIndex.json, in the binary format.
+
+    Args:
+        project_index: The index to encode
+        trigram_index: Whether to store the trigram index of fuzzy_search; without it the
+            index is smaller and fuzzy_search builds the trigrams of every name in memory
+    """
+    files = list(project_index.items())
+    name_files = {}
+    symbol_counts = []
+    for file_id, (relative_path, details) in enumerate(files):
+        count = 0
+        for symbol in iter_symbols(relative_path, details):
+            declaring = name_files.setdefault(symbol.name, [])
+            if not declaring or declaring[-1] != file_id:
+                declaring.append(file_id)
+            count += 1
+        symbol_counts.append(count)
+
+    # Intern every string once, in byte order
+    strings = set(name_files)
+    for relative_path, details in files:
+        strings.add(relative_path)
+        _collect_strings(details, strings)
+    encoded_strings = sorted(string.encode('utf8') for string in strings)
+    string_ids = {string.decode('utf8'): i for i, string in enumerate(encoded_strings)}
+    string_data, string_blocks = _encode_strings(encoded_strings)
+
+    value_data = bytearray()
+    file_table = bytearray()
+    for (relative_path, details), count in zip(files, symbol_counts):
+        start = len(value_data)
+        _encode_value(details, string_ids, value_data)
+        _write_varint(file_table, string_ids[relative_path])
+        _write_varint(file_table, len(value_data) - start)
+        _write_varint(file_table, count)
+
+    name_index = bytearray()
+    name_blocks = bytearray()
+    previous_id = 0
+    for i, (name_id, file_ids) in enumerate(sorted((string_ids[name], file_ids)
+                                                   for name, file_ids in name_files.items())):
+        if i % NAME_BLOCK == 0:
+            name_blocks += NAME_BLOCK_ENTRY.pack(name_id, len(name_index))
+            previous_id = name_id
+        _write_varint(name_index, name_id - previous_id)
+        _write_varint(name_index, len(file_ids))
+        previous_file = 0
+        for file_id in file_ids:
+            _write_varint(name_index, file_id - previous_file)
+            previous_file = file_id
+        previous_id = name_id
+
+    if trigram_index:
+        name_trigrams = {name: trigrams(name.lower()) for name in name_files}
+        key_width, trigram_table, postings_data = _encode_trigrams(name_trigrams, string_ids)
+        trigram_count = len(trigram_table) // (key_width + U32.size)
+    else:
+        key_width, trigram_table, postings_data, trigram_count = 0, b'', b'', 0
+
+    sections = [string_data, string_blocks, file_table, name_index, name_blocks, value_data,
+                trigram_table, postings_data]
+    offsets = []
+    offset = HEADER.size
+    for section in sections:
+        offsets.append(offset)
+        offset += len(section)
+    # The last offset is the end of the data
+    offsets.append(offset)
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, len(encoded_strings), len(files), sum(symbol_counts),
+                         len(name_files), trigram_count, key_width, *offsets)
+    return b''.join([header, *sections])
+
+def write_binary_index(project_index: dict, export_filename: str, trigram_index: bool = True):
+    """Write the index to export_filename in the binary format, see encode_binary_index.
+
+    The file is replaced atomically, so readers that have it mapped keep a consistent view.
+    """
+    temp_path = f"{export_filename}.tmp"
+    with open(temp_path, 'wb') as index_file:
+        index_file.write(encode_binary_index(project_index, trigram_index))
+    os.replace(temp_path, export_filename)
+
+class BinaryIndex:
+    """Read-only view of a binary index file.
+
+    The file is memory-mapped and only the strings, table entries and file details
+    needed to answer a lookup are decoded, so opening even a large index is instant.
+    The varint file table is decoded on first use.
+    """
+    def __init__(self, index_path: str):
+        self.index_path = index_path
+        with open(index_path, 'rb') as index_file:
+            self._data = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version = struct.unpack_from('<4sI', self._data, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{index_path} is not a binary project index")
+        if version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"{index_path} has format version {version}, expected {FORMAT_VERSION}")
+        (_, _, self.string_count, self.file_count, self.symbol_count, self.name_count, self.trigram_count,
+         self._key_width, self._string_data, self._string_blocks, self._file_table, self._name_index,
+         self._name_blocks, self._value_data, self._trigram_table, self._postings,
+         self._end) = HEADER.unpack_from(self._data, 0)
+        self._strings = {}
+        self._files = None
+        self._file_ids = None
+        # Built by fuzzy_search if the file has no trigram index
+        self._trigram_index = None
+
+    def close(self):
+        self._data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self) -> int:
+        return self.file_count
+
+    def __contains__(self, relative_path: str) -> bool:
+        return self._find_file(relative_path) is not None
+
+    def _string_block(self, block: int) -> list:
+        """Decode the front coded strings of a block as bytes."""
+        data = self._data
+        pos = self._string_data + U32.unpack_from(data, self._string_blocks + block * 4)[0]
+        strings = []
+        previous = b''
+        for _ in range(min(STRING_BLOCK, self.string_count - block * STRING_BLOCK)):
+            shared, pos = _read_varint(data, pos)
+            length, pos = _read_varint(data, pos)
+            previous = previous[:shared] + data[pos:pos + length]
+            pos += length
+            strings.append(previous)
+        return strings
+
+    def _string(self, string_id: int) -> str:
+        string = self._strings.get(string_id)
+        if string is None:
+            first = string_id - string_id % STRING_BLOCK
+            for i, encoded in enumerate(self._string_block(first // STRING_BLOCK), first):
+                self._strings[i] = encoded.decode('utf8')
+            string = self._strings[string_id]
+        return string
+
+    def _block_before(self, key: bytes) -> int:
+        """Return the last string block whose first string is not greater than key, or -1."""
+        # Binary search the blocks by their first string, which isn't front coded
+        low, high = 0, (self.string_count + STRING_BLOCK - 1) // STRING_BLOCK
+        while low < high:
+            middle = (low + high) // 2
+            pos = self._string_data + U32.unpack_from(self._data, self._string_blocks + middle * 4)[0]
+            _, pos = _read_varint(self._data, pos)
+            length, pos = _read_varint(self._data, pos)
+            if self._data[pos:pos + length] <= key:
+                low = middle + 1
+            else:
+                high = middle
+        return low - 1
+
+    def _find_string(self, key: bytes):
+        """Return the id of a string given its UTF-8 bytes, or None."""
+        block = self._block_before(key)
+        if block < 0:
+            return None
+        for i, string in enumerate(self._string_block(block)):
+            if string == key:
+                return block * STRING_BLOCK + i
+        return None
+
+    def _lower_bound(self, key: bytes) -> int:
+        """Return the id of the first string not less than key given as UTF-8 bytes, string_count if there is none."""
+        block = self._block_before(key)
+        if block < 0:
+            return 0
+        for i, string in enumerate(self._string_block(block)):
+            if string >= key:
+                return block * STRING_BLOCK + i
+        return min((block + 1) * STRING_BLOCK, self.string_count)
+
+    def _file_entries(self) -> list:
+        """Decode the file table into (path string id, details offset, details length, symbol count) tuples."""
+        if self._files is None:
+            files = []
+            pos = self._file_table
+            offset = self._value_data
+            for _ in range(self.file_count):
+                path_id, pos = _read_varint(self._data, pos)
+                length, pos = _read_varint(self._data, pos)
+                count, pos = _read_varint(self._data, pos)
+                files.append((path_id, offset, length, count))
+                offset += length
+            self._files = files
+            self._file_ids = {path_id: file_id for file_id, (path_id, _, _, _) in enumerate(files)}
+        return self._files
+
+    def _find_file(self, relative_path: str):
+        path_id = self._find_string(relative_path.encode('utf8'))
+        if path_id is None:
+            return None
+        self._file_entries()
+        return self._file_ids.get(path_id)
+
+    def _decode_value(self, pos: int) -> tuple:
+        data = self._data
+        tag = data[pos]
+        pos += 1
+        if tag == _STRING:
+            string_id, pos = _read_varint(data, pos)
+            return self._string(string_id), pos
+        if tag == _LIST:
+            count, pos = _read_varint(data, pos)
+            items = []
+            for _ in range(count):
+                item, pos = self._decode_value(pos)
+                items.append(item)
+            return items, pos
+        if tag == _DICT:
+            count, pos = _read_varint(data, pos)
+            items = {}
+            for _ in range(count):
+                key_id, pos = _read_varint(data, pos)
+                items[self._string(key_id)], pos = self._decode_value(pos)
+            return items, pos
+        if tag == _INT:
+            value, pos = _read_varint(data, pos)
+            return (value >> 1) ^ -(value & 1), pos
+        if tag == _FLOAT:
+            return _DOUBLE.unpack_from(data, pos)[0], pos + _DOUBLE.size
+        if tag in (_NULL, _FALSE, _TRUE):
+            return (None, False, True)[tag], pos
+        raise ValueError(f"Corrupt binary index: unknown value tag {tag} at offset {pos - 1}")
+
+    def _details(self, file_id: int):
+        return self._decode_value(self._file_entries()[file_id][1])[0]
+
+    def paths(self):
+        """Yield the relative paths of all files, in index order."""
+        for path_id, _, _, _ in self._file_entries():
+            yield self._string(path_id)
+
+    def file_details(self, relative_path: str):
+        """Return the details of one file as they appear in ProjectIndex.json, or None if it isn't indexed."""
+        file_id = self._find_file(relative_path)
+        if file_id is None:
+            return None
+        return self._details(file_id)
+
+    def file_symbols(self, relative_path: str) -> list:
+        """Return the symbols declared in one file, in index order."""
+        details = self.file_details(relative_path)
+        return [] if details is None else list(iter_symbols(relative_path, details))
+
+    def _iter_names(self, start_id: int = 0):
+        """Yield (string id, ids of the declaring files) of the symbol names from a string id on, in order."""
+        # Start at the last block starting at or before the string id
+        low, high = 0, (self.name_count + NAME_BLOCK - 1) // NAME_BLOCK
+        while low < high:
+            middle = (low + high) // 2
+            if NAME_BLOCK_ENTRY.unpack_from(self._data, self._name_blocks + middle * NAME_BLOCK_ENTRY.size)[0] <= start_id:
+                low = middle + 1
+            else:
+                high = middle
+        block = max(low - 1, 0)
+        pos = self._name_index + NAME_BLOCK_ENTRY.unpack_from(
+            self._data, self._name_blocks + block * NAME_BLOCK_ENTRY.size)[1] if self.name_count else 0
+        name_id = 0
+        for i in range(block * NAME_BLOCK, self.name_count):
+            delta, pos = _read_varint(self._data, pos)
+            if i % NAME_BLOCK == 0:
+                # Blocks restart from the name stored in their name block entry
+                name_id = NAME_BLOCK_ENTRY.unpack_from(
+                    self._data, self._name_blocks + i // NAME_BLOCK * NAME_BLOCK_ENTRY.size)[0]
+            name_id += delta
+            count, pos = _read_varint(self._data, pos)
+            file_ids = []
+            file_id = 0
+            for _ in range(count):
+                delta, pos = _read_varint(self._data, pos)
+                file_id += delta
+                file_ids.append(file_id)
+            if name_id >= start_id:
+                yield name_id, file_ids
+
+    def _names(self):
+        """Yield the string ids of the distinct symbol names, in order."""
+        for name_id, _ in self._iter_names():
+            yield name_id
+
+    def _declaring_files(self, name_id: int) -> list:
+        """Return the ids of the files declaring a symbol name, given its string id, in index order."""
+        for current_id, file_ids in self._iter_names(name_id):
+            return file_ids if current_id == name_id else []
+        return []
+
+    def _symbols(self, name: str, file_ids: list, kinds: tuple, language: str, path_prefix: str,
+                 container: str = None):
+        """Yield the symbols with this name declared in the files that pass the filters, in index order.
+
+        Files of another language or outside path_prefix are skipped without decoding their details.
+        """
+        files = self._file_entries()
+        for file_id in file_ids:
+            relative_path = self._string(files[file_id][0])
+            if not path_matches(relative_path, language, path_prefix):
+                continue
+            for symbol in iter_symbols(relative_path, self._details(file_id)):
+                if symbol.name == name and (not kinds or symbol.kind in kinds) and \
+                        (container is None or in_container(symbol, container)):
+                    yield symbol
+
+    def lookup(self, name: str, kind=None, language: str = None, path_prefix: str = None,
+               limit: int = None) -> list:
+        """Return the declarations of a name, in index order.
+
+        Takes the same arguments as ProjectIndex.lookup, including names qualified with their container.
+        """
+        name_id = self._find_string(name.encode('utf8'))
+        container = None
+        if name_id is None and '.' in name:
+            container, _, name = name.rpartition('.')
+            name_id = self._find_string(name.encode('utf8'))
+        if name_id is None:
+            return []
+        kinds, path_prefix = normalize_filters(kind, path_prefix)
+        symbols = self._symbols(name, self._declaring_files(name_id), kinds, language, path_prefix, container)
+        return list(itertools.islice(symbols, limit))
+
+    def search_prefix(self, prefix: str, kind=None, language: str = None, path_prefix: str = None,
+                      limit: int = 50) -> list:
+        """Return the declarations of every name starting with prefix, ignoring case.
+
+        Takes the same arguments and returns the same order as ProjectIndex.search_prefix.
+        Names are sorted by their bytes, so the name index is scanned from every case variant
+        of the first PREFIX_CASE_CHARS characters of prefix, instead of from the first name.
+        """
+        key = prefix.lower()
+        names = []
+        for start in _case_variants(prefix[:PREFIX_CASE_CHARS]):
+            for name_id, file_ids in self._iter_names(self._lower_bound(start.encode('utf8'))):
+                name = self._string(name_id)
+                if not name.startswith(start):
+                    break
+                if name.lower().startswith(key):
+                    names.append((name.lower(), name, file_ids))
+        names.sort()
+        kinds, path_prefix = normalize_filters(kind, path_prefix)
+        symbols = (symbol for _, name, file_ids in names
+                   for symbol in self._symbols(name, file_ids, kinds, language, path_prefix))
+        return list(itertools.islice(symbols, limit))
+
+    def _trigram_postings(self, gram: str):
+        """Return the string ids of the names containing a trigram, or None."""
+        key = gram.encode('utf8')
+        if len(key) > self._key_width:
+            return None
+        key = key.ljust(self._key_width, b'\0')
+        entry_size = self._key_width + U32.size
+        low, high = 0, self.trigram_count
+        while low < high:
+            middle = (low + high) // 2
+            entry = self._trigram_table + middle * entry_size
+            entry_key = self._data[entry:entry + self._key_width]
+            if entry_key == key:
+                pos = self._postings + U32.unpack_from(self._data, entry + self._key_width)[0]
+                if middle + 1 < self.trigram_count:
+                    end = self._postings + U32.unpack_from(self._data, entry + entry_size + self._key_width)[0]
+                else:
+                    end = self._end
+                name_ids = []
+                name_id = 0
+                while pos < end:
+                    delta, pos = _read_varint(self._data, pos)
+                    name_id += delta
+                    name_ids.append(name_id)
+                return name_ids
+            if entry_key < key:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def fuzzy_search(self, query: str, kind=None, language: str = None, path_prefix: str = None,
+                     limit: int = 10) -> list:
+        """Return the symbols whose names are closest to query, using the stored trigram index.
+
+        Takes the same arguments as ProjectIndex.fuzzy_search. Files written without the
+        trigram index get one built in memory from every name on the first search.
+
+        Returns:
+            list: (Symbol, distance) tuples, best first
+        """
+        kinds, path_prefix = normalize_filters(kind, path_prefix)
+        # With filters some names may not contribute any symbol, so rank every candidate
+        filtered = bool(kinds or language or path_prefix)
+        if self.trigram_count:
+            ranked = rank_names(query, self._trigram_postings, self._string, None if filtered else limit)
+        else:
+            if self._trigram_index is None:
+                self._trigram_index = TrigramIndex(self._string(name_id) for name_id in self._names())
+            ranked = self._trigram_index.search(query, None if filtered else limit)
+        results = []
+        for name, distance in ranked:
+            remaining = None if limit is None else limit - len(results)
+            for symbol in self.lookup(name, kinds, language, path_prefix, remaining):
+                results.append((symbol, distance))
+            if limit is not None and len(results) >= limit:
+                break
+        return results
+
+    def to_dict(self) -> dict:
+        """Decode the whole index into the ProjectIndex.json schema."""
+        return {self._string(path_id): self._decode_value(offset)[0]
+                for path_id, offset, _, _ in self._file_entries()}
+
+def read_binary_index(index_path: str) -> dict:
+    """Read a binary index file into the ProjectIndex.json schema."""
+    with BinaryIndex(index_path) as index:
+        return index.to_dict()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Convert a project index between the JSON and the binary format.')
+    parser.add_argument('source', help='ProjectIndex.json or ProjectIndex.bin to convert')
+    parser.add_argument('destination', help='File to write, in the other format')
+    args = parser.parse_args()
+    with open(args.source, 'rb') as source_file:
+        is_binary = source_file.read(len(MAGIC)) == MAGIC
+    if is_binary:
+        with open(args.destination, 'w', encoding='utf-8') as index_file:
+            json.dump(read_binary_index(args.source), index_file, indent=4)
+    else:
+        with open(args.source, 'r', encoding='utf-8') as index_file:
+            write_binary_index(json.load(index_file), args.destination)
+    print(f"Converted {args.source} to {args.destination}.")
@@ -0,0 +1,169 @@
+import os
+import sys
+import json
+import time
+import zlib
+import logging
+import sqlite3
+import hashlib
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Database in the directory returned by default_blob_cache_dir
+BLOB_CACHE_FILENAME = "blobs.db"
+DEFAULT_MAX_SIZE = 512 * 1024 * 1024
+
+# Bump whenever the schema changes; older databases are emptied
+SCHEMA_VERSION = 1
+
+# Separate statements: executescript would commit the transaction creating them
+SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS blobs (
+        key TEXT PRIMARY KEY,
+        -- zlib compressed JSON of the extracted details
+        details BLOB NOT NULL,
+        -- Seconds since the epoch of the last store or hit, for LRU eviction
+        used INTEGER NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS blobs_used ON blobs(used)",
+)
+
+# Hits only move a blob up the LRU order when its last use is older than this
+TOUCH_INTERVAL = 60 * 60
+# Eviction frees space down to this fraction of the size cap, so it doesn't run on every save
+EVICT_TO = 0.9
+# Seconds to wait for another indexer holding the write lock
+BUSY_TIMEOUT = 30
+
+def default_blob_cache_dir() -> str:
+    """Return the per-user cache directory of the indexer, e.g. ~/.cache/project-indexer on Linux."""
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), 'AppData', 'Local')
+    elif sys.platform == 'darwin':
+        base = os.path.join(os.path.expanduser('~'), 'Library', 'Caches')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'project-indexer')
+
+def blob_key(options: dict, extension: str, digest: str) -> str:
+    """Return the key of the details extracted from content with the given hash.
+
+    The extension selects the parser, and the options hold the parser version, the
+    extraction options and the parse limits, so each combination is cached separately.
+    """
+    material = json.dumps([options, extension, digest], sort_keys=True)
+    return hashlib.blake2b(material.encode('utf8'), digest_size=16).hexdigest()
+
+class BlobCache:
+    """Extracted details shared by every project, checkout and branch of the user, keyed by content.
+
+    Identical files, like the same file in two worktrees or a vendored copy in another
+    repository, are parsed once. The database is in WAL mode, so several indexers can
+    read it while one writes; writes are batched until flush. Once the compressed
+    details exceed max_size bytes, the least recently used blobs are evicted.
+    """
+    def __init__(self, db_path: str = None, max_size: int = DEFAULT_MAX_SIZE):
+        if db_path is None:
+            db_path = os.path.join(default_blob_cache_dir(), BLOB_CACHE_FILENAME)
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self.db_path = db_path
+        self.max_size = max_size
+        # Lookups run on the reader threads of the asyncio pipeline
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._touched = set()
+        self.connection = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT, check_same_thread=False,
+                                          isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        self._create_schema()
+
+    def _create_schema(self):
+        with self._transaction():
+            version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+            if version != SCHEMA_VERSION:
+                self.connection.execute("DROP TABLE IF EXISTS blobs")
+            for statement in SCHEMA:
+                self.connection.execute(statement)
+            self.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    @contextmanager
+    def _transaction(self):
+        """Run the block in a write transaction, taking the write lock up front."""
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        self.connection.execute("COMMIT")
+
+    def close(self):
+        self.flush()
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def get(self, key: str) -> dict:
+        """Return the details stored under key, or None."""
+        with self._lock:
+            if key in self._pending:
+                return self._pending[key]
+            row = self.connection.execute("SELECT details, used FROM blobs WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            try:
+                details = json.loads(zlib.decompress(row[0]))
+            except (zlib.error, ValueError):
+                return None
+            if row[1] < time.time() - TOUCH_INTERVAL:
+                self._touched.add(key)
+            return details
+
+    def put(self, key: str, details: dict):
+        """Store details under key with the next flush."""
+        with self._lock:
+            self._pending[key] = details
+
+    def flush(self):
+        """Write the stored details and the recent hits, then evict blobs beyond the size cap."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            touched, self._touched = self._touched, set()
+            if not pending and not touched:
+                return
+            now = int(time.time())
+            try:
+                with self._transaction():
+                    self.connection.executemany(
+                        "INSERT OR REPLACE INTO blobs (key, details, used) VALUES (?, ?, ?)",
+                        [(key, zlib.compress(json.dumps(details, separators=(',', ':')).encode('utf8')), now)
+                         for key, details in pending.items()])
+                    self.connection.executemany("UPDATE blobs SET used = ? WHERE key = ?",
+                                                [(now, key) for key in touched])
+                    self._evict()
+            except sqlite3.Error as e:
+                # The shared cache only saves time, a locked or broken one must not fail the run
+                logger.warning("Cannot update the shared cache %s: %s", self.db_path, e)
+
+    def _evict(self):
+        total = self.connection.execute("SELECT COALESCE(SUM(LENGTH(details)), 0) FROM blobs").fetchone()[0]
+        if total <= self.max_size:
+            return
+        target = total - int(self.max_size * EVICT_TO)
+        freed = 0
+        evicted = []
+        for key, size in self.connection.execute("SELECT key, LENGTH(details) FROM blobs ORDER BY used"):
+            if freed >= target:
+                break
+            evicted.append((key,))
+            freed += size
+        self.connection.executemany("DELETE FROM blobs WHERE key = ?", evicted)
+        logger.info("Shared cache: evicted %d least recently used blob(s), %.1f MB.",
+                    len(evicted), freed / (1024 * 1024))
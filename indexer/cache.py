@@ -0,0 +1,184 @@
+import os
+import json
+import hashlib
+
+from parser import PARSER_VERSION
+from parser.limits import ParseLimits, generated_reason, is_timeout_skip
+from parser.parser import should_skip_file
+from .blob_cache import BlobCache, blob_key
+
+# Cache file written next to ProjectIndex.json
+CACHE_FILENAME = "ProjectIndex.cache.json"
+
+def content_hash(file_path: str) -> str:
+    """Return the hex digest of a file's content."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def buffer_hash(source) -> str:
+    """Return the hex digest of content already in memory, equal to content_hash of a file holding it."""
+    return hashlib.blake2b(source, digest_size=16).hexdigest()
+
+class ParseCache:
+    """Persistent per-file cache of extracted index details.
+
+    Entries are keyed by the relative path and validated against the file's mtime and
+    size. When those changed but the size still matches, the content hash decides, so
+    a touched but unmodified file is not parsed again. The whole cache is discarded
+    when the parser version, the extraction options or the parse limits differ from
+    the cached run.
+
+    Runs that take their files from git (see indexer.git) record the commit they saw in
+    git, and mark the files git reports unchanged since the previous run in unchanged;
+    those are served without looking at their mtime or content hash.
+
+    Files missing from the cache are looked up by content hash in the optional shared
+    BlobCache, which also receives the details of every file parsed in this run.
+    """
+    def __init__(self, cache_path: str, extract_imports: bool = False, limits: ParseLimits = None,
+                 blobs: BlobCache = None, ranges: bool = False):
+        self.cache_path = cache_path
+        self.limits = limits
+        self.blobs = blobs
+        self.options = {'parser_version': PARSER_VERSION, 'extract_imports': extract_imports, 'ranges': ranges,
+                        'limits': limits.to_dict() if limits is not None else None}
+        self.entries = {}
+        self.updated = {}
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        # Content hashes computed for the shared cache lookup of files that are being parsed
+        self._digests = {}
+        # Git state recorded by the previous run, and the state saved for the next one
+        self.previous_git = None
+        self.git = None
+        self.unchanged = set()
+        self._load()
+
+    def _load(self):
+        """Load the cache file, ignoring it if it's missing, corrupt or stale."""
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict) or data.get('options') != self.options:
+            return
+        self.entries = data.get('files', {})
+        self.previous_git = data.get('git')
+
+    def lookup(self, relative_path: str, file_path: str, stat_result: os.stat_result = None):
+        """Return the cached details of a file, or None if it has to be parsed again.
+
+        Args:
+            relative_path: Path of the file relative to the indexed root
+            file_path: Path of the file on disk
+            stat_result: Optional stat result of the file, to avoid another stat call
+
+        Returns:
+            dict: The cached details, or None on a cache miss
+        """
+        entry = self.entries.get(relative_path)
+        if entry is not None:
+            try:
+                stat_result = stat_result or os.stat(file_path)
+                if relative_path in self.unchanged:
+                    entry['mtime_ns'] = stat_result.st_mtime_ns
+                    entry['size'] = stat_result.st_size
+                    return self._hit(relative_path, entry)
+                if entry['mtime_ns'] == stat_result.st_mtime_ns and entry['size'] == stat_result.st_size:
+                    return self._hit(relative_path, entry)
+                if entry['size'] == stat_result.st_size and entry['hash'] is not None and \
+                        entry['hash'] == content_hash(file_path):
+                    entry['mtime_ns'] = stat_result.st_mtime_ns
+                    return self._hit(relative_path, entry)
+            except OSError:
+                pass
+        if self.blobs is not None and self._is_shareable(file_path):
+            details = self._lookup_shared(relative_path, file_path, stat_result)
+            if details is not None:
+                return details
+        self.misses += 1
+        return None
+
+    def _is_shareable(self, file_path: str) -> bool:
+        """Whether the details of a file depend only on its content, not on its name or location."""
+        if should_skip_file(file_path):
+            return False
+        return self.limits is None or not self.limits.skip_generated or generated_reason(file_path) is None
+
+    def _blob_key(self, file_path: str, digest: str) -> str:
+        return blob_key(self.options, os.path.splitext(file_path)[1], digest)
+
+    def _lookup_shared(self, relative_path: str, file_path: str, stat_result: os.stat_result = None) -> dict:
+        try:
+            stat_result = stat_result or os.stat(file_path)
+            digest = content_hash(file_path)
+        except OSError:
+            return None
+        details = self.blobs.get(self._blob_key(file_path, digest))
+        if details is None:
+            self._digests[relative_path] = digest
+            return None
+        self.shared_hits += 1
+        self.updated[relative_path] = {
+            'mtime_ns': stat_result.st_mtime_ns,
+            'size': stat_result.st_size,
+            'hash': digest,
+            'details': details,
+        }
+        return details
+
+    def _hit(self, relative_path: str, entry: dict) -> dict:
+        self.hits += 1
+        self.updated[relative_path] = entry
+        return entry['details']
+
+    def rename(self, old_relative_path: str, new_relative_path: str):
+        """Move the entry of a file renamed without changes, so it isn't parsed again."""
+        entry = self.entries.pop(old_relative_path, None)
+        if entry is not None:
+            self.entries[new_relative_path] = entry
+
+    def store(self, relative_path: str, file_path: str, details: dict, stat_result: os.stat_result = None,
+              digest: str = None):
+        """Record the freshly extracted details of a file.
+
+        The file isn't read again: digest is the buffer_hash of the content that was
+        parsed, see Project_Indexer._index_file, unless lookup already hashed the file.
+        Without either, e.g. for files skipped before they were read, the entry is only
+        valid while the mtime and size match. Details of files that weren't skipped are
+        also stored in the shared cache. Files skipped by the parse timeout aren't cached:
+        whether they time out depends on the load of the machine, so they are tried again.
+        """
+        if 'skipped' in details and is_timeout_skip(details['skipped']):
+            return
+        try:
+            stat_result = stat_result or os.stat(file_path)
+            digest = digest or self._digests.pop(relative_path, None)
+            self.updated[relative_path] = {
+                'mtime_ns': stat_result.st_mtime_ns,
+                'size': stat_result.st_size,
+                'hash': digest,
+                'details': details,
+            }
+        except OSError:
+            return
+        if self.blobs is not None and digest is not None and 'skipped' not in details and \
+                self._is_shareable(file_path):
+            self.blobs.put(self._blob_key(file_path, digest), details)
+
+    def save(self):
+        """Write the entries seen in this run back to disk, dropping deleted files."""
+        data = {'options': self.options, 'files': self.updated}
+        if self.git is not None:
+            data['git'] = self.git
+        if self.blobs is not None:
+            self.blobs.flush()
+        temp_path = f"{self.cache_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(temp_path, self.cache_path)
@@ -0,0 +1,141 @@
+from collections import Counter
+
+# Cost of every character by which a name is longer than the query, so that 'UserRepo'
+# ranks 'UserRepository' close to an exact match while typos cost 1 each
+SKIP_COST = 0.1
+# Candidates re-ranked by edit distance, taken in order of shared trigrams
+MAX_CANDIDATES = 100
+# Posting lists are counted from the rarest trigram on until this many entries are counted
+POSTINGS_BUDGET = 8000
+
+def trigrams(key: str) -> set:
+    """Return the trigrams of a lower case name, padded so that the first and last characters count."""
+    padded = f"${key}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class FuzzyPattern:
+    """A lower case query prepared for bit-parallel approximate matching (Myers' algorithm)."""
+    def __init__(self, query: str):
+        self.query = query.lower()
+        self.length = len(self.query)
+        self.mask = (1 << self.length) - 1
+        self.high_bit = 1 << (self.length - 1) if self.length else 0
+        # Bit i of the mask of a character is set if query[i] is that character
+        self.char_masks = {}
+        for i, char in enumerate(self.query):
+            self.char_masks[char] = self.char_masks.get(char, 0) | (1 << i)
+
+    def substring_distance(self, text: str) -> int:
+        """Return the edit distance between the query and the substring of text that matches it best."""
+        if not self.length:
+            return 0
+        mask = self.mask
+        high_bit = self.high_bit
+        char_masks = self.char_masks
+        positive, negative = mask, 0
+        score = best = self.length
+        for char in text:
+            equal = char_masks.get(char, 0)
+            vertical = equal | negative
+            horizontal = (((equal & positive) + positive) ^ positive) | equal
+            horizontal_positive = negative | (~(horizontal | positive) & mask)
+            horizontal_negative = positive & horizontal
+            if horizontal_positive & high_bit:
+                score += 1
+            elif horizontal_negative & high_bit:
+                score -= 1
+                if score < best:
+                    best = score
+            # Matching may start anywhere in the text, so no carry into the first row
+            horizontal_positive = (horizontal_positive << 1) & mask
+            horizontal_negative = (horizontal_negative << 1) & mask
+            positive = horizontal_negative | (~(vertical | horizontal_positive) & mask)
+            negative = horizontal_positive & vertical
+        return best
+
+    def distance(self, name: str) -> float:
+        """Edit distance between the query and the best matching part of a name, plus SKIP_COST
+        per character the name is longer than the query. Exact matches score 0."""
+        # Rounded so the float sum of skip costs compares and prints cleanly
+        return round(self.substring_distance(name.lower()) + SKIP_COST * max(len(name) - self.length, 0), 2)
+
+def fuzzy_distance(query: str, name: str) -> float:
+    """Score how well a name matches a query, lower is better; see FuzzyPattern.distance."""
+    return FuzzyPattern(query).distance(name)
+
+def _select_candidates(counts: Counter, max_candidates: int) -> list:
+    """Return the (id, count) pairs with the highest counts, highest first."""
+    if len(counts) > max_candidates:
+        cutoff = sorted(counts.values(), reverse=True)[max_candidates - 1]
+        items = [item for item in counts.items() if item[1] >= cutoff]
+    else:
+        items = list(counts.items())
+    items.sort(key=lambda item: item[1], reverse=True)
+    return items[:max_candidates]
+
+def rank_names(query: str, postings_for, name_for, limit: int = None,
+               max_candidates: int = MAX_CANDIDATES) -> list:
+    """Find the names closest to a query through a trigram index.
+
+    Candidates are the names sharing the most trigrams with the query; only the rarest
+    trigrams are counted, up to POSTINGS_BUDGET entries. They are re-ranked by distance in
+    order of shared trigrams, until the trigrams a candidate lacks prove that it can't
+    beat the current top limit: every edit destroys at most three trigrams.
+
+    Args:
+        query: The query string, in any case
+        postings_for: Callable returning the ids of the names containing a trigram, or None
+        name_for: Callable returning the name of an id
+        limit: Number of names to return, or None to rank every candidate
+        max_candidates: Maximum number of candidates to re-rank
+
+    Returns:
+        list: (name, distance) tuples, best first
+    """
+    pattern = FuzzyPattern(query)
+    postings = [posting for posting in (postings_for(gram) for gram in trigrams(pattern.query)) if posting]
+    postings.sort(key=len)
+    counts = Counter()
+    counted_grams = counted_entries = 0
+    for posting in postings:
+        if counted_entries >= POSTINGS_BUDGET:
+            break
+        counts.update(posting)
+        counted_grams += 1
+        counted_entries += len(posting)
+
+    ranked = []
+    threshold = float('inf')
+    for name_id, shared in _select_candidates(counts, max_candidates):
+        # The padding trigrams may be missing from a perfect substring match
+        lower_bound = (counted_grams - 2 - shared) / 3
+        if lower_bound > threshold:
+            break
+        name = name_for(name_id)
+        distance = pattern.distance(name)
+        if distance > threshold:
+            continue
+        ranked.append((distance, len(name), name))
+        if limit is not None and len(ranked) >= limit:
+            ranked.sort()
+            del ranked[limit:]
+            threshold = ranked[-1][0]
+    ranked.sort()
+    return [(name, distance) for distance, _, name in ranked[:limit]]
+
+class TrigramIndex:
+    """In-memory trigram index over a set of distinct names."""
+    def __init__(self, names):
+        self.names = list(names)
+        self.postings = {}
+        for name_id, name in enumerate(self.names):
+            for gram in trigrams(name.lower()):
+                posting = self.postings.get(gram)
+                if posting is None:
+                    self.postings[gram] = [name_id]
+                else:
+                    posting.append(name_id)
+
+    def search(self, query: str, limit: int = None) -> list:
+        """Return up to limit (name, distance) tuples closest to query, best first."""
+        return rank_names(query, self.postings.get, self.names.__getitem__, limit)
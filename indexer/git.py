@@ -0,0 +1,147 @@
+import os
+import stat
+import logging
+import subprocess
+
+from parser.parser import is_supported_file
+from .ignore import IgnoreEngine
+from .walker import walk_order_key
+
+logger = logging.getLogger(__name__)
+
+class GitError(Exception):
+    """Raised when the root directory is not inside a git checkout or git can't be run."""
+
+def _git(root_dir: str, *args) -> bytes:
+    """Run a git command in root_dir and return its output."""
+    try:
+        return subprocess.run(['git', '-C', root_dir, *args], capture_output=True, check=True).stdout
+    except FileNotFoundError:
+        raise GitError("git is not installed") from None
+    except subprocess.CalledProcessError as e:
+        raise GitError(e.stderr.decode('utf8', 'replace').strip() or f"git {args[0]} failed") from None
+
+def _split(output: bytes) -> list:
+    """Split the NUL separated output of a -z git command into paths."""
+    return [os.fsdecode(path) for path in output.split(b'\0') if path]
+
+def head_commit(root_dir: str) -> str:
+    """Return the commit checked out in root_dir, or None if nothing was committed yet.
+
+    Raises:
+        GitError: If root_dir is not inside a git checkout
+    """
+    _git(root_dir, 'rev-parse', '--git-dir')
+    try:
+        return _git(root_dir, 'rev-parse', '--verify', '-q', 'HEAD^{commit}').decode('ascii').strip()
+    except GitError:
+        return None
+
+def list_files(root_dir: str) -> tuple:
+    """Return the tracked files and the untracked files that aren't ignored below root_dir.
+
+    Returns:
+        tuple: (tracked paths, untracked paths), '/' separated and relative to root_dir
+    """
+    tracked = _split(_git(root_dir, 'ls-files', '-z', '--cached'))
+    untracked = _split(_git(root_dir, 'ls-files', '-z', '--others', '--exclude-standard'))
+    return tracked, untracked
+
+def changes_since(root_dir: str, commit: str) -> tuple:
+    """Compare the working tree below root_dir with a commit.
+
+    Returns:
+        tuple: (set of added, modified or deleted paths, dict of unmodified renamed
+        paths {old: new}), or None if the commit is unknown, e.g. after a rebase and gc
+    """
+    try:
+        output = _git(root_dir, 'diff', '-z', '--name-status', '-M', '--relative', commit, '--')
+    except GitError:
+        return None
+    fields = _split(output)
+    changed = set()
+    renames = {}
+    i = 0
+    while i < len(fields):
+        status = fields[i]
+        if status[0] in 'RC':
+            old, new = fields[i + 1], fields[i + 2]
+            if status == 'R100':
+                renames[old] = new
+            else:
+                changed.add(new)
+                if status[0] == 'R':
+                    changed.add(old)
+            i += 3
+        else:
+            changed.add(fields[i + 1])
+            i += 2
+    return changed, renames
+
+def git_source_files(root_dir: str, ignore: IgnoreEngine = None, cache=None) -> list:
+    """Return the supported source files git knows of below root_dir, instead of walking the tree.
+
+    These are the tracked files plus the untracked files that aren't ignored by git, filtered
+    by the ignore engine like walk_source_files; files deleted from the working tree are left
+    out. Contents of submodules are not listed.
+
+    When the optional ParseCache holds the commit recorded by the previous git run, the files
+    git reports unchanged since then are marked unchanged in the cache, so they are served
+    without checking their modification time or content hash, and files renamed without
+    changes keep their cached details. The commit and the files that differ from it in the
+    working tree are recorded in the cache for the next run.
+
+    Returns:
+        list: (file_path, relative_path, stat_result) tuples in walk order, relative to root_dir
+
+    Raises:
+        GitError: If root_dir is not inside a git checkout or git can't be run
+    """
+    head = head_commit(root_dir)
+    tracked, untracked = list_files(root_dir)
+    if cache is not None:
+        _apply_changes(root_dir, head, tracked, untracked, cache)
+
+    paths = [path for path in tracked + untracked
+             if is_supported_file(path) and (ignore is None or not ignore.is_path_ignored(path))]
+    files = []
+    for path in paths:
+        file_path = os.path.join(root_dir, path)
+        try:
+            stat_result = os.stat(file_path)
+        except OSError:
+            # Deleted but not staged yet
+            continue
+        if stat.S_ISREG(stat_result.st_mode):
+            files.append((file_path, os.path.normpath(path), stat_result))
+    files.sort(key=lambda file: walk_order_key(file[1]))
+    return files
+
+def _apply_changes(root_dir: str, head: str, tracked: list, untracked: list, cache):
+    """Mark the files unchanged since the previous git run in the cache, and record this run's state."""
+    previous = cache.previous_git
+    since_previous = None
+    if previous is not None and previous.get('commit'):
+        since_previous = changes_since(root_dir, previous['commit'])
+    if since_previous is not None:
+        changed, renames = since_previous
+        # Files that differed from the previous commit were cached with their working tree content
+        previously_dirty = set(previous.get('dirty', ()))
+        for old, new in renames.items():
+            if old in previously_dirty:
+                changed.add(new)
+            else:
+                cache.rename(os.path.normpath(old), os.path.normpath(new))
+        unchanged = set(tracked) - changed - previously_dirty
+        cache.unchanged = {os.path.normpath(path) for path in unchanged}
+        logger.info("Git: %d file(s) changed since %s, %d unchanged, %d renamed, %d untracked.",
+                    len(changed), previous['commit'][:12], len(unchanged), len(renames), len(untracked))
+
+    if head is None:
+        dirty = set(tracked)
+    elif previous is not None and head == previous.get('commit') and since_previous is not None:
+        dirty = changed | set(renames) | set(renames.values())
+    else:
+        since_head = changes_since(root_dir, head) or (set(tracked), {})
+        dirty = since_head[0] | set(since_head[1]) | set(since_head[1].values())
+    cache.git = {'commit': head, 'dirty': sorted(dirty | set(untracked))}
@@ -0,0 +1,188 @@
+import os
+import re
+
+# Directories that never contain project sources worth indexing, in .gitignore syntax
+DEFAULT_EXCLUDES = [
+    '.git/',
+    '.hg/',
+    '.svn/',
+    '.vs/',
+    '.idea/',
+    'node_modules/',
+    'bower_components/',
+    'bin/',
+    'obj/',
+    'venv/',
+    '.venv/',
+    'env/',
+    '.tox/',
+    '.nox/',
+    '__pycache__/',
+    '.mypy_cache/',
+    '.pytest_cache/',
+    'dist/',
+    'build/',
+]
+
+GITIGNORE_FILENAME = '.gitignore'
+
+def _translate(pattern: str) -> str:
+    """Translate a .gitignore glob into a regular expression matching '/' separated paths."""
+    result = []
+    i, length = 0, len(pattern)
+    while i < length:
+        char = pattern[i]
+        if char == '*':
+            if pattern[i:i + 2] == '**' and (i == 0 or pattern[i - 1] == '/') \
+                    and (i + 2 == length or pattern[i + 2] == '/'):
+                if i + 2 == length:
+                    # Trailing '/**' matches everything inside
+                    result.append('.*')
+                    i += 2
+                else:
+                    # Leading or inner '**/' matches zero or more directories
+                    result.append('(?:.*/)?')
+                    i += 3
+                continue
+            while i < length and pattern[i] == '*':
+                i += 1
+            result.append('[^/]*')
+            continue
+        if char == '?':
+            result.append('[^/]')
+        elif char == '[':
+            end = pattern.find(']', i + 2 if pattern[i + 1:i + 2] in ('!', '^') else i + 1)
+            if end == -1:
+                result.append(re.escape(char))
+            else:
+                body = pattern[i + 1:end]
+                if body[:1] in ('!', '^'):
+                    body = '^' + body[1:]
+                result.append(f"[{body.replace(chr(92), chr(92) * 2)}]")
+                i = end
+        elif char == '\\' and i + 1 < length:
+            i += 1
+            result.append(re.escape(pattern[i]))
+        else:
+            result.append(re.escape(char))
+        i += 1
+    return ''.join(result)
+
+class IgnoreRule:
+    """A single .gitignore pattern."""
+    __slots__ = ('negate', 'dir_only', 'basename_only', 'regex')
+
+    def __init__(self, pattern: str):
+        self.negate = pattern.startswith('!')
+        if self.negate:
+            pattern = pattern[1:]
+        self.dir_only = pattern.endswith('/')
+        pattern = pattern.rstrip('/')
+        # Patterns without a slash match the name at any depth, others are anchored
+        self.basename_only = '/' not in pattern
+        self.regex = re.compile(_translate(pattern.lstrip('/')) + r'\Z', re.DOTALL)
+
+    def matches(self, relative_path: str, name: str, is_dir: bool) -> bool:
+        if self.dir_only and not is_dir:
+            return False
+        return self.regex.match(name if self.basename_only else relative_path) is not None
+
+class IgnoreRules:
+    """The patterns of one .gitignore file, or of an exclude list, relative to a base directory."""
+    def __init__(self, base_dir: str, patterns: list):
+        self.base_prefix = f"{base_dir}/" if base_dir else ''
+        self.rules = []
+        for line in patterns:
+            line = line.rstrip('\n\r')
+            # Trailing spaces are ignored unless escaped
+            if not line.endswith('\\ '):
+                line = line.rstrip(' ')
+            if not line or line.startswith('#'):
+                continue
+            self.rules.append(IgnoreRule(line))
+
+    @classmethod
+    def from_file(cls, base_dir: str, file_path: str):
+        """Load the rules of a .gitignore file, or return None if it can't be read."""
+        try:
+            with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+                return cls(base_dir, f.readlines())
+        except OSError:
+            return None
+
+    def match(self, relative_path: str, name: str, is_dir: bool):
+        """Return True if the path is ignored, False if it is re-included, None if no rule matches."""
+        if not relative_path.startswith(self.base_prefix):
+            return None
+        local_path = relative_path[len(self.base_prefix):]
+        for rule in reversed(self.rules):
+            if rule.matches(local_path, name, is_dir):
+                return not rule.negate
+        return None
+
+class IgnoreEngine:
+    """Decides which files and directories of a project are skipped while indexing.
+
+    Rules are applied with .gitignore precedence: the default excludes first, then the
+    .gitignore files from the root down to the directory of the path, and finally the
+    user supplied excludes. The last matching rule wins and '!' patterns re-include.
+    Paths are '/' separated and relative to the root directory.
+    """
+    def __init__(self, root_dir: str, excludes: list = None, use_gitignore: bool = True,
+                 use_default_excludes: bool = True):
+        self.root_dir = root_dir
+        self.use_gitignore = use_gitignore
+        base_rules = []
+        if use_default_excludes:
+            base_rules.append(IgnoreRules('', DEFAULT_EXCLUDES))
+        if use_gitignore:
+            info_exclude = IgnoreRules.from_file('', os.path.join(root_dir, '.git', 'info', 'exclude'))
+            if info_exclude is not None:
+                base_rules.append(info_exclude)
+        self.base_rules = tuple(base_rules)
+        self.exclude_rules = IgnoreRules('', excludes or [])
+        self._directory_rules = {}
+
+    def rules_for(self, relative_dir: str) -> tuple:
+        """Return the rule sets that apply to entries of a directory, loading .gitignore files once."""
+        rules = self._directory_rules.get(relative_dir)
+        if rules is None:
+            if relative_dir:
+                parent = relative_dir.rpartition('/')[0]
+                rules = self.rules_for(parent)
+            else:
+                rules = self.base_rules
+            if self.use_gitignore:
+                gitignore = IgnoreRules.from_file(
+                    relative_dir, os.path.join(self.root_dir, relative_dir, GITIGNORE_FILENAME))
+                if gitignore is not None and gitignore.rules:
+                    rules = rules + (gitignore,)
+            self._directory_rules[relative_dir] = rules
+        return rules
+
+    def is_ignored(self, relative_path: str, is_dir: bool, rules: tuple = None) -> bool:
+        """Check a single entry, without looking at its parent directories.
+
+        Args:
+            relative_path: '/' separated path relative to the root directory
+            is_dir: Whether the entry is a directory
+            rules: The rule sets of the entry's directory, as returned by rules_for
+        """
+        parent, _, name = relative_path.rpartition('/')
+        if rules is None:
+            rules = self.rules_for(parent)
+        ignored = False
+        for rule_set in rules:
+            matched = rule_set.match(relative_path, name, is_dir)
+            if matched is not None:
+                ignored = matched
+        matched = self.exclude_rules.match(relative_path, name, is_dir)
+        return ignored if matched is None else matched
+
+    def is_path_ignored(self, relative_path: str, is_dir: bool = False) -> bool:
+        """Check a path and all of its parent directories."""
+        parts = relative_path.split('/')
+        for depth in range(1, len(parts)):
+            if self.is_ignored('/'.join(parts[:depth]), True):
+                return True
+        return self.is_ignored(relative_path, is_dir)
@@ -0,0 +1,315 @@
+import gc
+import os
+import json
+
+from .fuzzy import TrigramIndex
+from .symbols import LANGUAGES, SYMBOL_KINDS, in_container, iter_symbols, language_for_path, normalize_filters
+
+# Bit position of every language in the filter masks; files of other languages use the last slot
+_LANGUAGE_SLOTS = {language: slot for slot, language in enumerate(dict.fromkeys(LANGUAGES.values()))}
+_LANGUAGE_SLOT_COUNT = len(_LANGUAGE_SLOTS) + 1
+# Number of bits of the bloom filter over the directories of the symbols below a trie node
+_PATH_BITS = 64
+
+def _kind_language_bit(kind: str, language: str) -> int:
+    slot = _LANGUAGE_SLOTS.get(language, _LANGUAGE_SLOT_COUNT - 1)
+    return 1 << (SYMBOL_KINDS.index(kind) * _LANGUAGE_SLOT_COUNT + slot)
+
+def _path_bit(path: str) -> int:
+    return 1 << (hash(path) % _PATH_BITS)
+
+def _path_prefix_bits(path: str) -> int:
+    """Bloom filter bits of a file path and of every directory containing it."""
+    bits = 0
+    prefix = ''
+    for part in path.split(os.sep):
+        prefix = f"{prefix}{os.sep}{part}" if prefix else part
+        bits |= _path_bit(prefix)
+    return bits
+
+class _TrieNode:
+    """Node of a compressed prefix trie: every edge is labelled with a string instead of a character."""
+    __slots__ = ('label', 'children', 'names', 'mask', 'path_bits')
+
+    def __init__(self, label: str = ''):
+        self.label = label
+        # First character of the child's label -> child, created on demand
+        self.children = None
+        # Symbol names whose key ends at this node, created on demand
+        self.names = None
+        # Union of the filter bits of all names in the subtree, see PrefixTrie.update_masks
+        self.mask = 0
+        self.path_bits = 0
+
+    def add_child(self, child):
+        if self.children is None:
+            self.children = {}
+        self.children[child.label[0]] = child
+
+    def add_name(self, name: str):
+        if self.names is None:
+            self.names = []
+        self.names.append(name)
+
+def _common_prefix_length(a: str, b: str) -> int:
+    """Length of the common prefix of two strings, found by bisection on slice comparisons."""
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[:middle] == b[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+class PrefixTrie:
+    """Case-insensitive prefix trie mapping name keys to the names stored under them."""
+    def __init__(self, names=()):
+        """Build the trie in a single pass over the sorted keys of the distinct names.
+
+        Consecutive sorted keys share their longest common prefix, so the nodes of the
+        previous key that are deeper than that prefix are complete and never visited again.
+        """
+        self.root = _TrieNode()
+        # The nodes on the path of the previous key, with the key length at their end
+        path = [(self.root, 0)]
+        previous = ''
+        for key, name in sorted((name.lower(), name) for name in names):
+            common = _common_prefix_length(previous, key)
+            popped = None
+            while path[-1][1] > common:
+                popped = path.pop()
+            parent, depth = path[-1]
+            if depth < common:
+                # Split the edge of the popped node where the keys diverge
+                child = popped[0]
+                middle = _TrieNode(child.label[:common - depth])
+                child.label = child.label[common - depth:]
+                parent.children[middle.label[0]] = middle
+                middle.add_child(child)
+                path.append((middle, common))
+                parent, depth = middle, common
+            if depth == len(key):
+                # Names differing only in case share their key
+                parent.add_name(name)
+            else:
+                leaf = _TrieNode(key[depth:])
+                leaf.add_name(name)
+                parent.add_child(leaf)
+                path.append((leaf, len(key)))
+            previous = key
+
+    def _find(self, prefix: str):
+        node = self.root
+        i = 0
+        while i < len(prefix):
+            child = node.children.get(prefix[i]) if node.children else None
+            if child is None:
+                return None
+            rest = prefix[i:]
+            if rest.startswith(child.label):
+                i += len(child.label)
+                node = child
+            elif child.label.startswith(rest):
+                # The prefix ends inside the edge, so the whole subtree matches
+                return child
+            else:
+                return None
+        return node
+
+    def update_masks(self, name_bits):
+        """Store in every node the union of the filter bits of the names below it.
+
+        Args:
+            name_bits: Callable returning (mask, path_bits) for a name
+        """
+        nodes = [self.root]
+        for node in nodes:
+            if node.children:
+                nodes.extend(node.children.values())
+        # Children come after their parent, so walking backwards aggregates bottom-up
+        for node in reversed(nodes):
+            mask = path_bits = 0
+            for name in node.names or ():
+                name_mask, name_path_bits = name_bits(name)
+                mask |= name_mask
+                path_bits |= name_path_bits
+            for child in (node.children or {}).values():
+                mask |= child.mask
+                path_bits |= child.path_bits
+            node.mask = mask
+            node.path_bits = path_bits
+
+    def iter_prefix(self, prefix: str, mask: int = 0, path_bit: int = 0):
+        """Yield every name whose key starts with prefix, in alphabetical order of the keys.
+
+        Subtrees whose bits don't intersect mask or don't contain path_bit are skipped;
+        0 disables either check. Names of visited nodes may still not match the filters.
+        """
+        node = self._find(prefix.lower())
+        if node is None:
+            return
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if (mask and not node.mask & mask) or (path_bit and not node.path_bits & path_bit):
+                continue
+            if node.names:
+                yield from node.names
+            if node.children:
+                stack.extend(node.children[key] for key in sorted(node.children, reverse=True))
+
+class ProjectIndex:
+    """Symbol lookup over a project index, loaded once and queried many times.
+
+    Builds an inverted map from symbol names to their declarations and a prefix trie over
+    the names of all classes, structs, interfaces, enums, functions and methods, from the
+    index entries of every language. Lookups can be filtered by kind, language and path prefix.
+    """
+    def __init__(self, project_index: dict):
+        self.symbols = []
+        self._languages = {}
+        # Name -> ids of the symbols declaring it, in index order
+        self._by_name = {}
+        self._fuzzy = None
+        # Name -> (kind and language bits, path bits) of its symbols, for pruning the trie
+        name_bits = {}
+        kind_language_bits = {}
+        # Building creates millions of objects that are never garbage; collecting while
+        # building would only traverse them over and over
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for relative_path, details in project_index.items():
+                language = self._languages[relative_path] = language_for_path(relative_path)
+                path_bits = _path_prefix_bits(relative_path)
+                for symbol in iter_symbols(relative_path, details):
+                    symbol_id = len(self.symbols)
+                    self.symbols.append(symbol)
+                    bit = kind_language_bits.get((symbol.kind, language))
+                    if bit is None:
+                        bit = kind_language_bits[symbol.kind, language] = _kind_language_bit(symbol.kind, language)
+                    ids = self._by_name.get(symbol.name)
+                    if ids is None:
+                        self._by_name[symbol.name] = [symbol_id]
+                        name_bits[symbol.name] = (bit, path_bits)
+                    else:
+                        ids.append(symbol_id)
+                        mask, bits = name_bits[symbol.name]
+                        name_bits[symbol.name] = (mask | bit, bits | path_bits)
+            self._trie = PrefixTrie(self._by_name)
+            # Let filtered prefix searches skip subtrees without any matching symbol
+            self._trie.update_masks(name_bits.__getitem__)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+    @classmethod
+    def load(cls, index_path: str):
+        """Load ProjectIndex.json, ProjectIndex.ndjson or ProjectIndex.bin."""
+        if index_path.endswith('.bin'):
+            from .binary_index import read_binary_index
+            return cls(read_binary_index(index_path))
+        with open(index_path, 'r', encoding='utf-8') as index_file:
+            if index_path.endswith('.ndjson'):
+                entries = (json.loads(line) for line in index_file if line.strip())
+                return cls({entry['file']: entry['details'] for entry in entries})
+            return cls(json.load(index_file))
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def _filter(self, symbol_ids, kinds, language: str, path_prefix: str, limit: int) -> list:
+        if path_prefix:
+            nested_prefix = path_prefix.rstrip(os.sep) + os.sep
+        results = []
+        for symbol_id in symbol_ids:
+            symbol = self.symbols[symbol_id]
+            if kinds and symbol.kind not in kinds:
+                continue
+            if language and self._languages[symbol.path] != language:
+                continue
+            if path_prefix and symbol.path != path_prefix and not symbol.path.startswith(nested_prefix):
+                continue
+            results.append(symbol)
+            if limit is not None and len(results) >= limit:
+                break
+        return results
+
+    def lookup(self, name: str, kind=None, language: str = None, path_prefix: str = None,
+               limit: int = None) -> list:
+        """Return the declarations of a name, in index order.
+
+        Args:
+            name: The symbol name, optionally qualified with its container, e.g. 'OrderService.Submit'
+            kind: A kind or a collection of kinds from indexer.symbols.SYMBOL_KINDS to restrict the results to
+            language: 'python', 'csharp', 'typescript' or 'javascript'
+            path_prefix: Only return symbols declared in this file or below this directory
+            limit: Maximum number of results
+
+        Returns:
+            list: The matching Symbol objects
+        """
+        symbol_ids = self._by_name.get(name)
+        container = None
+        if symbol_ids is None and '.' in name:
+            container, _, name = name.rpartition('.')
+            symbol_ids = self._by_name.get(name)
+        if symbol_ids is None:
+            return []
+        if container is not None:
+            symbol_ids = [symbol_id for symbol_id in symbol_ids
+                          if in_container(self.symbols[symbol_id], container)]
+        kinds, path_prefix = normalize_filters(kind, path_prefix)
+        return self._filter(symbol_ids, kinds, language, path_prefix, limit)
+
+    def search_prefix(self, prefix: str, kind=None, language: str = None, path_prefix: str = None,
+                      limit: int = 50) -> list:
+        """Return the declarations of every name starting with prefix, ignoring case.
+
+        Names are visited in alphabetical order of their lower case form, so the results
+        are stable. Takes the same filters as lookup.
+        """
+        kinds, path_prefix = normalize_filters(kind, path_prefix)
+        mask = 0
+        if kinds or language:
+            languages = [language] if language else list(_LANGUAGE_SLOTS) + [None]
+            for symbol_kind in kinds or SYMBOL_KINDS:
+                for symbol_language in languages:
+                    mask |= _kind_language_bit(symbol_kind, symbol_language)
+        path_bit = _path_bit(path_prefix) if path_prefix else 0
+        names = self._trie.iter_prefix(prefix, mask, path_bit)
+        symbol_ids = (symbol_id for name in names for symbol_id in self._by_name[name])
+        return self._filter(symbol_ids, kinds, language, path_prefix, limit)
+
+    def names_with_prefix(self, prefix: str, limit: int = 50) -> list:
+        """Return distinct symbol names starting with prefix, ignoring case, e.g. for completion."""
+        names = []
+        for name in self._trie.iter_prefix(prefix):
+            names.append(name)
+            if len(names) >= limit:
+                break
+        return names
+
+    def fuzzy_search(self, query: str, kind=None, language: str = None, path_prefix: str = None,
+                     limit: int = 10) -> list:
+        """Return the declarations whose names are closest to query, for near-misses like 'UserRepo' or 'get_usr'.
+
+        The trigram index is built on first use. Takes the same filters as lookup.
+
+        Returns:
+            list: (Symbol, distance) tuples, best first; see indexer.fuzzy.fuzzy_distance
+        """
+        if self._fuzzy is None:
+            self._fuzzy = TrigramIndex(self._by_name)
+        kinds, path_prefix = normalize_filters(kind, path_prefix)
+        # With filters some names may not contribute any symbol, so rank every candidate
+        filtered = bool(kinds or language or path_prefix)
+        results = []
+        for name, distance in self._fuzzy.search(query, None if filtered else limit):
+            remaining = None if limit is None else limit - len(results)
+            for symbol in self._filter(self._by_name[name], kinds, language, path_prefix, remaining):
+                results.append((symbol, distance))
+            if limit is not None and len(results) >= limit:
+                break
+        return results
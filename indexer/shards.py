@@ -0,0 +1,239 @@
+import os
+import re
+import json
+import heapq
+import logging
+import base64
+import hashlib
+
+from .lookup import ProjectIndex
+from .symbols import iter_symbols, language_for_path, normalize_filters
+from .walker import walk_order_key
+
+logger = logging.getLogger(__name__)
+
+# Directory written next to ProjectIndex.json, holding the manifest and one file per shard
+SHARD_DIRNAME = "ProjectIndex.shards"
+MANIFEST_FILENAME = "manifest.json"
+
+# Bump whenever the manifest or shard layout changes
+MANIFEST_VERSION = 1
+
+# Bloom filter sizing: 10 bits and 7 hashes per name give about 1% false positives
+BLOOM_BITS_PER_NAME = 10
+BLOOM_HASHES = 7
+
+class BloomFilter:
+    """Bloom filter over strings, with hashes that are stable across processes."""
+    def __init__(self, bit_count: int, hash_count: int = BLOOM_HASHES, data: bytes = None):
+        self.bit_count = bit_count
+        self.hash_count = hash_count
+        self.bits = bytearray(data) if data is not None else bytearray((bit_count + 7) // 8)
+
+    @classmethod
+    def for_names(cls, names):
+        """Create a filter sized for, and containing, a collection of names."""
+        names = set(names)
+        bloom = cls(max(64, len(names) * BLOOM_BITS_PER_NAME))
+        for name in names:
+            bloom.add(name)
+        return bloom
+
+    def _positions(self, value: str):
+        # Double hashing: the i-th position is h1 + i * h2
+        digest = hashlib.blake2b(value.encode('utf8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * second) % self.bit_count for i in range(self.hash_count))
+
+    def add(self, value: str):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+    def to_json(self) -> dict:
+        return {'bits': self.bit_count, 'hashes': self.hash_count,
+                'data': base64.b64encode(bytes(self.bits)).decode('ascii')}
+
+    @classmethod
+    def from_json(cls, data: dict):
+        return cls(data['bits'], data['hashes'], base64.b64decode(data['data']))
+
+def shard_key(relative_path: str, depth: int) -> str:
+    """Return the shard of a file: its first depth directories, '' for files closer to the root.
+
+    With depth 1 'src/app/main.py' belongs to the shard 'src' and 'setup.py' to the root shard ''.
+    """
+    directories = relative_path.split(os.sep)[:-1]
+    return os.sep.join(directories[:depth])
+
+def _shard_filename(key: str, shard_hash: str) -> str:
+    """File name of a shard; it includes the content hash so a shard is never rewritten in place."""
+    slug = re.sub(r'[^\w.-]+', '_', key) if key else '_root'
+    return f"{slug}-{shard_hash}.json"
+
+def _write_atomic(file_path: str, content: str):
+    temp_path = f"{file_path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(temp_path, file_path)
+
+def read_manifest(shard_dir: str) -> dict:
+    """Return the manifest of a sharded index, or None if it is missing, corrupt or outdated."""
+    try:
+        with open(os.path.join(shard_dir, MANIFEST_FILENAME), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(manifest, dict) or manifest.get('version') != MANIFEST_VERSION:
+        return None
+    return manifest
+
+def write_sharded_index(project_index: dict, shard_dir: str, depth: int) -> tuple:
+    """Write the index as one JSON file per shard plus a manifest, rewriting only changed shards.
+
+    Every shard holds the entries of the files below one directory at the given depth,
+    in the ProjectIndex.json schema. The manifest lists the shards in index order with
+    their file and symbol counts, languages and a bloom filter of their symbol names.
+    Shard files are named after their content hash, and the manifest is replaced last,
+    so readers always see a consistent set of shards.
+
+    Returns:
+        tuple: (number of shards written, number of shards)
+    """
+    os.makedirs(shard_dir, exist_ok=True)
+    previous = read_manifest(shard_dir) or {'shards': []}
+    previous_files = {shard['file'] for shard in previous['shards']}
+
+    shards = {}
+    for relative_path, details in project_index.items():
+        shards.setdefault(shard_key(relative_path, depth), {})[relative_path] = details
+
+    written = 0
+    manifest_shards = []
+    for key, entries in shards.items():
+        content = json.dumps(entries, separators=(',', ':'))
+        shard_hash = hashlib.blake2b(content.encode('utf8'), digest_size=8).hexdigest()
+        filename = _shard_filename(key, shard_hash)
+        if filename not in previous_files or not os.path.exists(os.path.join(shard_dir, filename)):
+            _write_atomic(os.path.join(shard_dir, filename), content)
+            written += 1
+        names = []
+        for relative_path, details in entries.items():
+            names.extend(symbol.name for symbol in iter_symbols(relative_path, details))
+        manifest_shards.append({
+            'key': key,
+            'file': filename,
+            'files': len(entries),
+            'symbols': len(names),
+            'languages': sorted({language for language in map(language_for_path, entries) if language}),
+            'bloom': BloomFilter.for_names(names).to_json(),
+        })
+
+    manifest = {'version': MANIFEST_VERSION, 'shard_depth': depth, 'shards': manifest_shards}
+    _write_atomic(os.path.join(shard_dir, MANIFEST_FILENAME), json.dumps(manifest, indent=4))
+    current_files = {shard['file'] for shard in manifest_shards}
+    for filename in previous_files - current_files:
+        try:
+            os.remove(os.path.join(shard_dir, filename))
+        except OSError:
+            pass
+    logger.info("Sharded index: %d of %d shard(s) written to %s.", written, len(manifest_shards), shard_dir)
+    return written, len(manifest_shards)
+
+class ShardedIndex:
+    """Symbol lookup over a sharded index, loading only the shards a query may need.
+
+    Name lookups skip every shard whose bloom filter rules the name out; all lookups skip
+    shards that can't contain the requested language or path. Loaded shards are kept.
+    """
+    def __init__(self, shard_dir: str):
+        self.shard_dir = shard_dir
+        manifest = read_manifest(shard_dir)
+        if manifest is None:
+            raise ValueError(f"{shard_dir} does not contain a valid {MANIFEST_FILENAME}")
+        self.shard_depth = manifest['shard_depth']
+        self.shards = manifest['shards']
+        self._blooms = [BloomFilter.from_json(shard['bloom']) for shard in self.shards]
+        self._loaded = {}
+
+    def __len__(self) -> int:
+        return sum(shard['symbols'] for shard in self.shards)
+
+    @property
+    def loaded_shard_count(self) -> int:
+        return len(self._loaded)
+
+    def _may_contain(self, shard: dict, language: str, path_prefix: str) -> bool:
+        if language and language not in shard['languages']:
+            return False
+        if not path_prefix or not shard['key']:
+            return True
+        # The prefix is inside the shard's directory, or the shard's directory is below the prefix
+        key = shard['key']
+        return path_prefix == key or path_prefix.startswith(key + os.sep) or key.startswith(path_prefix + os.sep)
+
+    def _shard_indexes(self, name: str = None, language: str = None, path_prefix: str = None):
+        """Return the indexes of the shards that may hold matching symbols, in index order."""
+        names = []
+        if name is not None:
+            names.append(name)
+            # A qualified name is looked up by its last part
+            if '.' in name:
+                names.append(name.rpartition('.')[2])
+        return [i for i, shard in enumerate(self.shards)
+                if self._may_contain(shard, language, path_prefix)
+                and (not names or any(candidate in self._blooms[i] for candidate in names))]
+
+    def _load(self, shard_index: int) -> ProjectIndex:
+        index = self._loaded.get(shard_index)
+        if index is None:
+            index = self._loaded[shard_index] = ProjectIndex(self.shard_details(shard_index))
+        return index
+
+    def shard_details(self, shard_index: int) -> dict:
+        """Return the index entries of one shard, in the ProjectIndex.json schema."""
+        with open(os.path.join(self.shard_dir, self.shards[shard_index]['file']), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def lookup(self, name: str, kind=None, language: str = None, path_prefix: str = None,
+               limit: int = None) -> list:
+        """Return the declarations of a name, in index order; see ProjectIndex.lookup."""
+        _, normalized_prefix = normalize_filters(None, path_prefix)
+        results = []
+        for shard_index in self._shard_indexes(name, language, normalized_prefix):
+            remaining = None if limit is None else limit - len(results)
+            results.extend(self._load(shard_index).lookup(name, kind, language, path_prefix, remaining))
+            if limit is not None and len(results) >= limit:
+                break
+        return results
+
+    def search_prefix(self, prefix: str, kind=None, language: str = None, path_prefix: str = None,
+                      limit: int = 50) -> list:
+        """Return the declarations of every name starting with prefix, ignoring case; see ProjectIndex.search_prefix."""
+        _, normalized_prefix = normalize_filters(None, path_prefix)
+        results = [self._load(shard_index).search_prefix(prefix, kind, language, path_prefix, limit)
+                   for shard_index in self._shard_indexes(None, language, normalized_prefix)]
+        merged = heapq.merge(*results, key=lambda symbol: (symbol.name.lower(), symbol.name))
+        return list(merged)[:limit]
+
+    def fuzzy_search(self, query: str, kind=None, language: str = None, path_prefix: str = None,
+                     limit: int = 10) -> list:
+        """Return the declarations whose names are closest to query; see ProjectIndex.fuzzy_search."""
+        _, normalized_prefix = normalize_filters(None, path_prefix)
+        results = [self._load(shard_index).fuzzy_search(query, kind, language, path_prefix, limit)
+                   for shard_index in self._shard_indexes(None, language, normalized_prefix)]
+        # ProjectIndex ranks by (distance, len(name), name) and lists the symbols of a name in
+        # index order, so the shards are merged by the same key to rank ties the same way
+        merged = heapq.merge(*results, key=lambda match: (match[1], len(match[0].name), match[0].name,
+                                                          walk_order_key(match[0].path)))
+        return list(merged)[:limit]
+
+    def to_dict(self) -> dict:
+        """Load every shard and merge them into the ProjectIndex.json schema."""
+        project_index = {}
+        for shard_index in range(len(self.shards)):
+            project_index.update(self.shard_details(shard_index))
+        return project_index
@@ -0,0 +1,53 @@
+import os
+import mmap
+import logging
+
+from .symbols import Symbol
+
+logger = logging.getLogger(__name__)
+
+# Smaller files are read with a seek, mapping them costs more than it saves
+MMAP_MIN_SIZE = 64 * 1024
+
+class SnippetError(Exception):
+    """Raised when the source of a symbol can't be located."""
+
+def read_source_range(file_path: str, start_byte: int, end_byte: int) -> bytes:
+    """Return the bytes from start_byte up to end_byte of a file, without reading the rest of it.
+
+    Large files are memory mapped, so only the pages holding the range are read from disk.
+    A range reaching past the end of the file, e.g. of a file that shrank since it was
+    indexed, is cut at the end of the file.
+    """
+    with open(file_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        end_byte = min(end_byte, size)
+        if start_byte >= end_byte:
+            return b''
+        if size < MMAP_MIN_SIZE:
+            f.seek(start_byte)
+            return f.read(end_byte - start_byte)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return mapped[start_byte:end_byte]
+
+def read_snippet(root_dir: str, symbol: Symbol) -> str:
+    """Return the source of a symbol found in the index of the project at root_dir.
+
+    The text is read from the byte range recorded in the index, so it is only right as
+    long as the file hasn't changed since it was indexed; a snippet that doesn't contain
+    the symbol's name is logged as stale.
+
+    Raises:
+        SnippetError: If the index was built without ranges or the file can't be read
+    """
+    if symbol.range is None:
+        raise SnippetError(f"No source range recorded for {symbol.name}, index the project with ranges")
+    _, _, start_byte, end_byte = symbol.range
+    try:
+        source = read_source_range(os.path.join(root_dir, symbol.path), start_byte, end_byte)
+    except OSError as e:
+        raise SnippetError(f"Cannot read {symbol.path}: {e}") from None
+    snippet = source.decode('utf8', 'replace')
+    if symbol.name not in snippet:
+        logger.warning("%s changed since it was indexed, the snippet of %s may be wrong.", symbol.path, symbol.name)
+    return snippet
@@ -0,0 +1,295 @@
+import re
+import json
+import logging
+import sqlite3
+import hashlib
+
+from .symbols import SYMBOL_KEYS, csharp_method_signature, language_for_path, split_signature
+
+logger = logging.getLogger(__name__)
+
+# Database written next to ProjectIndex.json
+SQLITE_INDEX_FILENAME = "ProjectIndex.db"
+
+# Bump whenever the schema or the rows written for an entry change; older databases are rebuilt from scratch
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    language TEXT,
+    -- Hash of the file's index entry, rows are only rewritten when it changes
+    details_hash TEXT NOT NULL
+);
+-- Classes, structs, interfaces and enums
+CREATE TABLE classes (
+    id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    namespace TEXT,
+    parent TEXT
+);
+CREATE TABLE bases (
+    class_id INTEGER NOT NULL REFERENCES classes(id) ON DELETE CASCADE,
+    name TEXT NOT NULL
+);
+-- Functions, and methods when class_id is set
+CREATE TABLE functions (
+    id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    class_id INTEGER REFERENCES classes(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    signature TEXT,
+    parameters TEXT,
+    return_type TEXT,
+    modifiers TEXT
+);
+CREATE TABLE imports (
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    source TEXT,
+    name TEXT
+);
+CREATE INDEX classes_file ON classes(file_id);
+CREATE INDEX classes_name ON classes(name);
+CREATE INDEX classes_namespace ON classes(namespace);
+CREATE INDEX bases_class ON bases(class_id);
+CREATE INDEX bases_name ON bases(name);
+CREATE INDEX functions_file ON functions(file_id);
+CREATE INDEX functions_class ON functions(class_id);
+CREATE INDEX functions_name ON functions(name);
+CREATE INDEX functions_return_type ON functions(return_type);
+CREATE INDEX imports_file ON imports(file_id);
+CREATE INDEX imports_source ON imports(source);
+"""
+
+# Full-text index over all symbols. The rowid of a class is its id in classes, the
+# rowid of a function is its negated id in functions, so rows can be deleted by rowid.
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE symbols_fts USING fts5(
+    name, signature, docstring, kind UNINDEXED, path UNINDEXED
+);
+"""
+
+TABLES = ('symbols_fts', 'imports', 'functions', 'bases', 'classes', 'files')
+
+_FROM_IMPORT = re.compile(r'from\s+(\S+)\s+import\s+(.*)', re.DOTALL)
+
+def details_hash(details: dict) -> str:
+    """Return a hash of a file's index entry."""
+    encoded = json.dumps(details, separators=(',', ':')).encode('utf8')
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+def _split_bases(bases: str) -> list:
+    """Split a C# base list like 'Dictionary<string, int>, IDisposable' at the commas outside type arguments."""
+    names = []
+    depth = start = 0
+    for i, char in enumerate(bases):
+        if char in '<([':
+            depth += 1
+        elif char in '>)]':
+            depth = max(depth - 1, 0)
+        elif char == ',' and depth == 0:
+            names.append(bases[start:i])
+            start = i + 1
+    names.append(bases[start:])
+    return [name.strip() for name in names if name.strip()]
+
+def _python_import_rows(statement: str) -> list:
+    """Split a Python import statement into (source, name) rows; name is None for plain imports."""
+    statement = ' '.join(statement.split())
+    match = _FROM_IMPORT.match(statement)
+    if match:
+        names = match.group(2).strip('() ')
+        return [(match.group(1), name.strip()) for name in names.split(',') if name.strip()]
+    if statement.startswith('import '):
+        rows = []
+        for part in statement[len('import '):].split(','):
+            part = part.strip()
+            rows.append((part.split(' as ')[0].strip(), part if ' as ' in part else None))
+        return rows
+    return [(None, statement)]
+
+class SqliteIndex:
+    """The project index as a normalized SQLite database with a full-text symbol table.
+
+    Every file is updated in its own transaction, and only when its index entry changed,
+    so re-indexing a project only rewrites the rows of changed files. The database uses
+    write-ahead logging, so it can be queried while it is being updated.
+    """
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.connection = sqlite3.connect(db_path)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.has_fts = True
+        self._create_schema()
+
+    def _create_schema(self):
+        version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        if version == SCHEMA_VERSION:
+            self.has_fts = self.connection.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'symbols_fts'").fetchone() is not None
+            return
+        with self.connection:
+            for table in TABLES:
+                self.connection.execute(f"DROP TABLE IF EXISTS {table}")
+            self.connection.executescript(SCHEMA)
+            try:
+                self.connection.executescript(FTS_SCHEMA)
+            except sqlite3.OperationalError as e:
+                self.has_fts = False
+                logger.warning("SQLite full-text search unavailable, symbols_fts not created: %s", e)
+            self.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _delete_rows(self, file_id: int):
+        """Delete the rows of a file; its classes, bases, functions and imports cascade."""
+        if self.has_fts:
+            self.connection.execute(
+                "DELETE FROM symbols_fts WHERE rowid IN (SELECT id FROM classes WHERE file_id = ?)", (file_id,))
+            self.connection.execute(
+                "DELETE FROM symbols_fts WHERE rowid IN (SELECT -id FROM functions WHERE file_id = ?)", (file_id,))
+        self.connection.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+    def _insert_function(self, file_id: int, class_id, member, kind: str, path: str):
+        """Insert a function or method entry, which is a signature string or a C# method dict."""
+        if isinstance(member, dict):
+            name = member['name']
+            signature = csharp_method_signature(member)
+            parameters = member.get('parameters')
+            return_type = member.get('return_type')
+            modifiers = ' '.join(member.get('modifiers', [])) or None
+            docstring = member.get('docstring')
+        else:
+            signature = member
+            name, parameters, return_type = split_signature(member)
+            # The Python parser writes ' -> None' for functions without a return annotation
+            if return_type == 'None' and language_for_path(path) == 'python':
+                return_type = None
+            modifiers = docstring = None
+        cursor = self.connection.execute(
+            "INSERT INTO functions (file_id, class_id, name, signature, parameters, return_type, modifiers) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (file_id, class_id, name, signature, parameters, return_type, modifiers))
+        if self.has_fts:
+            self.connection.execute(
+                "INSERT INTO symbols_fts (rowid, name, signature, docstring, kind, path) VALUES (?, ?, ?, ?, ?, ?)",
+                (-cursor.lastrowid, name, signature, docstring, kind, path))
+
+    def _insert_class(self, file_id: int, entry, kind: str, path: str):
+        """Insert a type entry with its bases and methods."""
+        if not isinstance(entry, dict):
+            # TypeScript interfaces are listed by name only
+            entry = {'name': entry}
+        cursor = self.connection.execute(
+            "INSERT INTO classes (file_id, kind, name, namespace, parent) VALUES (?, ?, ?, ?, ?)",
+            (file_id, kind, entry['name'], entry.get('namespace'), entry.get('parent')))
+        class_id = cursor.lastrowid
+        bases = entry.get('bases') or []
+        # C# bases are a comma separated string, Python bases a list
+        if isinstance(bases, str):
+            bases = _split_bases(bases)
+        self.connection.executemany("INSERT INTO bases (class_id, name) VALUES (?, ?)",
+                                    [(class_id, base.strip()) for base in bases if base.strip()])
+        if self.has_fts:
+            self.connection.execute(
+                "INSERT INTO symbols_fts (rowid, name, signature, docstring, kind, path) VALUES (?, ?, ?, ?, ?, ?)",
+                (class_id, entry['name'], None, entry.get('docstring'), kind, path))
+        for method in entry.get('methods', ()):
+            self._insert_function(file_id, class_id, method, 'method', path)
+
+    def _insert_imports(self, file_id: int, details: dict):
+        rows = []
+        for statement in details.get('py_imports', ()):
+            rows.extend(_python_import_rows(statement))
+        for entry in details.get('imports', ()):
+            # TypeScript and JavaScript imports list the imported items per module
+            rows.extend((entry.get('source'), item) for item in entry.get('imported_items', []))
+        self.connection.executemany("INSERT INTO imports (file_id, source, name) VALUES (?, ?, ?)",
+                                    [(file_id, source, name) for source, name in rows])
+
+    def update_file(self, relative_path: str, details: dict) -> bool:
+        """Replace the rows of one file in a single transaction, unless its entry is unchanged.
+
+        Returns:
+            bool: True if the rows were rewritten
+        """
+        new_hash = details_hash(details)
+        row = self.connection.execute(
+            "SELECT id, details_hash FROM files WHERE path = ?", (relative_path,)).fetchone()
+        if row is not None and row[1] == new_hash:
+            return False
+        with self.connection:
+            if row is not None:
+                self._delete_rows(row[0])
+            cursor = self.connection.execute(
+                "INSERT INTO files (path, language, details_hash) VALUES (?, ?, ?)",
+                (relative_path, language_for_path(relative_path), new_hash))
+            file_id = cursor.lastrowid
+            for key, kind in SYMBOL_KEYS.items():
+                for entry in details.get(key, ()):
+                    if kind == 'function':
+                        self._insert_function(file_id, None, entry, kind, relative_path)
+                    else:
+                        self._insert_class(file_id, entry, kind, relative_path)
+            self._insert_imports(file_id, details)
+        return True
+
+    def remove_file(self, relative_path: str) -> bool:
+        """Delete the rows of one file in a single transaction.
+
+        Returns:
+            bool: True if the file was in the database
+        """
+        row = self.connection.execute("SELECT id FROM files WHERE path = ?", (relative_path,)).fetchone()
+        if row is None:
+            return False
+        with self.connection:
+            self._delete_rows(row[0])
+        return True
+
+    def sync(self, project_index: dict) -> tuple:
+        """Bring the database in line with a project index, touching only changed files.
+
+        Returns:
+            tuple: (number of files written, number of files removed)
+        """
+        updated = sum(self.update_file(relative_path, details) for relative_path, details in project_index.items())
+        stale = [path for (path,) in self.connection.execute("SELECT path FROM files")
+                 if path not in project_index]
+        for relative_path in stale:
+            self.remove_file(relative_path)
+        return updated, len(stale)
+
+    def search(self, text: str, limit: int = 20) -> list:
+        """Full-text search over symbol names, signatures and docstrings.
+
+        Args:
+            text: An FTS5 query, e.g. 'parse*' or 'signature:Task'
+            limit: Maximum number of results
+
+        Returns:
+            list: (kind, name, signature, path) tuples, best matches first
+        """
+        if not self.has_fts:
+            raise RuntimeError("Full-text search is not available in this SQLite build")
+        return self.connection.execute(
+            "SELECT kind, name, signature, path FROM symbols_fts WHERE symbols_fts MATCH ? ORDER BY rank LIMIT ?",
+            (text, limit)).fetchall()
+
+def write_sqlite_index(project_index: dict, db_path: str):
+    """Sync the database at db_path with a project index, creating it if needed."""
+    with SqliteIndex(db_path) as database:
+        updated, removed = database.sync(project_index)
+    logger.info("SQLite index: %d file(s) written, %d removed.", updated, removed)
@@ -0,0 +1,164 @@
+import io
+import time
+import heapq
+import logging
+from contextlib import contextmanager
+
+from .symbols import language_for_path
+
+logger = logging.getLogger(__name__)
+
+# Statistics file written next to ProjectIndex.json by --stats
+STATS_FILENAME = "ProjectIndex.stats.json"
+
+# Phases timed inside the parsers for every file, see parser.timing
+FILE_PHASES = ('read', 'parse', 'extract')
+
+class IndexStats:
+    """Timings and counters of an indexing run, per phase, per language and for the slowest files.
+
+    Run-level phases like 'walk' and 'serialize' are wall-clock times. The per-file phases
+    are measured in the process that parsed the file, so with several jobs their sum
+    exceeds the wall-clock time of the run.
+    """
+    def __init__(self, slowest_count: int = 10):
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.counters = {'files': 0, 'parsed': 0, 'cached': 0, 'skipped': 0, 'failed': 0, 'bytes': 0}
+        self.languages = {}
+        self.slowest_count = slowest_count
+        # Min-heap of (seconds, relative path) holding the slowest files
+        self._slowest = []
+
+    def add_time(self, phase: str, seconds: float):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name: str):
+        """Add the wall-clock time spent in the block to a run-level phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def timed_iter(self, phase: str, iterable):
+        """Yield from iterable, adding the time spent producing every item to a phase."""
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add_time(phase, time.perf_counter() - start)
+                return
+            self.add_time(phase, time.perf_counter() - start)
+            yield item
+
+    def add_file(self, relative_path: str, size: int, timings: dict = None, cached: bool = False,
+                 failed: bool = False, skipped: bool = False):
+        """Count one file of the walk.
+
+        Args:
+            relative_path: Path of the file relative to the indexed root
+            size: Size of the file in bytes
+            timings: Seconds per phase spent on the file, None if it wasn't parsed
+            cached: Whether the details came from the parse cache
+            failed: Whether the file could not be indexed
+            skipped: Whether the file exceeded the parse limits
+        """
+        self.counters['files'] += 1
+        self.counters['bytes'] += size
+        self.counters['cached' if cached else 'failed' if failed else 'skipped' if skipped else 'parsed'] += 1
+        name = language_for_path(relative_path) or 'other'
+        language = self.languages.get(name)
+        if language is None:
+            language = self.languages[name] = {
+                'files': 0, 'bytes': 0, 'cached': 0, 'seconds': dict.fromkeys(FILE_PHASES, 0.0)}
+        language['files'] += 1
+        language['bytes'] += size
+        if cached:
+            language['cached'] += 1
+        if timings:
+            seconds = language['seconds']
+            for phase, phase_seconds in timings.items():
+                seconds[phase] = seconds.get(phase, 0.0) + phase_seconds
+                self.add_time(phase, phase_seconds)
+            total = sum(timings.values())
+            if len(self._slowest) < self.slowest_count:
+                heapq.heappush(self._slowest, (total, relative_path))
+            elif total > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, (total, relative_path))
+
+    def to_dict(self) -> dict:
+        """Return the statistics as a JSON serializable dict; times are in seconds."""
+        elapsed = time.perf_counter() - self.started
+        counters = dict(self.counters)
+        return {
+            'elapsed': round(elapsed, 4),
+            'files_per_second': round(counters['files'] / elapsed, 1) if elapsed else None,
+            'mb_per_second': round(counters['bytes'] / (1024 * 1024) / elapsed, 2) if elapsed else None,
+            'counters': counters,
+            'phases': {phase: round(seconds, 4) for phase, seconds in self.phases.items()},
+            'languages': {
+                name: dict(language, seconds={phase: round(seconds, 4) for phase, seconds in language['seconds'].items()})
+                for name, language in sorted(self.languages.items())
+            },
+            'slowest_files': [{'file': relative_path, 'seconds': round(seconds, 4)}
+                              for seconds, relative_path in sorted(self._slowest, reverse=True)],
+        }
+
+    def log_summary(self):
+        """Log a human readable summary of the statistics."""
+        stats = self.to_dict()
+        counters = stats['counters']
+        logger.info("Indexed %d file(s), %.1f MB in %.2fs (%s files/s, %s MB/s): "
+                    "%d parsed, %d cached, %d skipped, %d failed.",
+                    counters['files'], counters['bytes'] / (1024 * 1024), stats['elapsed'],
+                    stats['files_per_second'], stats['mb_per_second'],
+                    counters['parsed'], counters['cached'], counters['skipped'], counters['failed'])
+        for phase, seconds in stats['phases'].items():
+            logger.info("  %-10s %9.3fs", phase, seconds)
+        for name, language in stats['languages'].items():
+            phases = ', '.join(f"{phase} {seconds:.3f}s" for phase, seconds in language['seconds'].items())
+            logger.info("  %-10s %6d file(s) %8.1f KB  %s", name, language['files'], language['bytes'] / 1024, phases)
+        if stats['slowest_files']:
+            logger.info("Slowest files:")
+            for entry in stats['slowest_files']:
+                logger.info("  %9.4fs  %s", entry['seconds'], entry['file'])
+
+@contextmanager
+def profile_run(mode: str, output_path: str, top: int = 25):
+    """Profile the block with cProfile ('cpu') or tracemalloc ('memory') and log the top entries.
+
+    CPU profiles are also dumped to output_path for tools like snakeviz or pstats. Only the
+    calling process is profiled, not the worker processes of parallel runs.
+    """
+    if mode == 'cpu':
+        import cProfile
+        import pstats
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(output_path)
+            report = io.StringIO()
+            pstats.Stats(profiler, stream=report).sort_stats('cumulative').print_stats(top)
+            logger.info("%s\nCPU profile written to %s.", report.getvalue().rstrip(), output_path)
+    elif mode == 'memory':
+        import tracemalloc
+        tracemalloc.start(10)
+        try:
+            yield
+        finally:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            logger.info("Traced memory: %.1f MB current, %.1f MB peak. Top allocations:",
+                        current / (1024 * 1024), peak / (1024 * 1024))
+            for statistic in snapshot.statistics('lineno')[:top]:
+                logger.info("  %s", statistic)
+    else:
+        raise ValueError(f"Unknown profile mode: {mode}")
@@ -0,0 +1,182 @@
+import os
+
+# Index keys holding declarations and the kind of symbol they declare, for every language.
+# Imports and exports are references, not declarations, and yield no symbols.
+SYMBOL_KEYS = {
+    'py_classes': 'class',
+    'py_functions': 'function',
+    'classes': 'class',
+    'structs': 'struct',
+    'interfaces': 'interface',
+    'enums': 'enum',
+    'functions': 'function',
+}
+
+SYMBOL_KINDS = ('class', 'struct', 'interface', 'enum', 'function', 'method')
+
+# Language of the files indexed for each extension
+LANGUAGES = {
+    '.py': 'python',
+    '.cs': 'csharp',
+    '.ts': 'typescript',
+    '.tsx': 'typescript',
+    '.js': 'javascript',
+}
+
+class Symbol:
+    """A declaration found in the project index."""
+    __slots__ = ('name', 'kind', 'path', 'container', 'signature', 'range')
+
+    def __init__(self, name: str, kind: str, path: str, container: str = None, signature: str = None,
+                 range: list = None):
+        self.name = name
+        self.kind = kind
+        # Relative path of the declaring file, as used for the keys of the index
+        self.path = path
+        # Enclosing namespace and/or type, '.' separated, if known
+        self.container = container
+        # The signature as written to the index, for functions and methods
+        self.signature = signature
+        # [start_line, end_line, start_byte, end_byte] of the declaration, if the index records ranges
+        self.range = range
+
+    def __eq__(self, other):
+        return isinstance(other, Symbol) and all(
+            getattr(self, field) == getattr(other, field) for field in self.__slots__)
+
+    def __hash__(self):
+        return hash((self.name, self.kind, self.path, self.container))
+
+    def __repr__(self):
+        container = f"{self.container}." if self.container else ''
+        return f"<{self.kind} {container}{self.name} in {self.path}>"
+
+def _return_type(rest: str) -> str:
+    """Return the type annotated after a parameter list, given the text following it."""
+    rest = rest.strip()
+    if rest.startswith('->'):
+        return rest[2:].strip() or None
+    if rest.startswith(':'):
+        return rest[1:].strip() or None
+    return None
+
+def split_signature(signature: str) -> tuple:
+    """Split a signature string into its name, parameter list and return type.
+
+    Python signatures are prefixed with their decorators, which may have arguments
+    themselves, so the name is the first top-level call that isn't a decorator. The
+    return type follows '->' in Python and ':' in TypeScript signatures.
+
+    Returns:
+        tuple: (name, parameters, return_type), parameters and return_type may be None
+    """
+    open_index = signature.find('(')
+    if open_index == -1:
+        return signature.strip(), None, None
+    close_index = signature.find(')', open_index)
+    # Undecorated signatures without nested parentheses in the parameter list are the norm
+    if close_index != -1 and '@' not in signature[:open_index] and '(' not in signature[open_index + 1:close_index]:
+        head = signature[:open_index].split()
+        return (head[-1] if head else '', signature[open_index + 1:close_index],
+                _return_type(signature[close_index + 1:]))
+
+    depth = 0
+    name = open_index = None
+    for i, char in enumerate(signature):
+        if char == '(':
+            if depth == 0 and name is None:
+                token = signature[:i].rsplit(None, 1)[-1] if signature[:i].strip() else ''
+                if not token.startswith('@'):
+                    name, open_index = token, i
+            depth += 1
+        elif char == ')':
+            depth = max(depth - 1, 0)
+            if depth == 0 and open_index is not None:
+                return name, signature[open_index + 1:i], _return_type(signature[i + 1:])
+    if name is not None:
+        return name, signature[open_index + 1:], None
+    return signature.strip(), None, None
+
+def signature_name(signature: str) -> str:
+    """Return the function name of a signature string, e.g. 'greet' for '@cached greet(self) -> str'."""
+    return split_signature(signature)[0]
+
+def language_for_path(relative_path: str) -> str:
+    """Return the language of an indexed file: 'python', 'csharp', 'typescript' or 'javascript'."""
+    return LANGUAGES.get(os.path.splitext(relative_path)[1].lower())
+
+def normalize_filters(kind, path_prefix: str) -> tuple:
+    """Turn a kind or collection of kinds into a tuple and a path prefix into a normalized path."""
+    kinds = (kind,) if isinstance(kind, str) else tuple(kind or ())
+    if path_prefix:
+        path_prefix = os.path.normpath(path_prefix)
+    return kinds, path_prefix
+
+def path_matches(path: str, language: str, path_prefix: str) -> bool:
+    """Check the path of a declaring file against the language and path filters of a lookup."""
+    if language and language_for_path(path) != language:
+        return False
+    return not path_prefix or path == path_prefix or path.startswith(path_prefix.rstrip(os.sep) + os.sep)
+
+def symbol_matches(symbol: Symbol, kinds: tuple, language: str, path_prefix: str) -> bool:
+    """Check a symbol against the filters of a lookup, as returned by normalize_filters."""
+    if kinds and symbol.kind not in kinds:
+        return False
+    return path_matches(symbol.path, language, path_prefix)
+
+def in_container(symbol: Symbol, container: str) -> bool:
+    """Check if a symbol's container is, or ends with, a '.' separated container name."""
+    return symbol.container is not None and (
+        symbol.container == container or symbol.container.endswith('.' + container))
+
+def _join(*parts) -> str:
+    return '.'.join(part for part in parts if part) or None
+
+def csharp_method_signature(method: dict) -> str:
+    """Format a C# method entry like its declaration, e.g. 'public string GetGreeting(string name)'."""
+    modifiers = ' '.join(method.get('modifiers', []))
+    return f"{modifiers} {method.get('return_type', '')} {method['name']}({method.get('parameters', '')})".strip()
+
+def _member_symbol(member, kind: str, path: str, container: str) -> Symbol:
+    """Create the symbol of a function or method entry, which is a signature string or a C# method dict."""
+    if isinstance(member, dict):
+        return Symbol(member['name'], kind, path, container, csharp_method_signature(member))
+    return Symbol(signature_name(member), kind, path, container, member)
+
+def iter_symbols(relative_path: str, details: dict):
+    """Yield the symbols declared in one file of the project index.
+
+    Handles the entries of every language: Python classes and signature strings, C#
+    type dicts with namespace, parent and method dicts, TypeScript interface names and
+    JavaScript classes with method signatures. Indexes built with ranges list the source
+    range of every symbol in a 'ranges' entry, in this order; they are attached to the symbols.
+
+    Args:
+        relative_path: The key of the file in the project index
+        details: The value of the file in the project index
+
+    Yields:
+        Symbol: Types first in index order, each followed by its methods
+    """
+    ranges = details.get('ranges')
+    if ranges:
+        for symbol, symbol_range in zip(_iter_file_symbols(relative_path, details), ranges):
+            symbol.range = symbol_range
+            yield symbol
+    else:
+        yield from _iter_file_symbols(relative_path, details)
+
+def _iter_file_symbols(relative_path: str, details: dict):
+    for key, kind in SYMBOL_KEYS.items():
+        for entry in details.get(key, ()):
+            if kind == 'function':
+                yield _member_symbol(entry, kind, relative_path, None)
+                continue
+            if not isinstance(entry, dict):
+                # TypeScript interfaces are listed by name only
+                yield Symbol(entry, kind, relative_path)
+                continue
+            container = _join(entry.get('namespace'), entry.get('parent'))
+            yield Symbol(entry['name'], kind, relative_path, container)
+            for method in entry.get('methods', ()):
+                yield _member_symbol(method, 'method', relative_path, _join(container, entry['name']))
@@ -0,0 +1,74 @@
+import os
+import logging
+
+from parser.parser import is_supported_file
+from .ignore import IgnoreEngine
+
+logger = logging.getLogger(__name__)
+
+def _scan_directory(dir_path: str) -> list:
+    """List a directory sorted by name, or return an empty list if it can't be read."""
+    try:
+        with os.scandir(dir_path) as entries:
+            return sorted(entries, key=lambda entry: entry.name)
+    except OSError as e:
+        logger.warning("Cannot read directory %s: %s", dir_path, e)
+        return []
+
+def _walk(root_dir: str, ignore: IgnoreEngine, start_dir: str):
+    """Walk the tree top-down, yielding (dir_path, relative_dir, file entries) with ignored entries pruned."""
+    start_relative = os.path.relpath(start_dir, root_dir).replace(os.sep, '/')
+    stack = [(start_dir, '' if start_relative == os.curdir else start_relative)]
+    while stack:
+        dir_path, relative_dir = stack.pop()
+        rules = ignore.rules_for(relative_dir) if ignore is not None else None
+        files = []
+        subdirs = []
+        for entry in _scan_directory(dir_path):
+            relative_path = f"{relative_dir}/{entry.name}" if relative_dir else entry.name
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+            if ignore is not None and ignore.is_ignored(relative_path, is_dir, rules):
+                continue
+            if is_dir:
+                subdirs.append((entry.path, relative_path))
+            else:
+                files.append(entry)
+        yield dir_path, relative_dir, files
+        # Push in reverse so directories are visited in name order
+        stack.extend(reversed(subdirs))
+
+def walk_source_files(root_dir: str, ignore: IgnoreEngine = None, start_dir: str = None):
+    """Yield every supported source file below start_dir (default: root_dir).
+
+    Ignored directories are pruned before they are entered and the stat result of
+    each file comes from its DirEntry, so no extra system calls are made per file.
+
+    Yields:
+        tuple: (file_path, relative_path, stat_result), relative to root_dir
+    """
+    for _, relative_dir, entries in _walk(root_dir, ignore, start_dir or root_dir):
+        for entry in entries:
+            if not is_supported_file(entry.name):
+                continue
+            try:
+                stat_result = entry.stat()
+            except OSError:
+                continue
+            relative_path = os.path.join(relative_dir, entry.name) if relative_dir else entry.name
+            yield entry.path, os.path.normpath(relative_path), stat_result
+
+def walk_directories(root_dir: str, ignore: IgnoreEngine = None, start_dir: str = None):
+    """Yield every directory below start_dir (default: root_dir) that isn't ignored, including start_dir."""
+    for dir_path, _, _ in _walk(root_dir, ignore, start_dir or root_dir):
+        yield dir_path
+
+def walk_order_key(relative_path: str) -> tuple:
+    """Sort key that orders relative file paths the way walk_source_files yields them.
+
+    Within a directory the files come first and then the subdirectories, each sorted by name.
+    """
+    parts = relative_path.split(os.sep)
+    return tuple((1, part) for part in parts[:-1]) + ((0, parts[-1]),)
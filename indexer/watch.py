@@ -0,0 +1,407 @@
+import os
+import sys
+import copy
+import time
+import select
+import logging
+import struct
+import ctypes
+import ctypes.util
+from collections import OrderedDict
+
+from parser.parser import (is_supported_file, should_skip_file, get_language_name_for_file,
+                           extract_types_and_members_from_node)
+from parser.registry import get_parser
+from parser.limits import ParseLimits, SkippedFile, apply_limits, parse_source
+from parser.source import shift_ranges
+from .ignore import IgnoreEngine
+from .walker import walk_source_files, walk_directories
+
+logger = logging.getLogger(__name__)
+
+# inotify event flags, see inotify(7)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct('iIII')
+
+# Default memory budget for retained syntax trees
+DEFAULT_TREE_MEMORY = 256 * 1024 * 1024
+# Rough size of one tree-sitter node, used to estimate the memory held by a tree
+NODE_SIZE_ESTIMATE = 64
+# Top-level nodes that change the extraction of every node after them
+CONTEXT_NODE_TYPES = ('file_scoped_namespace_declaration',)
+
+class InotifyWatcher:
+    """Reports changed paths under a directory tree using Linux inotify."""
+    def __init__(self, root_dir: str, ignore: IgnoreEngine = None):
+        self.root_dir = root_dir
+        self.ignore = ignore
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"inotify_init1 failed: {os.strerror(errno)}")
+        self.watches = {}
+        self._add_tree(root_dir)
+
+    def _add_tree(self, dir_path: str):
+        """Watch a directory and all of its subdirectories that aren't ignored."""
+        for subdir in walk_directories(self.root_dir, self.ignore, dir_path):
+            wd = self._libc.inotify_add_watch(self.fd, os.fsencode(subdir), WATCH_MASK)
+            if wd >= 0:
+                self.watches[wd] = subdir
+
+    def read_changes(self, timeout: float = None) -> set:
+        """Wait for events and return the paths of the files or directories that changed.
+
+        Args:
+            timeout: Seconds to wait for the first event, or None to wait indefinitely
+
+        Returns:
+            set: Changed paths; a directory means everything below it has to be rescanned
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        buffer = os.read(self.fd, 64 * 1024)
+        changes = set()
+        offset = 0
+        while offset < len(buffer):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(buffer, offset)
+            name = buffer[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b'\0')
+            offset += EVENT_HEADER.size + length
+
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost, everything has to be checked again
+                changes.add(self.root_dir)
+                continue
+            dir_path = self.watches.get(wd)
+            if dir_path is None:
+                continue
+            if mask & (IN_IGNORED | IN_DELETE_SELF):
+                self.watches.pop(wd, None)
+                continue
+            path = os.path.join(dir_path, os.fsdecode(name))
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                relative_path = os.path.relpath(path, self.root_dir).replace(os.sep, '/')
+                if self.ignore is not None and self.ignore.is_path_ignored(relative_path, True):
+                    continue
+                # Files may have been written before the new directory was watched
+                self._add_tree(path)
+            changes.add(path)
+        return changes
+
+    def close(self):
+        os.close(self.fd)
+
+class PollingWatcher:
+    """Reports changed files by periodically comparing stat results, for platforms without inotify."""
+    def __init__(self, root_dir: str, ignore: IgnoreEngine = None, interval: float = 1.0):
+        self.root_dir = root_dir
+        self.ignore = ignore
+        self.interval = interval
+        self.snapshot = self._scan()
+
+    def _scan(self) -> dict:
+        return {file_path: (stat_result.st_mtime_ns, stat_result.st_size)
+                for file_path, _, stat_result in walk_source_files(self.root_dir, self.ignore)}
+
+    def read_changes(self, timeout: float = None) -> set:
+        """Sleep for one polling interval and return the files added, modified or deleted since the last call."""
+        time.sleep(self.interval if timeout is None else min(timeout, self.interval))
+        snapshot = self._scan()
+        changes = {path for path, key in snapshot.items() if self.snapshot.get(path) != key}
+        changes.update(path for path in self.snapshot if path not in snapshot)
+        self.snapshot = snapshot
+        return changes
+
+    def close(self):
+        pass
+
+def create_watcher(root_dir: str, ignore: IgnoreEngine = None):
+    """Return an inotify based watcher on Linux, falling back to polling elsewhere."""
+    if sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(root_dir, ignore)
+        except OSError as e:
+            logger.warning("inotify unavailable (%s), falling back to polling.", e)
+    return PollingWatcher(root_dir, ignore)
+
+class ParsedFile:
+    """A retained syntax tree together with the extraction results of its top-level nodes."""
+    def __init__(self, source: bytes, tree, units: list):
+        self.source = source
+        self.tree = tree
+        # (start_byte, end_byte, node type, result) for every child of the root node
+        self.units = units
+        self.size = len(source) + tree.root_node.descendant_count * NODE_SIZE_ESTIMATE
+
+class TreeCache:
+    """LRU of parsed files bounded by an estimate of the memory they hold."""
+    def __init__(self, max_bytes: int = DEFAULT_TREE_MEMORY):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.entries = OrderedDict()
+
+    def get(self, file_path: str) -> ParsedFile:
+        parsed_file = self.entries.get(file_path)
+        if parsed_file is not None:
+            self.entries.move_to_end(file_path)
+        return parsed_file
+
+    def put(self, file_path: str, parsed_file: ParsedFile):
+        self.pop(file_path)
+        self.entries[file_path] = parsed_file
+        self.total_bytes += parsed_file.size
+        # Evict the least recently used trees, but always keep the newest one
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            _, evicted = self.entries.popitem(last=False)
+            self.total_bytes -= evicted.size
+
+    def pop(self, file_path: str):
+        parsed_file = self.entries.pop(file_path, None)
+        if parsed_file is not None:
+            self.total_bytes -= parsed_file.size
+
+def _common_prefix_length(a: bytes, b: bytes) -> int:
+    """Length of the common prefix of two buffers, found by bisection on slice comparisons."""
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[low:middle] == b[low:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+def _common_suffix_length(a: bytes, b: bytes, limit: int) -> int:
+    """Length of the common suffix of two buffers, at most limit bytes."""
+    low, high = 0, limit
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[len(a) - middle:len(a) - low] == b[len(b) - middle:len(b) - low]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+def _point_at(source: bytes, offset: int) -> tuple:
+    """Return the (row, column) point of a byte offset."""
+    row = source.count(b'\n', 0, offset)
+    return row, offset - (source.rfind(b'\n', 0, offset) + 1)
+
+def _overlaps(start: int, end: int, ranges: list) -> bool:
+    """Check if [start, end) shares a byte with any of the ranges, or strictly contains an empty one.
+
+    Ranges are half-open like tree-sitter's; an empty range is the point of a deletion. A
+    node that merely ends where a change starts, or starts where it ends, kept its text.
+    """
+    return any(range_start < end and start < range_end for range_start, range_end in ranges)
+
+def _merge_results(results: list):
+    """Concatenate the symbol lists of result objects of the same language."""
+    merged = type(results[0])()
+    for result in results:
+        for attribute, values in vars(result).items():
+            getattr(merged, attribute).extend(values)
+    return merged
+
+def _shift_result(result, line_delta: int, byte_delta: int):
+    """Return a copy of a result object whose source ranges are moved by the given deltas."""
+    shifted = copy.copy(result)
+    for attribute, values in vars(result).items():
+        if attribute.endswith('_ranges'):
+            setattr(shifted, attribute, shift_ranges(values, line_delta, byte_delta))
+    return shifted
+
+def _read_source(file_path: str) -> bytes:
+    """Read the raw bytes of a file, which the parsers parse as is."""
+    with open(file_path, 'rb') as f:
+        return f.read()
+
+class WatchIndexer:
+    """Keeps a project index up to date by reparsing files incrementally as they change.
+
+    The tree of a changed file is edited and reparsed with tree-sitter's incremental
+    parsing. Only the top-level nodes that fall into the changed ranges are extracted
+    again; the results of the others are reused. Retained trees live in a memory
+    bounded LRU, a file whose tree was evicted is simply parsed from scratch. The LRU
+    starts empty: the initial index usually comes from the parse cache without parsing
+    anything, so the first change to each file is a full parse, which retains its tree. Files
+    exceeding the optional limits are recorded as {'skipped': reason}. With ranges, the
+    source ranges of reused results are moved along with the text after the edit.
+    """
+    def __init__(self, root_dir: str, project_index: dict, write_index, extract_imports: bool = False,
+                 memory_limit: int = DEFAULT_TREE_MEMORY, watcher=None, ignore: IgnoreEngine = None,
+                 limits: ParseLimits = None, ranges: bool = False):
+        self.root_dir = root_dir
+        self.ignore = ignore if ignore is not None else IgnoreEngine(root_dir)
+        self.project_index = project_index
+        self.write_index = write_index
+        self.extract_imports = extract_imports
+        self.trees = TreeCache(memory_limit)
+        self.watcher = watcher
+        self.limits = limits
+        self.ranges = ranges
+
+    def _extract(self, node, file_name: str, source: bytes):
+        return extract_types_and_members_from_node(node, file_name, self.extract_imports, source)
+
+    def _parse(self, file_path: str, source: bytes, previous: ParsedFile):
+        """Parse a file, reusing the previous tree and unit results when available."""
+        file_name = os.path.basename(file_path)
+        parser = get_parser(get_language_name_for_file(file_name))
+        if previous is None:
+            tree = parse_source(parser, source)
+            units = [(child.start_byte, child.end_byte, child.type, self._extract(child, file_name, source))
+                     for child in tree.root_node.children]
+        else:
+            old_source = previous.source
+            start = _common_prefix_length(old_source, source)
+            suffix = _common_suffix_length(old_source, source, min(len(old_source), len(source)) - start)
+            old_end, new_end = len(old_source) - suffix, len(source) - suffix
+            old_end_point, new_end_point = _point_at(old_source, old_end), _point_at(source, new_end)
+            previous.tree.edit(
+                start_byte=start, old_end_byte=old_end, new_end_byte=new_end,
+                start_point=_point_at(old_source, start),
+                old_end_point=old_end_point, new_end_point=new_end_point)
+            tree = parse_source(parser, source, previous.tree)
+
+            # Token edits that keep the tree shape are not reported as changed ranges
+            changed = [(r.start_byte, r.end_byte) for r in previous.tree.changed_ranges(tree)]
+            changed.append((start, new_end))
+
+            # Results of units entirely before or after the edit can be reused at their shifted position
+            delta = new_end - old_end
+            line_delta = new_end_point[0] - old_end_point[0]
+            reusable = {}
+            context_changed = False
+            for unit_start, unit_end, unit_type, result in previous.units:
+                if unit_end <= start:
+                    reusable[(unit_start, unit_end)] = result
+                elif unit_start >= old_end:
+                    if delta or line_delta:
+                        result = _shift_result(result, line_delta, delta)
+                    reusable[(unit_start + delta, unit_end + delta)] = result
+                elif unit_type in CONTEXT_NODE_TYPES:
+                    context_changed = True
+
+            units = []
+            for child in tree.root_node.children:
+                result = reusable.get((child.start_byte, child.end_byte))
+                if result is None or context_changed or _overlaps(child.start_byte, child.end_byte, changed):
+                    result = self._extract(child, file_name, source)
+                    # Everything after a changed context node has to be extracted again
+                    if child.type in CONTEXT_NODE_TYPES:
+                        context_changed = True
+                units.append((child.start_byte, child.end_byte, child.type, result))
+
+        self.trees.put(file_path, ParsedFile(source, tree, units))
+        if not units:
+            return self._extract(tree.root_node, file_name, source)
+        return _merge_results([result for _, _, _, result in units])
+
+    def update_file(self, file_path: str) -> bool:
+        """Reindex a single file. Returns True if the index changed."""
+        if not is_supported_file(os.path.basename(file_path)) or should_skip_file(file_path):
+            return False
+        relative_path = os.path.relpath(file_path, self.root_dir)
+        if self.ignore.is_path_ignored(relative_path.replace(os.sep, '/')):
+            return False
+        try:
+            source = _read_source(file_path)
+        except OSError:
+            return self._remove(relative_path)
+
+        previous = self.trees.get(file_path)
+        if previous is not None and previous.source == source:
+            return False
+        try:
+            with apply_limits(self.limits):
+                if self.limits is not None:
+                    self.limits.check_source(file_path, source)
+                details = self._parse(file_path, source, previous).__to_dict__(self.ranges)
+        except SkippedFile as e:
+            self.trees.pop(file_path)
+            details = {'skipped': e.reason}
+        except Exception as e:
+            self.trees.pop(file_path)
+            logger.warning("Error indexing file %s: %s: %s", relative_path, type(e).__name__, e)
+            return False
+
+        if not any(details.values()):
+            return self.project_index.pop(relative_path, None) is not None
+        if self.project_index.get(relative_path) == details:
+            return False
+        self.project_index[relative_path] = details
+        return True
+
+    def _remove(self, relative_path: str) -> bool:
+        """Remove a deleted file, or every file below a deleted directory, from the index."""
+        prefix = relative_path + os.sep
+        removed = [path for path in self.project_index if path == relative_path or path.startswith(prefix)]
+        for path in removed:
+            del self.project_index[path]
+            self.trees.pop(os.path.join(self.root_dir, path))
+        return bool(removed)
+
+    def update_path(self, path: str) -> bool:
+        """Reindex a changed file, or rescan a changed directory. Returns True if the index changed."""
+        if os.path.isfile(path):
+            return self.update_file(path)
+        relative_path = os.path.relpath(path, self.root_dir)
+        if not os.path.isdir(path):
+            return self._remove(relative_path)
+        if relative_path != os.curdir and self.ignore.is_path_ignored(relative_path.replace(os.sep, '/'), True):
+            return False
+
+        changed = False
+        for file_path, _, _ in walk_source_files(self.root_dir, self.ignore, path):
+            if self.update_file(file_path):
+                changed = True
+        # Drop entries of files that disappeared while events were lost
+        prefix = '' if relative_path == os.curdir else relative_path + os.sep
+        for indexed_path in list(self.project_index):
+            if indexed_path.startswith(prefix) and not os.path.isfile(os.path.join(self.root_dir, indexed_path)):
+                if self._remove(indexed_path):
+                    changed = True
+        return changed
+
+    def run(self, debounce: float = 0.05):
+        """Process change events until interrupted, writing the index after every batch."""
+        if self.watcher is None:
+            self.watcher = create_watcher(self.root_dir, self.ignore)
+        logger.info("Watching %s for changes (Ctrl+C to stop)...", self.root_dir)
+        try:
+            while True:
+                changes = self.watcher.read_changes()
+                # Coalesce bursts of events, e.g. editors writing a temporary file and renaming it
+                while True:
+                    more = self.watcher.read_changes(timeout=debounce)
+                    if not more:
+                        break
+                    changes |= more
+
+                start_time = time.perf_counter()
+                changed = False
+                for path in sorted(changes):
+                    if self.update_path(path):
+                        changed = True
+                if changed:
+                    self.write_index(self.project_index)
+                    logger.info("Index updated in %.1f ms (%d changed path(s)).",
+                                (time.perf_counter() - start_time) * 1000, len(changes))
+        except KeyboardInterrupt:
+            logger.info("Stopped watching.")
+        finally:
+            self.watcher.close()
@@ -1,56 +1,56 @@
-import os
-from tree_sitter import Language, Parser
-import tree_sitter_python
-import tree_sitter_c_sharp
-import tree_sitter_typescript
-import tree_sitter_javascript
-
-# Initialize Tree-sitter languages
-PYTHON_LANGUAGE = None
-CSHARP_LANGUAGE = None
-TYPESCRIPT_LANGUAGE = None
-TSX_LANGUAGE = None
-JAVASCRIPT_LANGUAGE = None
+import importlib
+from tree_sitter import Language
+from .registry import register_language_loader, get_language, language_loaded
+
+# Version of the extractor output; bump it whenever the produced index changes
+# so that cached parse results are invalidated
+PARSER_VERSION = 5
+
+# Grammar package, language function and display name of every language. The packages
+# are only imported, and the grammars only built, when a file of their language is parsed
+GRAMMARS = {
+    'python': ('tree_sitter_python', 'language', 'Python'),
+    'c_sharp': ('tree_sitter_c_sharp', 'language', 'C#'),
+    'typescript': ('tree_sitter_typescript', 'language_typescript', 'TypeScript'),
+    'tsx': ('tree_sitter_typescript', 'language_tsx', 'TSX'),
+    'javascript': ('tree_sitter_javascript', 'language', 'JavaScript'),
+}
+
+# Former module globals, resolved on access by __getattr__
+_LANGUAGE_ATTRIBUTES = {
+    'PYTHON_LANGUAGE': 'python',
+    'CSHARP_LANGUAGE': 'c_sharp',
+    'TYPESCRIPT_LANGUAGE': 'typescript',
+    'TSX_LANGUAGE': 'tsx',
+    'JAVASCRIPT_LANGUAGE': 'javascript',
+}
+
+def _grammar_loader(name: str):
+    package, function, display_name = GRAMMARS[name]
+    def load() -> Language:
+        try:
+            return Language(getattr(importlib.import_module(package), function)())
+        except Exception as e:
+            raise RuntimeError(f"Failed to load {display_name} grammar: {e}")
+    return load
+
+for _name in GRAMMARS:
+    register_language_loader(_name, _grammar_loader(_name))
 
 def initialize_grammars():
-    """Initialize Tree-sitter language grammars"""
-    global PYTHON_LANGUAGE, CSHARP_LANGUAGE, TYPESCRIPT_LANGUAGE, TSX_LANGUAGE, JAVASCRIPT_LANGUAGE
-    
-    try:
-        PYTHON_LANGUAGE = Language(tree_sitter_python.language())
-    except Exception as e:
-        raise RuntimeError(f"Failed to load Python grammar: {e}")
-
-    try:
-        CSHARP_LANGUAGE = Language(tree_sitter_c_sharp.language())
-    except Exception as e:
-        raise RuntimeError(f"Failed to load C# grammar: {e}")
-
-    try:
-        TYPESCRIPT_LANGUAGE = Language(tree_sitter_typescript.language_typescript())
-    except Exception as e:
-        raise RuntimeError(f"Failed to load TypeScript grammar: {e}")
-
-    try:
-        TSX_LANGUAGE = Language(tree_sitter_typescript.language_tsx())
-    except Exception as e:
-        raise RuntimeError(f"Failed to load TSX grammar: {e}")
-    
-    try:
-        JAVASCRIPT_LANGUAGE = Language(tree_sitter_javascript.language())
-    except Exception as e:
-        raise RuntimeError(f"Failed to load JavaScript grammar: {e}")
+    """Load every Tree-sitter grammar now instead of on first use, e.g. to fail early"""
+    for name in GRAMMARS:
+        get_language(name)
 
 def grammars_loaded():
     """Check if grammars are loaded"""
-    return (PYTHON_LANGUAGE is not None and
-            CSHARP_LANGUAGE is not None and
-            TYPESCRIPT_LANGUAGE is not None and
-            TSX_LANGUAGE is not None and 
-            JAVASCRIPT_LANGUAGE is not None)
-
-# Initialize grammars when module is imported
-initialize_grammars()
+    return all(language_loaded(name) for name in GRAMMARS)
+
+def __getattr__(name: str):
+    language_name = _LANGUAGE_ATTRIBUTES.get(name)
+    if language_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return get_language(language_name)
 
 # Import parser functions
 from .parser import *
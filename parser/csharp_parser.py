@@ -1,42 +1,28 @@
 import os
-from tree_sitter import Parser, Query
-from . import CSHARP_LANGUAGE
-
-# Query definitions as class-level constants
-CLASS_QUERY_STR = """
-    (class_declaration
-        name: (identifier) @class_name
-        (base_list)? @bases
-        body: (declaration_list) @class_body) @class_def
-"""
-
-STRUCT_QUERY_STR = """
-    (struct_declaration
-        name: (identifier) @struct_name
-        (base_list)? @bases
-        body: (declaration_list) @struct_body) @struct_def
-"""
-
-INTERFACE_QUERY_STR = """
-    (interface_declaration
-        name: (identifier) @interface_name
-        (base_list)? @bases
-        body: (declaration_list) @interface_body) @interface_def
-"""
-
-ENUM_QUERY_STR = """
-    (enum_declaration
-        name: (identifier) @enum_name
-        body: (enum_member_declaration_list) @enum_body) @enum_def
-"""
-
-METHOD_QUERY_STR = """
-    (method_declaration
-        (type)? @return_type
-        name: (identifier) @method_name
-        (parameter_list) @params
-        body: (block)? @method_body) @method_def
-"""
+import sys
+import logging
+from .paths import in_directory
+from .registry import get_parser
+from .timing import timed
+from .limits import parse_source
+from .source import open_source, node_text, interned_text, node_range
+from .cursor_engine import walk_tree, SKIP_CHILDREN
+
+logger = logging.getLogger(__name__)
+
+# Member declarations whose bodies can't declare types, the walk doesn't descend into them
+MEMBER_NODE_TYPES = (
+    'constructor_declaration',
+    'destructor_declaration',
+    'operator_declaration',
+    'conversion_operator_declaration',
+    'property_declaration',
+    'indexer_declaration',
+    'field_declaration',
+    'event_declaration',
+    'event_field_declaration',
+    'delegate_declaration',
+)
 
 class C_Sharp_Result:
     def __init__(self):
@@ -44,8 +30,13 @@ class C_Sharp_Result:
         self.structs = []
         self.interfaces = []
         self.enums = []
+        # Source ranges parallel to each list of types, as [type range, [method ranges]]
+        self.class_ranges = []
+        self.struct_ranges = []
+        self.interface_ranges = []
+        self.enum_ranges = []
         
-    def __to_dict__(self):
+    def __to_dict__(self, ranges: bool = False):
         result = {}
         if self.classes:
             result['classes'] = self.classes
@@ -55,13 +46,22 @@ class C_Sharp_Result:
             result['interfaces'] = self.interfaces
         if self.enums:
             result['enums'] = self.enums
+        if ranges and result:
+            # One range per symbol, in the order indexer.symbols.iter_symbols yields them
+            symbol_ranges = []
+            for type_ranges in (self.class_ranges, self.struct_ranges, self.interface_ranges, self.enum_ranges):
+                for type_range, method_ranges in type_ranges:
+                    symbol_ranges.append(type_range)
+                    symbol_ranges.extend(method_ranges)
+            result['ranges'] = symbol_ranges
         return result
     
-def process_method_node(method_node):
+def process_method_node(method_node, source=None):
     """Process a method node and extract its information.
     
     Args:
         method_node: The tree-sitter node representing a method
+        source: Optional buffer the tree was parsed from, to slice the text out of
         
     Returns:
         dict: Method information including name, parameters, return type and modifiers
@@ -70,20 +70,21 @@ def process_method_node(method_node):
         return None
         
     method_info = {}
-    method_info['name'] = method_node.child_by_field_name('name').text.decode('utf8')
+    method_info['name'] = node_text(method_node.child_by_field_name('name'), source)
     
     raw_parameters = method_node.child_by_field_name('parameters')
-    parameters = ','.join([p.text.decode('utf8') for p in raw_parameters.children if p.type == 'parameter'])
+    parameters = ','.join([node_text(p, source) for p in raw_parameters.children if p.type == 'parameter'])
     if len(parameters) > 0:
         method_info['parameters'] = parameters
         
-    type = method_node.child_by_field_name('type')
+    # Older grammar versions name the return type field 'type'
+    type = method_node.child_by_field_name('returns') or method_node.child_by_field_name('type')
     if type:
-        method_info['return_type'] = type.text.decode('utf8')
+        method_info['return_type'] = interned_text(type, source)
         
-    modifiers_node = method_node.child_by_field_name('modifiers')
-    if modifiers_node:
-        method_info['modifiers'] = [m.text.decode('utf8') for m in modifiers_node.children]
+    modifiers = [interned_text(m, source) for m in method_node.children if m.type == 'modifier']
+    if modifiers:
+        method_info['modifiers'] = modifiers
     return method_info
 
 def _should_skip_file(file_path: str) -> bool:
@@ -96,127 +97,133 @@ def _should_skip_file(file_path: str) -> bool:
         bool: True if the file should be skipped, False otherwise
     """
     file_extension_supported = file_path.endswith(".cs") or file_path.endswith(".h")
-    return not file_extension_supported or 'node_modules' in file_path or 'dist' in file_path or 'build' in file_path
-
-def _read_and_validate_file(file_path: str) -> str:
-    """Read and validate a C# source file.
-    
-    Args:
-        file_path: Path to the C# file
-        
-    Returns:
-        str: The file content if valid, None otherwise
-    """
-    try:
-        if _should_skip_file(file_path):
-            return None
+    return not file_extension_supported or in_directory(file_path, ('node_modules', 'dist', 'build'))
 
-        with open(file_path, 'r', encoding='utf-8') as f:
-            source_code = f.read()
-            
-        return source_code if source_code else None
-            
-    except Exception as e:
-        print(f"Error reading file {file_path}: {str(e)}")
-        return None
-
-def _initialize_parser(source_code: str) -> tuple:
+def _initialize_parser(source) -> tuple:
     """Initialize the tree-sitter parser and parse the source code.
     
     Args:
-        source_code: The C# source code to parse
+        source: Buffer holding the UTF-8 encoded C# source code
         
     Returns:
         tuple: (Parser, Tree) objects
     """
-    parser = Parser(language=CSHARP_LANGUAGE)
-    tree = parser.parse(bytes(source_code, 'utf8'))
+    parser = get_parser('c_sharp')
+    with timed('parse'):
+        tree = parse_source(parser, source)
     return parser, tree
 
-def _process_class(struct_node, method_query, result):
-    """Process a class node and extract its information.
+def _process_type(type_node, namespace: str, parent_info: dict, source=None) -> dict:
+    """Process a class, struct, interface or enum node and extract its name and scope.
     
     Args:
-        class_node: The tree-sitter node representing a class
-        method_query: The method query object
-        result: The C_Sharp_Result object to populate
+        type_node: The tree-sitter node representing the type
+        namespace: The enclosing namespace, if any
+        parent_info: The information dict of the enclosing type, if the type is nested
+        source: Optional buffer the tree was parsed from, to slice the name out of
         
     Returns:
-        dict: Class information including name, bases and methods
+        dict: Type information including name, namespace and parent type
     """
-    class_info = {
-        'name': struct_node.child_by_field_name('name').text.decode('utf8')
+    type_info = {
+        'name': node_text(type_node.child_by_field_name('name'), source)
     }
-    
-    bases_node = struct_node.child_by_field_name('bases')
-    if bases_node:
-        bases = [b.text.decode('utf8') for b in bases_node.children if b.type != ':']
-        class_info['bases'] = "".join(bases)
-    
-    methods = []
-    body_node = struct_node.child_by_field_name('body')
-    for _, method_nodes_dict in method_query.matches(body_node):
-        method_node = method_nodes_dict['method_def'][0]
-        method_info = process_method_node(method_node)
-        methods.append(method_info)
-        
-    if methods:
-        class_info['methods'] = methods
-        
-    return class_info
-
-def _process_struct(struct_node, method_query, result):
-    """Process a struct node and extract its information.
-    
-    Args:
-        struct_node: The tree-sitter node representing a struct
-        method_query: The method query object
-        result: The C_Sharp_Result object to populate
-        
-    Returns:
-        dict: Struct information including name and methods
-    """
-    struct_info = {
-        'name': struct_node.child_by_field_name('name').text.decode('utf8')
-    }
-    
-    methods = []
-    body_node = struct_node.child_by_field_name('body')
-    for _, method_nodes_dict in method_query.matches(body_node):
-        method_node = method_nodes_dict['method_def'][0]
-        method_info = process_method_node(method_node)
-        methods.append(method_info)
-        
-    if methods:
-        struct_info['methods'] = methods
-        
-    return struct_info
+    if namespace:
+        type_info['namespace'] = namespace
+    if parent_info is not None:
+        type_info['parent'] = parent_info['name']
+    return type_info
+
+def _process_bases(class_node, source=None) -> str:
+    """Return the base types of a class as a comma separated string, or None."""
+    for child in class_node.children:
+        if child.type == 'base_list':
+            bases = [node_text(b, source) for b in child.children if b.type != ':']
+            return sys.intern("".join(bases))
+    return None
+
+def _enclosing_file_namespace(node, source=None) -> str:
+    """Return the file-scoped namespace declared before a top-level node, if any."""
+    top_level = node
+    while top_level.parent is not None and top_level.parent.parent is not None:
+        top_level = top_level.parent
+    if top_level.parent is None:
+        return None
+    sibling = top_level.prev_named_sibling
+    while sibling is not None:
+        if sibling.type == 'file_scoped_namespace_declaration':
+            return interned_text(sibling.child_by_field_name('name'), source)
+        sibling = sibling.prev_named_sibling
+    return None
 
-def _process_interface(interface_node):
-    """Process an interface node and extract its name.
+def extract_types_and_members_from_node_for_csharp(node, result: C_Sharp_Result = None, source=None) -> C_Sharp_Result:
+    """Extract types and members from a parsed C# syntax tree or subtree.
     
     Args:
-        interface_node: The tree-sitter node representing an interface
+        node: The tree-sitter node to search, usually the root node of the tree
+        result: Optional C_Sharp_Result object to append to
+        source: Optional buffer the tree was parsed from, to slice symbol text out of
         
     Returns:
-        dict: Interface information with name
+        C_Sharp_Result: Object containing all extracted types and members
     """
-    return {
-        'name': interface_node.child_by_field_name('name').text.decode('utf8')
+    if result is None:
+        result = C_Sharp_Result()
+    
+    # A file-scoped namespace applies to the declarations that follow it, not to its children
+    file_namespace = [_enclosing_file_namespace(node, source)]
+    
+    # Scopes are (namespace, type_info, collects_methods, method_ranges); None is the compilation unit
+    def on_namespace(namespace_node, scope):
+        name = node_text(namespace_node.child_by_field_name('name'), source)
+        namespace = scope[0] if scope else file_namespace[0]
+        return (sys.intern(f"{namespace}.{name}" if namespace else name), None, False, None)
+    
+    def on_file_namespace(namespace_node, scope):
+        file_namespace[0] = interned_text(namespace_node.child_by_field_name('name'), source)
+        return SKIP_CHILDREN
+    
+    def type_handler(result_list: list, ranges_list: list, collects_methods: bool, has_bases: bool):
+        def on_type(type_node, scope):
+            # Declarations without a body (e.g. records) are not indexed
+            if type_node.child_by_field_name('body') is None:
+                return SKIP_CHILDREN
+            namespace, parent_info = (scope[0], scope[1]) if scope else (file_namespace[0], None)
+            type_info = _process_type(type_node, namespace, parent_info, source)
+            if has_bases:
+                bases = _process_bases(type_node, source)
+                if bases:
+                    type_info['bases'] = bases
+            result_list.append(type_info)
+            method_ranges = []
+            ranges_list.append([node_range(type_node), method_ranges])
+            return (namespace, type_info, collects_methods, method_ranges)
+        return on_type
+    
+    def on_method(method_node, scope):
+        if scope and scope[2]:
+            scope[1].setdefault('methods', []).append(process_method_node(method_node, source))
+            scope[3].append(node_range(method_node))
+        return SKIP_CHILDREN
+    
+    def skip(member_node, scope):
+        return SKIP_CHILDREN
+    
+    handlers = {
+        'namespace_declaration': on_namespace,
+        'file_scoped_namespace_declaration': on_file_namespace,
+        'class_declaration': type_handler(result.classes, result.class_ranges, True, True),
+        'struct_declaration': type_handler(result.structs, result.struct_ranges, True, False),
+        'interface_declaration': type_handler(result.interfaces, result.interface_ranges, False, False),
+        'enum_declaration': type_handler(result.enums, result.enum_ranges, False, False),
+        'method_declaration': on_method,
     }
-
-def _process_enum(enum_node):
-    """Process an enum node and extract its name.
+    for member_type in MEMBER_NODE_TYPES:
+        handlers[member_type] = skip
     
-    Args:
-        enum_node: The tree-sitter node representing an enum
-        
-    Returns:
-        dict: Enum information with name
-    """
-    return {
-        'name': enum_node.child_by_field_name('name').text.decode('utf8')
-    }
+    # Single pass over the tree: methods belong to their own type, not to enclosing ones
+    walk_tree(node, handlers)
+    return result
 
 def extract_types_and_members_from_file_for_csharp(file_path: str) -> C_Sharp_Result:
     """Extract types and members from a C# source file.
@@ -228,47 +235,19 @@ def extract_types_and_members_from_file_for_csharp(file_path: str) -> C_Sharp_Re
         C_Sharp_Result: Object containing all extracted types and members
     """
     result = C_Sharp_Result()
-    
-    # Read and validate file
-    source_code = _read_and_validate_file(file_path)
-    if not source_code:
+    if _should_skip_file(file_path):
         return result
     
-    # Initialize parser and parse source code
-    parser, tree = _initialize_parser(source_code)
-    
-    # Create queries
-    class_query = CSHARP_LANGUAGE.query(CLASS_QUERY_STR).matches(tree.root_node)
-    struct_query = Query(CSHARP_LANGUAGE, STRUCT_QUERY_STR).matches(tree.root_node)
-    interface_query = Query(CSHARP_LANGUAGE, INTERFACE_QUERY_STR).matches(tree.root_node)
-    enum_query = Query(CSHARP_LANGUAGE, ENUM_QUERY_STR).matches(tree.root_node)
-    # this one doesn't match the root node directly, because the query is for methods inside classes/structs as well 
-    # as top-level methods
-    method_query = Query(CSHARP_LANGUAGE, METHOD_QUERY_STR)
-    
-    # Process classes
-    for _, class_nodes_dict in class_query:
-        class_node = class_nodes_dict['class_def'][0]
-        class_info = _process_class(class_node, method_query, result)
-        result.classes.append(class_info)
-    
-    # Process structs
-    for _, struct_node_dict in struct_query:
-        struct_node = struct_node_dict['struct_def'][0]
-        struct_info = _process_struct(struct_node, method_query, result)
-        result.structs.append(struct_info)
-    
-    # Process interfaces
-    for _, interface_node_dict in interface_query:
-        interface_node = interface_node_dict['interface_def'][0]
-        interface_info = _process_interface(interface_node)
-        result.interfaces.append(interface_info)
-    
-    # Process enums
-    for _, enum_node_dict in enum_query:
-        enum_node = enum_node_dict['enum_def'][0]
-        enum_info = _process_enum(enum_node)
-        result.enums.append(enum_info)
-    
-    return result
-
+    try:
+        with open_source(file_path) as source:
+            if not source:
+                return result
+            
+            # Initialize parser and parse source code
+            parser, tree = _initialize_parser(source)
+            
+            with timed('extract'):
+                return extract_types_and_members_from_node_for_csharp(tree.root_node, result, source)
+    except OSError as e:
+        logger.warning("Error reading file %s: %s", file_path, e)
+        return result
@@ -0,0 +1,44 @@
+# Returned by a handler to leave the children of the visited node unvisited
+SKIP_CHILDREN = object()
+
+def walk_tree(node, handlers: dict, scope=None):
+    """Visit every node below (and including) node exactly once, depth-first, using a TreeCursor.
+
+    Handlers are looked up by node type and called as handler(node, scope), where scope
+    is whatever the closest enclosing handler returned (initially the scope argument).
+    A handler returns the scope for the node's children, None to keep the current scope,
+    or SKIP_CHILDREN to not descend into the node at all, e.g. into method bodies.
+
+    Args:
+        node: The tree-sitter node to start from
+        handlers: Mapping of node types to handler callables
+        scope: The scope of the starting node
+    """
+    cursor = node.walk()
+    # Scopes of the ancestor levels, so they can be restored when moving back up
+    scopes = []
+    while True:
+        current = cursor.node
+        handler = handlers.get(current.type)
+        child_scope = scope
+        descend = True
+        if handler is not None:
+            outcome = handler(current, scope)
+            if outcome is SKIP_CHILDREN:
+                descend = False
+            elif outcome is not None:
+                child_scope = outcome
+
+        if descend and cursor.goto_first_child():
+            scopes.append(scope)
+            scope = child_scope
+            continue
+
+        # Move to the next sibling, climbing up until one exists
+        while True:
+            if not scopes:
+                return
+            if cursor.goto_next_sibling():
+                break
+            cursor.goto_parent()
+            scope = scopes.pop()
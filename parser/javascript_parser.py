@@ -1,7 +1,14 @@
 # parser/javascript_parser.py
 import os
-from tree_sitter import Parser, Query
-from . import JAVASCRIPT_LANGUAGE
+import logging
+from .paths import in_directory
+from .registry import get_parser
+from .timing import timed
+from .limits import parse_source
+from .source import open_source, node_text, node_range
+from .cursor_engine import walk_tree, SKIP_CHILDREN
+
+logger = logging.getLogger(__name__)
 
 class JavaScript_Result:
     """Holds extracted data from a JavaScript file."""
@@ -10,8 +17,11 @@ class JavaScript_Result:
         self.functions = []
         self.imports = []
         self.exports = []
+        # Source ranges parallel to classes, as [class range, [method ranges]], and to functions
+        self.class_ranges = []
+        self.function_ranges = []
 
-    def __to_dict__(self):
+    def __to_dict__(self, ranges: bool = False):
         """Converts the result object to a dictionary."""
         result = {}
         if self.classes:
@@ -22,93 +32,26 @@ class JavaScript_Result:
             result['imports'] = self.imports
         if self.exports:
             result['exports'] = self.exports
+        if ranges and (self.classes or self.functions):
+            # One range per symbol, in the order indexer.symbols.iter_symbols yields them
+            symbol_ranges = []
+            for class_range, method_ranges in self.class_ranges:
+                symbol_ranges.append(class_range)
+                symbol_ranges.extend(method_ranges)
+            symbol_ranges.extend(self.function_ranges)
+            result['ranges'] = symbol_ranges
         return result
 
-# Tree-sitter queries for JavaScript
-CLASS_QUERY_STR = """
-    (class_declaration
-        name: (identifier) @class.name
-        body: (class_body) @class.body)
-
-    (export_statement
-        declaration: (class_declaration
-            name: (identifier) @class.name
-            body: (class_body) @class.body))
-"""
-
-FUNCTION_QUERY_STR = """
-    (function_declaration
-        name: (identifier) @function.name
-        parameters: (formal_parameters) @function.parameters)
-
-    (export_statement
-        declaration: (function_declaration
-            name: (identifier) @function.name
-            parameters: (formal_parameters) @function.parameters))
-            
-    (method_definition
-        name: (property_identifier) @function.name
-        parameters: (formal_parameters) @function.parameters)
-        
-    (variable_declaration
-        (variable_declarator
-            name: (identifier) @function.name
-            value: (arrow_function
-                parameters: (formal_parameters) @function.parameters)))
-
-    (export_statement
-        declaration: (variable_declaration
-            (variable_declarator
-                name: (identifier) @function.name
-                value: (arrow_function
-                    parameters: (formal_parameters) @function.parameters))))
-"""
-
-IMPORT_QUERY_STR = """
-    (import_statement
-        (import_clause
-            (named_imports
-                (import_specifier
-                    name: (identifier) @import.name))?
-            (namespace_import (identifier) @import.namespace)?
-            (identifier)? @import.default)
-        source: (string) @import.source)
-
-    (import_statement
-        source: (string) @import.source)
-"""
-
-EXPORT_QUERY_STR = """
-    (export_statement
-        (variable_declaration
-            (variable_declarator
-                name: (identifier) @export.name)))
-                
-    (export_statement
-        (export_clause
-            (export_specifier
-                name: (identifier) @export.name)))
-                
-    (export_statement
-        declaration: (identifier) @export.default
-        "default")
-"""
-
 def _should_skip_file(file_path: str) -> bool:
     """Check if file should be skipped based on path patterns."""
     return (not file_path.endswith('.js') or
-            'node_modules' in file_path or
-            'dist' in file_path or
-            'build' in file_path)
+            in_directory(file_path, ('node_modules', 'dist', 'build')))
 
-def _get_node_text(node):
+def _get_node_text(node, source=None):
     """Safely decode node text."""
     if node is None:
         return ""
-    try:
-        return node.text.decode('utf8').strip()
-    except:
-        return ""
+    return node_text(node, source).strip()
 
 def extract_types_and_members_from_file_for_javascript(file_path: str, extract_imports: bool = False) -> JavaScript_Result:
     """Extract types and members from a JavaScript file.
@@ -125,148 +68,149 @@ def extract_types_and_members_from_file_for_javascript(file_path: str, extract_i
     if _should_skip_file(file_path):
         return result
     
-    # Read file content
+    logger.debug("Parsing JavaScript file: %s", file_path)
+    parser = get_parser('javascript')
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            source_code = f.read()
-    except Exception as e:
-        print(f"Error reading file {file_path}: {e}")
+        with open_source(file_path) as source:
+            with timed('parse'):
+                tree = parse_source(parser, source)
+            root_node = tree.root_node
+            
+            logger.debug("Root node type: %s, children: %d", root_node.type, root_node.child_count)
+            
+            with timed('extract'):
+                extract_types_and_members_from_node_for_javascript(root_node, extract_imports, result, source)
+    except OSError as e:
+        logger.warning("Error reading file %s: %s", file_path, e)
         return result
     
-    print(f"Parsing JavaScript file: {file_path}")
-    parser = Parser(language=JAVASCRIPT_LANGUAGE)
-    tree = parser.parse(bytes(source_code, 'utf8'))
-    root_node = tree.root_node
-    
-    print(f"Root node type: {root_node.type}, children: {len(root_node.children)}")
-    
-    # Process classes
-    class_query = Query(JAVASCRIPT_LANGUAGE, CLASS_QUERY_STR)
-    captures = class_query.captures(root_node)
+    logger.debug("Finished parsing %s: Found %d classes, %d functions", file_path, len(result.classes), len(result.functions))
+    return result
+
+def _function_signature(name_node, function_node, source=None) -> str:
+    """Build a name(parameters) signature for a function, method or arrow function."""
+    params_node = function_node.child_by_field_name("parameters")
+    if params_node is not None:
+        return f"{_get_node_text(name_node, source)}{_get_node_text(params_node, source)}"
+    # Arrow functions with a single unparenthesized parameter
+    return f"{_get_node_text(name_node, source)}({_get_node_text(function_node.child_by_field_name('parameter'), source)})"
+
+def _process_import(import_node, source=None) -> dict:
+    """Process an import statement into its source and imported names."""
+    names = []
+    for clause in import_node.named_children:
+        if clause.type != "import_clause":
+            continue
+        for child in clause.named_children:
+            if child.type == "identifier":
+                names.append(f"default as {_get_node_text(child, source)}")
+            elif child.type == "namespace_import":
+                names.append(f"* as {_get_node_text(child.named_children[0], source)}")
+            elif child.type == "named_imports":
+                for specifier in child.named_children:
+                    if specifier.type == "import_specifier":
+                        names.append(_get_node_text(specifier.child_by_field_name("name"), source))
+    return {
+        "source": _get_node_text(import_node.child_by_field_name("source"), source).strip('"\''),
+        "imported_items": names if names else ["*"]
+    }
+
+def _process_export(export_node, source=None) -> list:
+    """Process an export statement into the exported variable and specifier names."""
+    exports = []
+    declaration = export_node.child_by_field_name("declaration")
+    if declaration is not None and declaration.type in ("variable_declaration", "lexical_declaration"):
+        for declarator in declaration.named_children:
+            if declarator.type == "variable_declarator":
+                exports.append(_get_node_text(declarator.child_by_field_name("name"), source))
+    for child in export_node.named_children:
+        if child.type == "export_clause":
+            for specifier in child.named_children:
+                if specifier.type == "export_specifier":
+                    exports.append(_get_node_text(specifier.child_by_field_name("name"), source))
+    value = export_node.child_by_field_name("value")
+    if value is not None and value.type == "identifier":
+        exports.append(f"default: {_get_node_text(value, source)}")
+    return exports
+
+def extract_types_and_members_from_node_for_javascript(root_node, extract_imports: bool = False,
+                                                       result: JavaScript_Result = None,
+                                                       source=None) -> JavaScript_Result:
+    """Extract types and members from a parsed JavaScript syntax tree or subtree.
     
-    # Group captures by class node
-    grouped_classes = {}
-    for node, capture_name in captures:
-        parent = node.parent
-        while parent and not (parent.type == "class_declaration" or 
-                             (parent.type == "export_statement" and 
-                              parent.child_by_field_name("declaration") and 
-                              parent.child_by_field_name("declaration").type == "class_declaration")):
-            parent = parent.parent
+    Args:
+        root_node: The tree-sitter node to search, usually the root node of the tree
+        extract_imports: Whether to extract import and export statements
+        result: Optional JavaScript_Result object to append to
+        source: Optional buffer the tree was parsed from, to slice symbol text out of
         
-        if parent:
-            key = parent.id
-            if key not in grouped_classes:
-                grouped_classes[key] = {"parent": parent}
-            
-            if capture_name == "class.name":
-                grouped_classes[key]["name"] = node
+    Returns:
+        JavaScript_Result: Object containing all extracted types and members
+    """
+    if result is None:
+        result = JavaScript_Result()
     
-    # Process grouped classes
-    for key, class_data in grouped_classes.items():
-        if "name" in class_data:
-            name_node = class_data["name"]
-            class_info = {"name": _get_node_text(name_node)}
-            result.classes.append(class_info)
-            print(f"Found class: {class_info['name']}")
+    # Scopes are (class info dict, method ranges); None is module level
+    def on_class(class_node, scope):
+        class_info = {"name": _get_node_text(class_node.child_by_field_name("name"), source)}
+        result.classes.append(class_info)
+        method_ranges = []
+        result.class_ranges.append([node_range(class_node), method_ranges])
+        logger.debug("Found class: %s", class_info['name'])
+        return (class_info, method_ranges)
     
-    # Process functions
-    function_query = Query(JAVASCRIPT_LANGUAGE, FUNCTION_QUERY_STR)
-    captures = function_query.captures(root_node)
+    def on_method(method_node, scope):
+        if scope is not None:
+            scope[0].setdefault("methods", []).append(
+                _function_signature(method_node.child_by_field_name("name"), method_node, source))
+            scope[1].append(node_range(method_node))
+        return SKIP_CHILDREN
     
-    # Group captures by function node
-    grouped_functions = {}
-    for node, capture_name in captures:
-        # Find the function parent node
-        parent = node.parent
-        while parent and not (parent.type in ["function_declaration", "method_definition", "arrow_function"] or
-                             (parent.type == "export_statement" and 
-                              parent.child_by_field_name("declaration") and 
-                              parent.child_by_field_name("declaration").type == "function_declaration")):
-            parent = parent.parent
-            
-        if parent:
-            key = parent.id
-            if key not in grouped_functions:
-                grouped_functions[key] = {"parent": parent}
-            
-            if capture_name == "function.name":
-                grouped_functions[key]["name"] = node
-            elif capture_name == "function.parameters":
-                grouped_functions[key]["parameters"] = node
+    def on_function(function_node, scope):
+        if scope is None:
+            function_signature = _function_signature(function_node.child_by_field_name("name"), function_node, source)
+            result.functions.append(function_signature)
+            result.function_ranges.append(node_range(function_node))
+            logger.debug("Found function: %s", function_signature)
+        return SKIP_CHILDREN
     
-    # Process grouped functions
-    for key, function_data in grouped_functions.items():
-        if "name" in function_data:
-            name_node = function_data["name"]
-            params_node = function_data.get("parameters")
-            
-            function_signature = f"{_get_node_text(name_node)}({_get_node_text(params_node)})"
+    def on_variable(declarator_node, scope):
+        value = declarator_node.child_by_field_name("value")
+        if scope is None and value is not None and value.type in ("arrow_function", "function_expression", "function"):
+            function_signature = _function_signature(declarator_node.child_by_field_name("name"), value, source)
             result.functions.append(function_signature)
-            print(f"Found function: {function_signature}")
+            # The whole 'const name = ...' statement, unless it declares several variables
+            declaration = declarator_node.parent
+            if declaration is None or declaration.named_child_count != 1:
+                declaration = declarator_node
+            result.function_ranges.append(node_range(declaration))
+            logger.debug("Found function: %s", function_signature)
+        return SKIP_CHILDREN
     
-    # Process imports if requested
-    if extract_imports:
-        import_query = Query(JAVASCRIPT_LANGUAGE, IMPORT_QUERY_STR)
-        captures = import_query.captures(root_node)
-        
-        # Group captures by import statement
-        grouped_imports = {}
-        for node, capture_name in captures:
-            parent = node.parent
-            while parent and parent.type != "import_statement":
-                parent = parent.parent
-                
-            if parent:
-                key = parent.id
-                if key not in grouped_imports:
-                    grouped_imports[key] = {"source": None, "names": []}
-                
-                if capture_name == "import.source":
-                    grouped_imports[key]["source"] = _get_node_text(node).strip('"\'')
-                elif capture_name in ["import.name", "import.default", "import.namespace"]:
-                    name = _get_node_text(node)
-                    if name:
-                        prefix = ""
-                        if capture_name == "import.default":
-                            prefix = "default as "
-                        elif capture_name == "import.namespace":
-                            prefix = "* as "
-                        grouped_imports[key]["names"].append(f"{prefix}{name}")
-        
-        # Process grouped imports
-        for key, import_data in grouped_imports.items():
-            if import_data["source"]:
-                import_info = {
-                    "source": import_data["source"],
-                    "imported_items": import_data["names"] if import_data["names"] else ["*"]
-                }
-                result.imports.append(import_info)
-                print(f"Found import: {import_info['source']} - {import_info['imported_items']}")
+    def on_import(import_node, scope):
+        import_info = _process_import(import_node, source)
+        result.imports.append(import_info)
+        logger.debug("Found import: %s - %s", import_info['source'], import_info['imported_items'])
+        return SKIP_CHILDREN
     
-        # Process exports
-        export_query = Query(JAVASCRIPT_LANGUAGE, EXPORT_QUERY_STR)
-        captures = export_query.captures(root_node)
-        
-        # Group captures by export statement
-        grouped_exports = {}
-        for node, capture_name in captures:
-            parent = node.parent
-            while parent and parent.type != "export_statement":
-                parent = parent.parent
-                
-            if parent:
-                key = parent.id
-                if key not in grouped_exports:
-                    grouped_exports[key] = {}
-                
-                if capture_name in ["export.name", "export.default"]:
-                    name = _get_node_text(node)
-                    if name:
-                        prefix = "default: " if capture_name == "export.default" else ""
-                        export_info = f"{prefix}{name}"
-                        result.exports.append(export_info)
-                        print(f"Found export: {export_info}")
+    def on_export(export_node, scope):
+        for export_info in _process_export(export_node, source):
+            result.exports.append(export_info)
+            logger.debug("Found export: %s", export_info)
+        # The exported declarations are indexed by their own handlers
+        return None
+    
+    handlers = {
+        "class_declaration": on_class,
+        "method_definition": on_method,
+        "function_declaration": on_function,
+        "generator_function_declaration": on_function,
+        "variable_declarator": on_variable,
+    }
+    if extract_imports:
+        handlers["import_statement"] = on_import
+        handlers["export_statement"] = on_export
     
-    print(f"Finished parsing {file_path}: Found {len(result.classes)} classes, {len(result.functions)} functions")
-    return result
\ No newline at end of file
+    # Single pass over the tree, without descending into function bodies
+    walk_tree(root_node, handlers)
+    return result
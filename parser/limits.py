@@ -0,0 +1,142 @@
+import time
+import threading
+from contextlib import contextmanager
+
+# Defaults of the command line; the library applies no limits unless asked to
+DEFAULT_MAX_FILE_SIZE = 2 * 1024 * 1024
+DEFAULT_PARSE_TIMEOUT = 10.0
+
+# Minified detection looks at the start of a file: files whose first lines average more
+# than MINIFIED_LINE_LENGTH characters are bundles or generated data, not source code.
+# Only scripts get minified; a long line in C# or Python is data and the file is still indexed.
+MINIFIED_EXTENSIONS = ('.js', '.ts', '.tsx')
+MINIFIED_SAMPLE_SIZE = 64 * 1024
+MINIFIED_MIN_SIZE = 4 * 1024
+MINIFIED_LINE_LENGTH = 300
+
+# Generated code is recognized by its file name, matched ignoring case, or by a marker
+# comment within the first GENERATED_HEADER_SIZE bytes, without parsing the file
+GENERATED_SUFFIXES = ('.designer.cs', '.g.cs', '.g.i.cs', '.generated.cs', '.min.js', '.d.ts')
+GENERATED_MARKERS = (b'<auto-generated', b'@generated')
+GENERATED_HEADER_SIZE = 512
+
+# Start of the reason of files that took too long to parse
+TIMEOUT_REASON = "parsing took longer than"
+
+# Limits of the file being indexed, set per thread by apply_limits
+_local = threading.local()
+
+class SkippedFile(Exception):
+    """Raised while reading or parsing a file that exceeds the active limits."""
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+def generated_reason(file_path: str, header: bytes = b'') -> str:
+    """Return why a file looks generated, e.g. 'generated (*.designer.cs)', or None.
+
+    Args:
+        file_path: Path of the file, checked against GENERATED_SUFFIXES
+        header: Optional first bytes of the file, searched for GENERATED_MARKERS
+    """
+    lowered = file_path.lower()
+    for suffix in GENERATED_SUFFIXES:
+        if lowered.endswith(suffix):
+            return f"generated (*{suffix})"
+    for marker in GENERATED_MARKERS:
+        if marker in header:
+            return f"generated ({marker.decode('ascii')} marker)"
+    return None
+
+class ParseLimits:
+    """Limits that keep pathological files from stalling an indexing run.
+
+    Args:
+        max_file_size: Files larger than this many bytes are not read, 0 for no limit
+        parse_timeout: Seconds tree-sitter may spend parsing one file, 0 for no limit
+        skip_minified: Whether to skip files that look minified
+        skip_generated: Whether to skip files that look generated, see generated_reason
+    """
+    def __init__(self, max_file_size: int = DEFAULT_MAX_FILE_SIZE, parse_timeout: float = DEFAULT_PARSE_TIMEOUT,
+                 skip_minified: bool = True, skip_generated: bool = True):
+        self.max_file_size = max_file_size
+        self.parse_timeout = parse_timeout
+        self.skip_minified = skip_minified
+        self.skip_generated = skip_generated
+
+    def to_dict(self) -> dict:
+        return {'max_file_size': self.max_file_size, 'parse_timeout': self.parse_timeout,
+                'skip_minified': self.skip_minified, 'skip_generated': self.skip_generated}
+
+    def check_source(self, file_path: str, source):
+        """Apply every check that doesn't need parsing to a file already read into a buffer."""
+        self.check_generated(file_path, bytes(source[:GENERATED_HEADER_SIZE]))
+        self.check_size(len(source))
+        self.check_minified(file_path, source)
+
+    def check_generated(self, file_path: str, header: bytes = b''):
+        """Raise SkippedFile if the name or the first bytes of a file mark it as generated."""
+        if self.skip_generated:
+            reason = generated_reason(file_path, header)
+            if reason:
+                raise SkippedFile(reason)
+
+    def check_size(self, size: int):
+        """Raise SkippedFile if a file of size bytes is too large to be indexed."""
+        if self.max_file_size and size > self.max_file_size:
+            raise SkippedFile(f"larger than {self.max_file_size} bytes ({size} bytes)")
+
+    def check_minified(self, file_path: str, source):
+        """Raise SkippedFile if a JavaScript or TypeScript file read into a buffer looks minified."""
+        if not self.skip_minified or len(source) < MINIFIED_MIN_SIZE or \
+                not file_path.lower().endswith(MINIFIED_EXTENSIONS):
+            return
+        sample = bytes(source[:MINIFIED_SAMPLE_SIZE])
+        average = len(sample) / (sample.count(b'\n') + 1)
+        if average > MINIFIED_LINE_LENGTH:
+            raise SkippedFile(f"minified (lines average {average:.0f} characters)")
+
+def is_timeout_skip(reason: str) -> bool:
+    """Whether a skip reason comes from the parse timeout, which depends on the load of the machine."""
+    return reason.startswith(TIMEOUT_REASON)
+
+@contextmanager
+def apply_limits(limits: ParseLimits):
+    """Apply limits to every file read and parsed by the calling thread inside the block."""
+    previous = getattr(_local, 'limits', None)
+    _local.limits = limits
+    try:
+        yield limits
+    finally:
+        _local.limits = previous
+
+def active_limits() -> ParseLimits:
+    """Return the limits applied to the calling thread, or None."""
+    return getattr(_local, 'limits', None)
+
+def parse_source(parser, source, old_tree=None):
+    """Parse a buffer with a registry parser, within the timeout of the active limits.
+
+    Raises:
+        SkippedFile: If parsing took longer than the timeout
+    """
+    limits = active_limits()
+    arguments = (source,) if old_tree is None else (source, old_tree)
+    if limits is None or not limits.parse_timeout:
+        return parser.parse(*arguments)
+    parser.timeout_micros = int(limits.parse_timeout * 1_000_000)
+    start = time.perf_counter()
+    try:
+        # Depending on the binding version a timeout returns None or raises ValueError
+        tree = parser.parse(*arguments)
+    except ValueError:
+        if time.perf_counter() - start < limits.parse_timeout:
+            raise
+        tree = None
+    finally:
+        parser.timeout_micros = 0
+    if tree is None:
+        # The parser keeps the state of the cancelled parse to resume it, drop it
+        parser.reset()
+        raise SkippedFile(f"{TIMEOUT_REASON} {limits.parse_timeout:g}s")
+    return tree
@@ -1,4 +1,123 @@
-from parser.csharp_parser import extract_types_and_members_from_file_for_csharp
-from parser.python_parser import extract_types_and_members_from_file_for_python
-from .typescript_parser import extract_types_and_members_from_file_for_typescript
-from .javascript_parser import extract_types_and_members_from_file_for_javascript
\ No newline at end of file
+import os
+
+from . import csharp_parser, python_parser, typescript_parser, javascript_parser
+from parser.csharp_parser import extract_types_and_members_from_file_for_csharp, extract_types_and_members_from_node_for_csharp
+from parser.python_parser import extract_types_and_members_from_file_for_python, extract_types_and_members_from_node_for_python
+from .typescript_parser import extract_types_and_members_from_file_for_typescript, extract_types_and_members_from_node_for_typescript
+from .javascript_parser import extract_types_and_members_from_file_for_javascript, extract_types_and_members_from_node_for_javascript
+
+from .registry import get_language, get_parser
+from .limits import active_limits, parse_source
+from .timing import timed
+
+# File extensions handled by the language parsers
+SUPPORTED_EXTENSIONS = ('.cs', '.py', '.tsx', '.ts', '.js')
+
+# Registry name of the grammar used for each extension
+LANGUAGE_NAMES = {
+    '.cs': 'c_sharp',
+    '.py': 'python',
+    '.tsx': 'tsx',
+    '.ts': 'typescript',
+    '.js': 'javascript',
+}
+
+def is_supported_file(file_name: str) -> bool:
+    """Check if a file has an extension handled by one of the language parsers."""
+    return file_name.endswith(SUPPORTED_EXTENSIONS)
+
+def extract_types_and_members_from_file(file_path: str, extract_imports: bool = False):
+    """Extract types and members from a file using the parser matching its extension.
+
+    Args:
+        file_path: Path to the source file
+        extract_imports: Whether to extract import statements
+
+    Returns:
+        The language specific result object, or None if the file type is unsupported
+    """
+    file_name = os.path.basename(file_path)
+    if file_name.endswith('.cs'):
+        return extract_types_and_members_from_file_for_csharp(file_path)
+    if file_name.endswith('.py'):
+        return extract_types_and_members_from_file_for_python(file_path, extract_imports)
+    if file_name.endswith('.tsx') or file_name.endswith('.ts'):
+        return extract_types_and_members_from_file_for_typescript(file_path)
+    if file_name.endswith('.js'):
+        return extract_types_and_members_from_file_for_javascript(file_path, extract_imports)
+    return None
+
+def extract_types_and_members_from_source(file_path: str, source, extract_imports: bool = False):
+    """Extract types and members from the content of a file that was already read.
+
+    Produces the same result as extract_types_and_members_from_file, including the
+    active parse limits, without reading the file. Files that the parser matching the
+    extension would skip are not checked, see should_skip_file.
+
+    Args:
+        file_path: Path of the file, which selects the parser
+        source: Buffer holding the raw bytes of the file
+        extract_imports: Whether to extract import statements
+
+    Returns:
+        The language specific result object, or None if the file type is unsupported
+    """
+    language_name = get_language_name_for_file(os.path.basename(file_path))
+    if language_name is None:
+        return None
+    limits = active_limits()
+    if limits is not None:
+        limits.check_source(file_path, source)
+    parser = get_parser(language_name)
+    with timed('parse'):
+        tree = parse_source(parser, source)
+    with timed('extract'):
+        return extract_types_and_members_from_node(tree.root_node, file_path, extract_imports, source)
+
+def should_skip_file(file_path: str) -> bool:
+    """Check if the parser matching the file's extension would skip it."""
+    file_name = os.path.basename(file_path)
+    if file_name.endswith('.cs'):
+        return csharp_parser._should_skip_file(file_path)
+    if file_name.endswith('.py'):
+        return python_parser._should_skip_file(file_path)
+    if file_name.endswith('.tsx') or file_name.endswith('.ts'):
+        return typescript_parser._should_skip_file(file_path)
+    if file_name.endswith('.js'):
+        return javascript_parser._should_skip_file(file_path)
+    return True
+
+def get_language_name_for_file(file_name: str) -> str:
+    """Return the registry name of the grammar used to parse a file, or None if it is unsupported."""
+    return LANGUAGE_NAMES.get(os.path.splitext(file_name)[1])
+
+def get_language_for_file(file_name: str):
+    """Return the tree-sitter Language used to parse a file, or None if it is unsupported."""
+    language_name = get_language_name_for_file(file_name)
+    return get_language(language_name) if language_name else None
+
+def extract_types_and_members_from_node(node, file_name: str, extract_imports: bool = False, source=None):
+    """Extract types and members from a parsed syntax tree or subtree of a file.
+
+    Produces the same result as extract_types_and_members_from_file for the part of the
+    file covered by node, so results of sibling subtrees can be merged.
+
+    Args:
+        node: The tree-sitter node to search
+        file_name: Name or path of the file the tree was parsed from
+        extract_imports: Whether to extract import statements
+        source: Optional buffer the tree was parsed from, to slice symbol text out of
+
+    Returns:
+        The language specific result object, or None if the file type is unsupported
+    """
+    if file_name.endswith('.cs'):
+        return extract_types_and_members_from_node_for_csharp(node, source=source)
+    if file_name.endswith('.py'):
+        return extract_types_and_members_from_node_for_python(node, extract_imports, source=source)
+    if file_name.endswith('.tsx') or file_name.endswith('.ts'):
+        return extract_types_and_members_from_node_for_typescript(node, get_language_name_for_file(file_name),
+                                                                  source=source)
+    if file_name.endswith('.js'):
+        return extract_types_and_members_from_node_for_javascript(node, extract_imports, source=source)
+    return None
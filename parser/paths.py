@@ -0,0 +1,14 @@
+import os
+
+def in_directory(file_path: str, directory_names) -> bool:
+    """Check if any directory component of file_path is one of directory_names.
+
+    Unlike a substring test this doesn't match files such as 'rebuild_cache.py'
+    when looking for 'build' directories.
+    """
+    directories = file_path.replace('\\', '/').split('/')[:-1]
+    return any(directory in directory_names for directory in directories)
+
+def file_stem(file_path: str) -> str:
+    """Return the file name without directories and without its extension."""
+    return os.path.splitext(os.path.basename(file_path))[0]
@@ -1,14 +1,21 @@
 import os
-from tree_sitter import Parser, Query
-from . import PYTHON_LANGUAGE
+from .paths import in_directory, file_stem
+from .registry import get_parser
+from .timing import timed
+from .limits import parse_source
+from .source import open_source, node_text, interned_text, node_range
+from .cursor_engine import walk_tree, SKIP_CHILDREN
 
 class Python_Result:
     def __init__(self):
         self.py_classes = []
         self.py_functions = []
         self.py_imports = []
+        # Source ranges parallel to py_classes, as [class range, [method ranges]], and to py_functions
+        self.py_class_ranges = []
+        self.py_function_ranges = []
 
-    def __to_dict__(self):
+    def __to_dict__(self, ranges: bool = False):
         result = {}
         if self.py_classes:
             result['py_classes'] = self.py_classes
@@ -16,88 +23,117 @@ class Python_Result:
             result['py_functions'] = self.py_functions
         if self.py_imports:
             result['py_imports'] = self.py_imports
+        if ranges and (self.py_classes or self.py_functions):
+            # One range per symbol, in the order indexer.symbols.iter_symbols yields them
+            symbol_ranges = []
+            for class_range, method_ranges in self.py_class_ranges:
+                symbol_ranges.append(class_range)
+                symbol_ranges.extend(method_ranges)
+            symbol_ranges.extend(self.py_function_ranges)
+            result['ranges'] = symbol_ranges
         return result
 
-# Tree-sitter queries as class-level constants
-CLASS_QUERY = Query(PYTHON_LANGUAGE, """
-    (class_definition
-        name: (identifier) @class_name
-        body: (block) @class_body) @class_def
-""")
-
-FUNCTION_QUERY = Query(PYTHON_LANGUAGE, """
-    (function_definition
-        name: (identifier) @function_name
-        parameters: (parameters) @params
-        return_type: (type)? @return_type
-        body: (block) @function_body) @function_def
-""")
-
-IMPORT_QUERY = Query(PYTHON_LANGUAGE, """
-    (import_statement) @import
-    (import_from_statement) @import_from
-""")
-
 def _should_skip_file(file_path: str) -> bool:
     """Check if file should be skipped based on path patterns."""
+    stem = file_stem(file_path)
     return (not file_path.endswith('.py') or 
-            'venv' in file_path or 
-            '__pycache__' in file_path or
-            '_test.py' in file_path or 
-            'test_' in file_path or
-            'node_modules' in file_path)
-
-def _read_source_code(file_path: str) -> str:
-    """Read and return the contents of a Python source file."""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        return f.read()
+            in_directory(file_path, ('venv', '.venv', '__pycache__', 'node_modules')) or
+            stem.endswith('_test') or 
+            stem.startswith('test_'))
 
-def _process_class(class_node, class_nodes_dict) -> dict:
+def _process_class(class_node, source=None) -> dict:
     """Process a class node and return class information."""
     class_info = {
-        'name': class_node.child_by_field_name('name').text.decode('utf8')
+        'name': node_text(class_node.child_by_field_name('name'), source)
     }
     
     # Get base classes
-    bases_node = class_nodes_dict.get('bases', [None])[0]
-    if bases_node:
-        class_info['bases'] = [b.text.decode('utf8') for b in bases_node.children 
-                             if b.type != '(' and b.type != ')']
-    
-    # Get methods
-    methods = []
-    body_node = class_node.child_by_field_name('body')
-    for method_index, method_nodes_dict in FUNCTION_QUERY.matches(body_node):
-        method_node = method_nodes_dict['function_def'][0]
-        methods.append(_process_function(method_node))
-    
-    if methods:
-        class_info['methods'] = methods
+    superclasses_node = class_node.child_by_field_name('superclasses')
+    if superclasses_node:
+        bases = [interned_text(b, source) for b in superclasses_node.named_children]
+        if bases:
+            class_info['bases'] = bases
     
     return class_info
 
-def _process_function(function_node) -> str:
+def _definition_range(definition_node) -> list:
+    """Return the source range of a class or function definition, including its decorators."""
+    parent = definition_node.parent
+    if parent is not None and parent.type == 'decorated_definition':
+        return node_range(parent)
+    return node_range(definition_node)
+
+def _process_function(function_node, source=None) -> str:
     """Process a function node and return its signature."""
-    func_name = function_node.child_by_field_name('name').text.decode('utf8')
-    params = function_node.child_by_field_name('parameters').text.decode('utf8')
+    func_name = node_text(function_node.child_by_field_name('name'), source)
+    params = node_text(function_node.child_by_field_name('parameters'), source)
     return_type = function_node.child_by_field_name('return_type')
-    return_type_str = f" -> {return_type.text.decode('utf8')}" if return_type else " -> None"
+    return_type_str = f" -> {node_text(return_type, source)}" if return_type else " -> None"
     
     # Get decorators
     decorators = []
     if function_node.prev_named_sibling and function_node.prev_named_sibling.type == 'decorator':
         decorator_node = function_node.prev_named_sibling
         while decorator_node and decorator_node.type == 'decorator':
-            decorators.append(decorator_node.text.decode('utf8'))
+            decorators.append(node_text(decorator_node, source))
             decorator_node = decorator_node.prev_named_sibling
     
     return f"{' '.join(reversed(decorators))} {func_name}{params}{return_type_str}".strip()
 
-def _process_imports(tree_root_node, result: Python_Result) -> None:
-    """Process import statements and add them to the result."""
-    for index, import_nodes_dict in IMPORT_QUERY.matches(tree_root_node):
-        import_node = list(import_nodes_dict.values())[0][0]
-        result.py_imports.append(import_node.text.decode('utf8'))
+def extract_types_and_members_from_node_for_python(node, extract_imports: bool = False,
+                                                   result: Python_Result = None, source=None) -> Python_Result:
+    """
+    Extract Python class, function, and import information from a parsed syntax tree or subtree.
+    
+    Args:
+        node: The tree-sitter node to search, usually the root node of the tree
+        extract_imports: Whether to extract import statements (default: False)
+        result: Optional Python_Result object to append to
+        source: Optional buffer the tree was parsed from, to slice symbol text out of
+    
+    Returns:
+        Python_Result object containing extracted information
+    """
+    if result is None:
+        result = Python_Result()
+    
+    # Scopes are ('class', class_info, method_ranges) or ('function', None, None); None is module level
+    def on_class(class_node, scope):
+        if scope is not None and scope[0] == 'function':
+            return SKIP_CHILDREN
+        class_info = _process_class(class_node, source)
+        if scope is not None:
+            class_info['parent'] = scope[1]['name']
+        result.py_classes.append(class_info)
+        method_ranges = []
+        result.py_class_ranges.append([_definition_range(class_node), method_ranges])
+        return ('class', class_info, method_ranges)
+    
+    def on_function(function_node, scope):
+        if scope is None:
+            result.py_functions.append(_process_function(function_node, source))
+            result.py_function_ranges.append(_definition_range(function_node))
+        elif scope[0] == 'class':
+            scope[1].setdefault('methods', []).append(_process_function(function_node, source))
+            scope[2].append(_definition_range(function_node))
+        # Function bodies only matter for the imports they contain
+        return ('function', None, None) if extract_imports else SKIP_CHILDREN
+    
+    def on_import(import_node, scope):
+        result.py_imports.append(node_text(import_node, source))
+        return SKIP_CHILDREN
+    
+    handlers = {
+        'class_definition': on_class,
+        'function_definition': on_function,
+    }
+    if extract_imports:
+        handlers['import_statement'] = on_import
+        handlers['import_from_statement'] = on_import
+    
+    # Single pass over the tree: methods are attributed to their own class only
+    walk_tree(node, handlers)
+    return result
 
 def extract_types_and_members_from_file_for_python(file_path: str, extract_imports: bool = False) -> Python_Result:
     """
@@ -115,26 +151,9 @@ def extract_types_and_members_from_file_for_python(file_path: str, extract_impor
     if _should_skip_file(file_path):
         return result
     
-    source_code = _read_source_code(file_path)
-    parser = Parser(language=PYTHON_LANGUAGE)
-    tree = parser.parse(bytes(source_code, 'utf8'))
-    
-    # Process classes
-    for index, class_nodes_dict in CLASS_QUERY.matches(tree.root_node):
-        class_node = class_nodes_dict['class_def'][0]
-        result.py_classes.append(_process_class(class_node, class_nodes_dict))
-    
-    # Process top-level functions
-    for index, function_nodes_dict in FUNCTION_QUERY.matches(tree.root_node):
-        function_node = function_nodes_dict['function_def'][0]
-        if (function_node.parent and 
-            function_node.parent.type == 'class_definition'):
-            continue
-            
-        result.py_functions.append(_process_function(function_node))
-    
-    # Process imports if requested
-    if extract_imports:
-        _process_imports(tree.root_node, result)
-    
-    return result
\ No newline at end of file
+    parser = get_parser('python')
+    with open_source(file_path) as source:
+        with timed('parse'):
+            tree = parse_source(parser, source)
+        with timed('extract'):
+            return extract_types_and_members_from_node_for_python(tree.root_node, extract_imports, result, source)
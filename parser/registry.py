@@ -0,0 +1,67 @@
+import threading
+from tree_sitter import Language, Parser, Query
+
+# Loaded grammars, grammar loaders and query sources, shared by all threads of the process
+_languages = {}
+_language_loaders = {}
+_query_sources = {}
+_load_lock = threading.Lock()
+# Parsers and compiled queries are not thread-safe, every thread gets its own
+_local = threading.local()
+
+def register_language_loader(name: str, loader):
+    """Register a callable returning the grammar of a language; it is called on first use."""
+    _language_loaders[name] = loader
+
+def language_loaded(name: str) -> bool:
+    """Check if the grammar of a language has been loaded."""
+    return name in _languages
+
+def register_queries(name: str, queries: dict):
+    """Register query sources for a language; they are compiled on first use.
+
+    Args:
+        name: The language name
+        queries: Mapping of query names to query source strings
+    """
+    _query_sources.setdefault(name, {}).update(queries)
+
+def get_language(name: str) -> Language:
+    """Return the grammar registered under a language name, loading it on first use."""
+    language = _languages.get(name)
+    if language is not None:
+        return language
+    loader = _language_loaders.get(name)
+    if loader is None:
+        raise ValueError(f"Tree-sitter language '{name}' is not registered")
+    with _load_lock:
+        if name not in _languages:
+            _languages[name] = loader()
+    return _languages[name]
+
+def _thread_state() -> tuple:
+    state = getattr(_local, 'state', None)
+    if state is None:
+        state = _local.state = ({}, {})
+    return state
+
+def get_parser(name: str) -> Parser:
+    """Return the parser for a language, created once per thread and reused for every file."""
+    parsers, _ = _thread_state()
+    parser = parsers.get(name)
+    if parser is None:
+        parser = parsers[name] = Parser(language=get_language(name))
+    return parser
+
+def get_query(name: str, query_name: str) -> Query:
+    """Return a compiled query for a language, compiled once per thread and reused for every file."""
+    _, queries = _thread_state()
+    key = (name, query_name)
+    query = queries.get(key)
+    if query is None:
+        try:
+            source = _query_sources[name][query_name]
+        except KeyError:
+            raise ValueError(f"Query '{query_name}' is not registered for language '{name}'")
+        query = queries[key] = Query(get_language(name), source)
+    return query
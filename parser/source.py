@@ -0,0 +1,99 @@
+import os
+import sys
+import mmap
+from contextlib import contextmanager
+from .timing import timed
+from .limits import GENERATED_HEADER_SIZE, active_limits
+
+# Files at least this large are memory-mapped instead of read into memory
+MMAP_THRESHOLD = 1024 * 1024
+
+@contextmanager
+def open_source(file_path: str):
+    """Open a source file as a read-only buffer of its raw bytes, memory-mapped if it is large.
+
+    The parsers parse the buffer as is and slice symbol text out of it by byte offsets,
+    so the file is neither decoded as a whole nor copied to be encoded again.
+
+    Args:
+        file_path: Path to the source file
+
+    Yields:
+        memoryview: The contents of the file, only valid inside the block
+
+    Raises:
+        SkippedFile: If the file is generated, too large or minified under the active limits
+    """
+    limits = active_limits()
+    if limits is not None:
+        limits.check_generated(file_path)
+    mapped = None
+    with timed('read'), open(file_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if limits is not None:
+            if limits.skip_generated:
+                # Only the header is read to look for generated code markers
+                limits.check_generated(file_path, f.read(GENERATED_HEADER_SIZE))
+                f.seek(0)
+            limits.check_size(size)
+        if size >= MMAP_THRESHOLD:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            source = memoryview(mapped)
+        else:
+            source = memoryview(f.read())
+    try:
+        if limits is not None:
+            limits.check_minified(file_path, source)
+        yield source
+    finally:
+        source.release()
+        if mapped is not None:
+            mapped.close()
+
+def node_text(node, source=None) -> str:
+    """Return the text of a node, decoded from its byte range of the source buffer.
+
+    Invalid UTF-8 is replaced instead of failing the file, and line endings are
+    normalized to '\\n' so Windows checkouts produce the same index.
+
+    Args:
+        node: The tree-sitter node
+        source: The buffer the tree was parsed from; node.text is used if it is None
+    """
+    if source is None:
+        text = node.text.decode('utf8', 'replace')
+    else:
+        text = str(source[node.start_byte:node.end_byte], 'utf8', 'replace')
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+def interned_text(node, source=None) -> str:
+    """Return node_text interned, for strings repeated across symbols like modifiers and types.
+
+    Interned strings are kept once in memory and pickled once per result of a worker process.
+    """
+    return sys.intern(node_text(node, source))
+
+def node_range(node) -> list:
+    """Return the [start_line, end_line, start_byte, end_byte] range of a node.
+
+    Lines are 1-based and inclusive, byte offsets index the raw file and end_byte is exclusive.
+    """
+    return [node.start_point[0] + 1, node.end_point[0] + 1, node.start_byte, node.end_byte]
+
+def shift_ranges(ranges: list, line_delta: int, byte_delta: int) -> list:
+    """Return a copy of a result's range list with every range moved by the given deltas.
+
+    Items are ranges as returned by node_range, or [range, [ranges of its members]] pairs.
+    """
+    shifted = []
+    for item in ranges:
+        if isinstance(item[0], int):
+            start_line, end_line, start_byte, end_byte = item
+            shifted.append([start_line + line_delta, end_line + line_delta,
+                            start_byte + byte_delta, end_byte + byte_delta])
+        else:
+            shifted.append([shift_ranges([item[0]], line_delta, byte_delta)[0],
+                            shift_ranges(item[1], line_delta, byte_delta)])
+    return shifted
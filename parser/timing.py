@@ -0,0 +1,36 @@
+import time
+import threading
+from contextlib import contextmanager
+
+# Phase timings of the file being indexed, collected per thread while collect_timings is active
+_local = threading.local()
+
+@contextmanager
+def collect_timings():
+    """Collect the time spent in every timed phase of the calling thread.
+
+    Yields:
+        dict: Phase name -> seconds, filled in as the timed phases complete
+    """
+    previous = getattr(_local, 'timings', None)
+    timings = _local.timings = {}
+    try:
+        yield timings
+    finally:
+        _local.timings = previous
+
+@contextmanager
+def timed(phase: str):
+    """Add the time spent in the block to a phase, e.g. 'read', 'parse' or 'extract'.
+
+    Does nothing unless timings are being collected.
+    """
+    timings = getattr(_local, 'timings', None)
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[phase] = timings.get(phase, 0.0) + time.perf_counter() - start
@@ -1,8 +1,15 @@
 import os
+import logging
 import tree_sitter
-from . import TYPESCRIPT_LANGUAGE, TSX_LANGUAGE
+from .paths import in_directory, file_stem
+from .registry import register_queries, get_parser, get_query
+from .timing import timed
+from .limits import parse_source
+from .source import open_source, node_text, node_range
 from typing import List, Dict, Any, Optional
 
+logger = logging.getLogger(__name__)
+
 class TypeScript_Result:
     """Holds extracted data from a TypeScript/TSX file."""
     def __init__(self):
@@ -11,10 +18,14 @@ class TypeScript_Result:
         self.functions: List[Dict[str, Any]] = []
         self.enums: List[Dict[str, Any]] = []
         self.imports: List[Dict[str, Any]] = []
+        # Source ranges of the declarations, parallel to their lists
+        self.class_ranges: List[List[int]] = []
+        self.interface_ranges: List[List[int]] = []
+        self.function_ranges: List[List[int]] = []
+        self.enum_ranges: List[List[int]] = []
 
-    def __to_dict__(self):
+    def __to_dict__(self, ranges: bool = False):
         """Converts the result object to a dictionary."""
-        # remove the start and end lines
         result_json = {}
         if self.classes:
             result_json['classes'] = self.classes
@@ -26,6 +37,9 @@ class TypeScript_Result:
             result_json['enums'] = self.enums
         if self.imports:
             result_json['imports'] = self.imports
+        if ranges and (self.classes or self.interfaces or self.functions or self.enums):
+            # One range per symbol, in the order indexer.symbols.iter_symbols yields them
+            result_json['ranges'] = self.class_ranges + self.interface_ranges + self.enum_ranges + self.function_ranges
         return result_json
 
 # Tree-sitter queries for TypeScript/TSX
@@ -117,99 +131,111 @@ QUERIES = {
     """
 }
 
+# The capture identifying a single extracted item of each query
+PRIMARY_CAPTURES = {
+    "imports": "import.source",
+    "classes": "class.name",
+    "interfaces": "interface.name",
+    "functions": "function.name",
+    "enums": "enum.name",
+}
+
+# Compiled once per thread by the registry and shared by every file
+register_queries('typescript', QUERIES)
+register_queries('tsx', QUERIES)
+
 def _should_skip_file(file_path: str) -> bool:
     """Check if file should be skipped based on path patterns."""
+    stem = file_stem(file_path)
     return (not file_path.endswith('.ts') and not file_path.endswith('.tsx') or
-            'node_modules' in file_path or
-            '__tests__' in file_path or
-            'test_' in file_path or
-            'test.tsx' in file_path or
-            'test.ts' in file_path)
+            in_directory(file_path, ('node_modules', '__tests__')) or
+            stem.startswith('test_') or
+            stem == 'test' or
+            stem.endswith('.test'))
 
-def _get_node_text(node: tree_sitter.Node) -> str:
+def _get_node_text(node: tree_sitter.Node, source=None) -> str:
     """Safely decode node text."""
-    return node.text.decode('utf8').replace("\n","").replace(" ","") if node else ""
-
-def _process_import(capture: Dict[str, tree_sitter.Node]) -> Dict[str, Any]:
-    """Processes an import capture."""
-    source = _get_node_text(capture.get("import.source")).strip('"\'')
-    imported_items = []
-    if "import.name" in capture:
-        imported_items.append(_get_node_text(capture["import.name"]))
-    if "import.namespace" in capture:
-        imported_items.append(f"* as {_get_node_text(capture['import.namespace'])}")
-    if "import.default" in capture:
-         # Check if it's a default import name or part of named imports
-        default_node = capture["import.default"]
-        # Simple heuristic: if parent is import_clause and it's the first named child, it's likely the default import
-        if default_node.parent and default_node.parent.type == 'import_clause' and default_node.prev_sibling is None:
-             imported_items.append(f"default as {_get_node_text(default_node)}")
-        elif default_node.type == 'identifier' and 'import.name' not in capture and 'import.namespace' not in capture:
-             # Handles cases like 'import defaultExport from "module-name";'
-             imported_items.append(f"default as {_get_node_text(default_node)}")
+    return node_text(node, source).replace("\n","").replace(" ","") if node else ""
+
+def _first(capture: Dict[str, List[tree_sitter.Node]], capture_name: str) -> Optional[tree_sitter.Node]:
+    """Return the first node captured under a name, or None."""
+    nodes = capture.get(capture_name)
+    return nodes[0] if nodes else None
 
+def _process_import(capture: Dict[str, List[tree_sitter.Node]], source=None) -> Dict[str, Any]:
+    """Processes the captures of one import statement."""
+    source_node = _first(capture, "import.source")
+    imported_items = [_get_node_text(node, source) for node in capture.get("import.name", [])]
+    imported_items.extend(f"* as {_get_node_text(node, source)}" for node in capture.get("import.namespace", []))
+    # Only the default binding of an import clause is a bare identifier
+    imported_items.extend(f"default as {_get_node_text(node, source)}" for node in capture.get("import.default", []))
 
     return {
-        "source": source,
-        "imported_items": imported_items if imported_items else ["*"], # For side-effect imports or if logic fails
-        "start_line": capture.get("import.source", list(capture.values())[0]).start_point[0] + 1,
-        "end_line": capture.get("import.source", list(capture.values())[0]).end_point[0] + 1,
+        "source": _get_node_text(source_node, source).strip('"\''),
+        "imported_items": imported_items if imported_items else ["*"], # For side-effect imports
     }
 
 
-def _process_class(capture: Dict[str, tree_sitter.Node]) -> Dict[str, Any]:
+def _process_class(capture: Dict[str, List[tree_sitter.Node]], source=None) -> Dict[str, Any]:
     """Processes a class capture."""
-    name_node = capture.get("class.name")
-    body_node = capture.get("class.body")
-    return {
-        "name": _get_node_text(name_node),
-        "start_line": name_node.start_point[0] + 1 if name_node else 0,
-        "end_line": body_node.end_point[0] + 1 if body_node else 0,
-    }
+    return {"name": _get_node_text(_first(capture, "class.name"), source)}
 
-def _process_interface(capture: Dict[str, tree_sitter.Node]) -> Dict[str, Any]:
+def _process_interface(capture: Dict[str, List[tree_sitter.Node]], source=None) -> Dict[str, Any]:
     """Processes an interface capture."""
-    name_node = capture.get("interface.name")
-    body_node = capture.get("interface.body")
-    return {
-        "name": _get_node_text(name_node),
-        "start_line": name_node.start_point[0] + 1 if name_node else 0,
-        "end_line": body_node.end_point[0] + 1 if body_node else 0,
-    }
+    return {"name": _get_node_text(_first(capture, "interface.name"), source)}
 
-def _process_function(capture: Dict[str, tree_sitter.Node]) -> Dict[str, Any] | None:
+def _process_function(capture: Dict[str, List[tree_sitter.Node]], source=None) -> Dict[str, Any] | None:
     """Processes a function or method capture."""
-    name_node = capture.get("function.name")
+    name_node = _first(capture, "function.name")
     if not name_node:
         return None
-    params_node = capture.get("function.parameters")
-    body_node = capture.get("function.body")
-    return_type_node = capture.get("function.return_type")
+    params_node = _first(capture, "function.parameters")
+    return_type_node = _first(capture, "function.return_type")
 
-    # Determine start and end lines carefully
-    start_node = name_node if name_node else list(capture.values())[0] # Fallback to first node
-    end_node = body_node if body_node else start_node # Fallback to start node if no body
-
-    name = _get_node_text(name_node)
-    parameters = _get_node_text(params_node)
-    return_type = _get_node_text(return_type_node.child(1)) if return_type_node and return_type_node.child_count > 1 else _get_node_text(return_type_node) # Attempt to get type after ':'
+    name = _get_node_text(name_node, source)
+    parameters = _get_node_text(params_node, source)
+    return_type = _get_node_text(return_type_node.child(1), source) if return_type_node and return_type_node.child_count > 1 else _get_node_text(return_type_node, source) # Attempt to get type after ':'
 
     function_signature = f"{name}{parameters}" + (f": {return_type}" if return_type else "")
-    return {
-        "function_signature":function_signature,
-        "start_line": start_node.start_point[0] + 1,
-        "end_line": end_node.end_point[0] + 1,
-    }
+    return {"function_signature": function_signature}
 
-def _process_enum(capture: Dict[str, tree_sitter.Node]) -> Dict[str, Any]:
+def _process_enum(capture: Dict[str, List[tree_sitter.Node]], source=None) -> Dict[str, Any]:
     """Processes an enum capture."""
-    name_node = capture.get("enum.name")
-    body_node = capture.get("enum.body")
-    return {
-        "name": _get_node_text(name_node),
-        "start_line": name_node.start_point[0] + 1 if name_node else 0,
-        "end_line": body_node.end_point[0] + 1 if body_node else 0,
-    }
+    return {"name": _get_node_text(_first(capture, "enum.name"), source)}
+
+def _group_matches(query: tree_sitter.Query, root_node: tree_sitter.Node,
+                   primary_capture: str) -> List[Dict[str, List[tree_sitter.Node]]]:
+    """Group the matches of a query by the node that identifies the extracted item.
+
+    The exported and the plain pattern of a declaration match the same name node, and an
+    import statement matches once per imported name, so their captures are merged into a
+    single group keyed by the node id. Captured nodes are deduplicated the same way.
+
+    Args:
+        query: The compiled query
+        root_node: The node to run the query on
+        primary_capture: The capture name identifying an item, e.g. "class.name"
+
+    Returns:
+        list: One mapping of capture names to nodes per item, in source order
+    """
+    groups = {}
+    for _, captures in query.matches(root_node):
+        primary_nodes = captures.get(primary_capture)
+        if not primary_nodes:
+            continue
+        primary_node = primary_nodes[0]
+        group = groups.get(primary_node.id)
+        if group is None:
+            group = groups[primary_node.id] = (primary_node, {})
+        for capture_name, nodes in captures.items():
+            captured = group[1].setdefault(capture_name, {})
+            for node in nodes:
+                captured.setdefault(node.id, node)
+
+    ordered = sorted(groups.values(), key=lambda group: group[0].start_byte)
+    return [{capture_name: list(nodes.values()) for capture_name, nodes in captured.items()}
+            for _, captured in ordered]
 
 
 def extract_types_and_members_from_file_for_typescript(file_path: str, extract_imports: bool = False) -> TypeScript_Result:
@@ -226,90 +252,60 @@ def extract_types_and_members_from_file_for_typescript(file_path: str, extract_i
     result = TypeScript_Result()
     file_extension = os.path.splitext(file_path)[1].lower()
     
-    print(f"Parsing file: {file_path} with extension {file_extension}")
+    logger.debug("Parsing file: %s with extension %s", file_path, file_extension)
 
     if _should_skip_file(file_path):
         return result
 
-    language = TSX_LANGUAGE if file_extension == ".tsx" else TYPESCRIPT_LANGUAGE
-    if not language:
-        print(f"Tree-sitter language for {file_extension} not available.")
-        return result # Should not happen if __init__ is correct
+    language_name = "tsx" if file_extension == ".tsx" else "typescript"
+    parser = get_parser(language_name)
 
-    parser = tree_sitter.Parser(language=language)
+    with open_source(file_path) as source:
+        with timed('parse'):
+            tree = parse_source(parser, source)
+        with timed('extract'):
+            return extract_types_and_members_from_node_for_typescript(tree.root_node, language_name, extract_imports,
+                                                                      result, source)
 
-    with open(file_path, "rb") as file:
-        source_code = file.read()
 
-    tree = parser.parse(source_code)
-    root_node = tree.root_node
+def extract_types_and_members_from_node_for_typescript(root_node: tree_sitter.Node,
+                                                       language_name: str = "typescript",
+                                                       extract_imports: bool = False,
+                                                       result: TypeScript_Result = None,
+                                                       source=None) -> TypeScript_Result:
+    """
+    Extracts structural information from a parsed TypeScript or TSX syntax tree or subtree.
+
+    Args:
+        root_node: The tree-sitter node to search, usually the root node of the tree.
+        language_name: The registry name of the grammar the tree was parsed with ("typescript" or "tsx").
+        extract_imports: Whether to extract import statements.
+        result: Optional TypeScript_Result object to append to.
+        source: Optional buffer the tree was parsed from, to slice symbol text out of.
+
+    Returns:
+        A TypeScript_Result object containing the extracted data.
+    """
+    if result is None:
+        result = TypeScript_Result()
 
     processing_map = {
-        "classes": (_process_class, result.classes),
-        "interfaces": (_process_interface, result.interfaces),
-        "functions": (_process_function, result.functions),
-        "enums": (_process_enum, result.enums),
+        "classes": (_process_class, result.classes, result.class_ranges),
+        "interfaces": (_process_interface, result.interfaces, result.interface_ranges),
+        "functions": (_process_function, result.functions, result.function_ranges),
+        "enums": (_process_enum, result.enums, result.enum_ranges),
     }
     if extract_imports:
-        processing_map["imports"] = (_process_import, result.imports)
-
-
-    for query_name, (process_func, result_list) in processing_map.items():
-        query_string = QUERIES.get(query_name)
-        if not query_string:
-            continue
+        processing_map["imports"] = (_process_import, result.imports, None)
 
-        query = language.query(query_string)
-        captures: dict[str, list[tree_sitter.Node]] = query.captures(root_node)
-
-        # Process captures, grouping by the start line of the primary node
-        processed_captures = {}
-        capture_items = captures.items()
-        for capture_name, node_list in capture_items:
-            # Use the start line of the node that defines the item (e.g., class name, function name)
-            # Heuristic: Use the first node in the capture group if specific name isn't found
-            for node in node_list:
-                primary_node_key = f"{query_name}.name" if f"{query_name}.name" in QUERIES[query_name] else capture_name.split('.')[0] + '.' + capture_name.split('.')[1] # e.g. import.source
-                start_line = node.start_point[0]
-
-                # Find the most relevant node for the start line key
-                relevant_node_for_key = node
-                temp_captures = []
-                for cn, n_list in capture_items:
-                    # Check if the node is on the same line as the primary node
-                    for n in n_list:
-                        if n.start_point[0] == start_line:
-                            temp_captures.append((n, cn))
-
-                for n_temp, cn_temp in temp_captures:
-                    if cn_temp == primary_node_key:
-                        relevant_node_for_key = n_temp
-                        break
-                    # Fallback for imports where 'source' is key
-                    if query_name == "imports" and cn_temp == "import.source":
-                         relevant_node_for_key = n_temp
-                         # Don't break, maybe find a name later
-
-                key = relevant_node_for_key.start_point[0] # Group by the start line of the defining node
-
-                if key not in processed_captures:
-                    processed_captures[key] = {}
-                processed_captures[key][capture_name] = node
-
-        # Apply processing function to grouped captures
-        for key in sorted(processed_captures.keys()):
-            processed_item = process_func(processed_captures[key])
+    for query_name, (process_func, result_list, ranges_list) in processing_map.items():
+        query = get_query(language_name, query_name)
+        primary_capture = PRIMARY_CAPTURES[query_name]
+        for capture in _group_matches(query, root_node, primary_capture):
+            processed_item = process_func(capture, source)
             if processed_item: # Ensure item was processed correctly
-                 # Avoid duplicates based on name and start line for functions/classes etc.
-                 is_duplicate = False
-                 if query_name != "imports": # Imports can have same source
-                     for existing_item in result_list:
-                         if existing_item.get("name") == processed_item.get("name") and \
-                            existing_item.get("start_line") == processed_item.get("start_line"):
-                             is_duplicate = True
-                             break
-                 if not is_duplicate:
-                    processed_item.pop("start_line", None)
-                    processed_item.pop("end_line", None)
-                    result_list.append(processed_item)
+                result_list.append(processed_item)
+                if ranges_list is not None:
+                    # The primary capture is the name, its parent the whole declaration
+                    ranges_list.append(node_range(capture[primary_capture][0].parent))
     return result
@@ -0,0 +1,309 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from parser.parser import extract_types_and_members_from_node, get_language_name_for_file
+from parser.registry import get_parser
+from indexer.walker import walk_source_files
+from Project_Indexer import index_project_structure
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows; peak RSS is then not recorded
+    resource = None
+
+BASELINE_FILENAME = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_indexing_baseline.json')
+
+PHASES = ('walk', 'read', 'parse', 'extract', 'serialize', 'index')
+
+EXTENSIONS = ('.py', '.cs', '.ts', '.tsx', '.js')
+
+# Phases that took less than this in the baseline are too noisy to compare
+MIN_COMPARED_SECONDS = 0.05
+
+# Generated directories per level of nesting
+FAN_OUT = 8
+
+def _body(rng: random.Random, indent: str, lines: int, comment: str) -> list:
+    return [f"{indent}{comment} step {rng.randrange(1000)}: padding to reach the requested file size"
+            for _ in range(lines)]
+
+def generate_python_source(rng: random.Random, symbols: int, body_lines: int) -> str:
+    lines = ['import os', 'from typing import List, Optional', '']
+    for i in range(symbols):
+        if i % 4 == 0:
+            lines.append(f'class Model{i}(object):')
+            lines.append(f'    """Generated model {i}."""')
+            lines.append(f'    def get_{i}(self, key: str, default: Optional[int] = None) -> int:')
+            lines.extend(_body(rng, '        ', body_lines, '#'))
+            lines.append(f'        return {rng.randrange(100)}')
+        else:
+            lines.append(f'def helper_{i}(values: List[int], scale: float = 1.0) -> float:')
+            lines.extend(_body(rng, '    ', body_lines, '#'))
+            lines.append('    return sum(values) * scale')
+        lines.append('')
+    return '\n'.join(lines)
+
+def generate_csharp_source(rng: random.Random, symbols: int, body_lines: int) -> str:
+    lines = ['using System;', 'using System.Collections.Generic;', '',
+             f'namespace Generated.Module{rng.randrange(100)}', '{']
+    for i in range(symbols):
+        if i % 5 == 0:
+            lines.append(f'    public interface IService{i} {{ int Get(int id); }}')
+        elif i % 5 == 1:
+            lines.append(f'    public enum Kind{i} {{ A, B, C }}')
+        else:
+            lines.append(f'    public class Service{i} : IDisposable')
+            lines.append('    {')
+            lines.append(f'        public int Get{i}(int id, string name)')
+            lines.append('        {')
+            lines.extend(_body(rng, '            ', body_lines, '//'))
+            lines.append(f'            return id + {rng.randrange(100)};')
+            lines.append('        }')
+            lines.append('        public void Dispose() { }')
+            lines.append('    }')
+    lines.append('}')
+    return '\n'.join(lines)
+
+def generate_typescript_source(rng: random.Random, symbols: int, body_lines: int, tsx: bool = False) -> str:
+    lines = ['import { Observable } from "rxjs";', 'import * as api from "./api";', '']
+    for i in range(symbols):
+        if i % 4 == 0:
+            lines.append(f'export interface Model{i} {{ id: number; name: string; }}')
+        elif i % 4 == 1:
+            lines.append(f'export class Service{i} {{')
+            lines.append(f'    get(id: number): Model{i - 1} {{')
+            lines.extend(_body(rng, '        ', body_lines, '//'))
+            lines.append('        return api.get(id);')
+            lines.append('    }')
+            lines.append('}')
+        elif tsx and i % 4 == 2:
+            lines.append(f'export function View{i}(props: {{ title: string }}) {{')
+            lines.extend(_body(rng, '    ', body_lines, '//'))
+            lines.append('    return <div className="view">{props.title}</div>;')
+            lines.append('}')
+        else:
+            lines.append(f'export function create{i}(name: string): number {{')
+            lines.extend(_body(rng, '    ', body_lines, '//'))
+            lines.append(f'    return {rng.randrange(100)};')
+            lines.append('}')
+    return '\n'.join(lines)
+
+def generate_javascript_source(rng: random.Random, symbols: int, body_lines: int) -> str:
+    lines = ['import React, { useState } from "react";', 'const path = require("path");', '']
+    for i in range(symbols):
+        if i % 3 == 0:
+            lines.append(f'class Widget{i} {{')
+            lines.append('    constructor(name) { this.name = name; }')
+            lines.append(f'    render(loud) {{')
+            lines.extend(_body(rng, '        ', body_lines, '//'))
+            lines.append('        return this.name;')
+            lines.append('    }')
+            lines.append('}')
+        else:
+            lines.append(f'export function handle{i}(event, options) {{')
+            lines.extend(_body(rng, '    ', body_lines, '//'))
+            lines.append(f'    return event.value + {rng.randrange(100)};')
+            lines.append('}')
+    return '\n'.join(lines)
+
+def generate_source(extension: str, rng: random.Random, symbols: int, body_lines: int) -> str:
+    if extension == '.py':
+        return generate_python_source(rng, symbols, body_lines)
+    if extension == '.cs':
+        return generate_csharp_source(rng, symbols, body_lines)
+    if extension in ('.ts', '.tsx'):
+        return generate_typescript_source(rng, symbols, body_lines, tsx=extension == '.tsx')
+    return generate_javascript_source(rng, symbols, body_lines)
+
+def generate_corpus(root_dir: str, file_count: int, symbols: int = 20, body_lines: int = 3, depth: int = 3,
+                    extensions=EXTENSIONS, seed: int = 0) -> int:
+    """Write a deterministic synthetic project to root_dir.
+
+    Args:
+        root_dir: Directory to write the files to
+        file_count: Number of source files
+        symbols: Number of declarations per file
+        body_lines: Number of comment lines in every function body, to control the file size
+        depth: Number of directory levels the files are nested in
+        extensions: Extensions to generate, picked at random per file
+        seed: Seed of the generator; the same arguments always produce the same corpus
+
+    Returns:
+        int: The total size of the generated files in bytes
+    """
+    rng = random.Random(seed)
+    total_bytes = 0
+    for i in range(file_count):
+        directories = [f"pkg{(i // FAN_OUT ** (level + 1)) % FAN_OUT}" for level in range(depth)]
+        extension = rng.choice(extensions)
+        dir_path = os.path.join(root_dir, *directories)
+        os.makedirs(dir_path, exist_ok=True)
+        source = generate_source(extension, rng, symbols, body_lines).encode('utf8')
+        with open(os.path.join(dir_path, f"module{i}{extension}"), 'wb') as f:
+            f.write(source)
+        total_bytes += len(source)
+    return total_bytes
+
+def _peak_rss_mb() -> float:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+def _phase(seconds: float, file_count: int, byte_count: int) -> dict:
+    return {
+        'seconds': round(seconds, 4),
+        'files_per_second': round(file_count / seconds, 1) if seconds else None,
+        'mb_per_second': round(byte_count / (1024 * 1024) / seconds, 2) if seconds else None,
+    }
+
+def _time_phases(corpus_dir: str) -> tuple:
+    """Time every indexing phase on a corpus, returning (file count, seconds per phase)."""
+    phases = {}
+
+    start = time.perf_counter()
+    files = list(walk_source_files(corpus_dir))
+    phases['walk'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    sources = []
+    for file_path, relative_path, _ in files:
+        with open(file_path, 'rb') as f:
+            sources.append((relative_path, f.read()))
+    phases['read'] = time.perf_counter() - start
+
+    # Parse and extract alternate per file so only one tree is alive at a time
+    parse_time = extract_time = 0.0
+    index = {}
+    for relative_path, source in sources:
+        start = time.perf_counter()
+        tree = get_parser(get_language_name_for_file(relative_path)).parse(source)
+        parsed = time.perf_counter()
+        details = extract_types_and_members_from_node(tree.root_node, relative_path).__to_dict__()
+        extract_time += time.perf_counter() - parsed
+        parse_time += parsed - start
+        if any(details.values()):
+            index[relative_path] = details
+    phases['parse'] = parse_time
+    phases['extract'] = extract_time
+    del sources
+
+    start = time.perf_counter()
+    with open(os.path.join(corpus_dir, 'ProjectIndex.json'), 'w', encoding='utf-8') as index_file:
+        json.dump(index, index_file, indent=4)
+    phases['serialize'] = time.perf_counter() - start
+
+    # The whole pipeline as run by Project_Indexer.py, serial and without cache
+    start = time.perf_counter()
+    index_project_structure(corpus_dir)
+    phases['index'] = time.perf_counter() - start
+    return len(files), phases
+
+def benchmark_scale(file_count: int, symbols: int, body_lines: int, depth: int, seed: int) -> dict:
+    """Generate a corpus of file_count files and time every indexing phase on it.
+
+    Runs in its own process so the peak RSS belongs to this scale only.
+    """
+    corpus_dir = tempfile.mkdtemp(prefix=f'benchmark_indexing_{file_count}_')
+    try:
+        byte_count = generate_corpus(corpus_dir, file_count, symbols, body_lines, depth, seed=seed)
+        indexed_count, phases = _time_phases(corpus_dir)
+    finally:
+        shutil.rmtree(corpus_dir, ignore_errors=True)
+
+    return {
+        'files': indexed_count,
+        'bytes': byte_count,
+        'symbols_per_file': symbols,
+        'phases': {name: _phase(phases[name], indexed_count, byte_count) for name in PHASES},
+        'peak_rss_mb': _peak_rss_mb(),
+    }
+
+def find_regressions(results: dict, baseline: dict, tolerance: float) -> list:
+    """Compare results with a baseline, returning a message for every phase that got slower
+    and every scale whose peak RSS grew by more than tolerance (a fraction).
+
+    Scales missing from the baseline, or benchmarked on a different corpus, are skipped.
+    """
+    regressions = []
+    for scale, result in results.items():
+        expected = baseline.get(scale)
+        if expected is None or expected.get('bytes') != result['bytes']:
+            continue
+        for name in PHASES:
+            if expected['phases'].get(name, {}).get('seconds', 0) < MIN_COMPARED_SECONDS:
+                continue
+            current = result['phases'][name]['files_per_second']
+            previous = expected['phases'][name]['files_per_second']
+            if current and previous and current < previous * (1 - tolerance):
+                regressions.append(f"{scale} files, {name}: {current:.0f} files/s, "
+                                   f"baseline {previous:.0f} files/s ({current / previous - 1:+.0%})")
+        current, previous = result['peak_rss_mb'], expected.get('peak_rss_mb')
+        if current and previous and current > previous * (1 + tolerance):
+            regressions.append(f"{scale} files, peak RSS: {current:.0f} MB, "
+                               f"baseline {previous:.0f} MB ({current / previous - 1:+.0%})")
+    return regressions
+
+def print_results(result: dict):
+    print(f"\n{result['files']} files, {result['bytes'] / (1024 * 1024):.1f} MB, "
+          f"peak RSS {result['peak_rss_mb']} MB")
+    for name in PHASES:
+        phase = result['phases'][name]
+        print(f"  {name:<10} {phase['seconds']:>9.3f}s {phase['files_per_second'] or 0:>12.0f} files/s "
+              f"{phase['mb_per_second'] or 0:>9.2f} MB/s")
+
+if __name__ == '__main__':
+    # Usage, from the repository root: PYTHONPATH=. python test/benchmark_indexing.py [--files 1000 10000]
+    parser = argparse.ArgumentParser(description='Benchmark the indexing phases on synthetic projects.')
+    parser.add_argument('--files', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='Corpus sizes to benchmark (default: 1000 10000 100000)')
+    parser.add_argument('--symbols', type=int, default=20, help='Declarations per file (default: 20)')
+    parser.add_argument('--body-lines', type=int, default=3,
+                        help='Lines per function body, to control the file size (default: 3)')
+    parser.add_argument('--depth', type=int, default=3, help='Directory nesting depth (default: 3)')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the corpus generator (default: 0)')
+    parser.add_argument('--baseline', default=BASELINE_FILENAME,
+                        help='Baseline file to compare with (default: test/benchmark_indexing_baseline.json)')
+    parser.add_argument('--save-baseline', action='store_true', default=False,
+                        help='Write the results to the baseline file instead of comparing with it')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Allowed slowdown or memory growth before flagging a regression (default: 0.2)')
+    args = parser.parse_args()
+
+    results = {}
+    for file_count in args.files:
+        print(f"Benchmarking {file_count} files...")
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            result = executor.submit(benchmark_scale, file_count, args.symbols, args.body_lines,
+                                     args.depth, args.seed).result()
+        results[str(file_count)] = result
+        print_results(result)
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=4)
+        print(f"\nBaseline written to {args.baseline}.")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = find_regressions(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\nRegressions against the baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("\nNo regressions against the baseline.")
+    else:
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to create one.")
@@ -0,0 +1,119 @@
+import sys
+import time
+import parser as parser_package
+from parser.registry import get_parser, get_query
+from parser.typescript_parser import extract_types_and_members_from_node_for_typescript as matches_extract
+from parser.typescript_parser import TypeScript_Result, PRIMARY_CAPTURES
+from parser.typescript_parser import _process_class, _process_interface, _process_function, _process_enum, _process_import
+
+def generate_typescript_source(symbol_count: int) -> bytes:
+    """Generate a TypeScript module with roughly symbol_count exported symbols, like generated API clients."""
+    lines = ['import { Observable } from "rxjs";', 'import * as api from "./api";', '']
+    for i in range(symbol_count // 5):
+        lines.append(f'export interface Model{i} {{ id: number; name: string; }}')
+        lines.append(f'export enum Kind{i} {{ A, B, C }}')
+        lines.append(f'export class Service{i} {{')
+        lines.append(f'    get(id: number): Model{i} {{ return api.get(id); }}')
+        lines.append('}')
+        lines.append(f'export function create{i}(name: string): Model{i} {{ return {{ id: {i}, name }}; }}')
+        lines.append(f'export const load{i} = (id: number): Observable<Model{i}> => api.load(id);')
+    return '\n'.join(lines).encode('utf8')
+
+# Backup old implementation for comparison: groups captures by line, scanning all captures per node
+def line_grouping_extract(root_node, language_name: str) -> TypeScript_Result:
+    result = TypeScript_Result()
+    processing_map = {
+        "classes": (_process_class, result.classes),
+        "interfaces": (_process_interface, result.interfaces),
+        "functions": (_process_function, result.functions),
+        "enums": (_process_enum, result.enums),
+        "imports": (_process_import, result.imports),
+    }
+    for query_name, (process_func, result_list) in processing_map.items():
+        primary_node_key = PRIMARY_CAPTURES[query_name]
+        captures = get_query(language_name, query_name).captures(root_node)
+        processed_captures = {}
+        for capture_name, node_list in captures.items():
+            for node in node_list:
+                start_line = node.start_point[0]
+                relevant_node_for_key = node
+                temp_captures = []
+                for cn, n_list in captures.items():
+                    for n in n_list:
+                        if n.start_point[0] == start_line:
+                            temp_captures.append((n, cn))
+                for n_temp, cn_temp in temp_captures:
+                    if cn_temp == primary_node_key:
+                        relevant_node_for_key = n_temp
+                        break
+                key = relevant_node_for_key.start_point[0]
+                processed_captures.setdefault(key, {})[capture_name] = [node]
+        for key in sorted(processed_captures.keys()):
+            processed_item = process_func(processed_captures[key])
+            if processed_item:
+                is_duplicate = False
+                if query_name != "imports":
+                    for existing_item in result_list:
+                        if existing_item.get("name") == processed_item.get("name") and \
+                           existing_item.get("start_line") == processed_item.get("start_line"):
+                            is_duplicate = True
+                            break
+                if not is_duplicate:
+                    result_list.append(processed_item)
+    return result
+
+def benchmark_extractor(extract_func, root_node, iterations: int) -> dict:
+    times = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        extract_func(root_node)
+        times.append(time.perf_counter() - start)
+    return {
+        'avg_time': sum(times) / iterations,
+        'min_time': min(times),
+        'max_time': max(times),
+        'iterations': iterations
+    }
+
+def parse_generated(symbol_count: int):
+    source = generate_typescript_source(symbol_count)
+    print(f"Generated {symbol_count} symbols, {len(source) / 1024:.0f} KB")
+    return get_parser('typescript').parse(source)
+
+if __name__ == '__main__':
+    # Usage: benchmark_typescript.py [symbol_count] [iterations] [comparison_symbol_count]
+    # The line grouping extractor is quadratic, so it is compared on a smaller file
+    symbol_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    comparison_count = int(sys.argv[3]) if len(sys.argv) > 3 else 1000
+
+    parser_package.initialize_grammars()
+    extract = lambda node: matches_extract(node, 'typescript', extract_imports=True)
+
+    print("Benchmarking Query.matches() extractor...")
+    tree = parse_generated(symbol_count)
+    matches_results = benchmark_extractor(extract, tree.root_node, iterations)
+    print(f"Query.matches() results: {matches_results}")
+    print(f"{symbol_count / matches_results['avg_time']:.0f} symbols/s")
+
+    print("\nComparing with line grouping extractor...")
+    tree = parse_generated(comparison_count)
+    matches_results = benchmark_extractor(extract, tree.root_node, iterations)
+    line_results = benchmark_extractor(lambda node: line_grouping_extract(node, 'typescript'), tree.root_node, 1)
+    print(f"Query.matches() results: {matches_results}")
+    print(f"Line grouping results: {line_results}")
+
+    print("\nComparison:")
+    print(f"Query.matches() is {line_results['avg_time'] / matches_results['avg_time']:.2f}x faster than line grouping")
+
+    # Both extractors must agree on the named declarations they find
+    new_result = extract(tree.root_node)
+    old_result = line_grouping_extract(tree.root_node, 'typescript')
+    for key in ('classes', 'interfaces', 'enums'):
+        new_names = [item['name'] for item in getattr(new_result, key)]
+        old_names = [item['name'] for item in getattr(old_result, key)]
+        print(f"{key}: {len(new_names)} found, {'same as' if new_names == old_names else 'DIFFERENT from'} line grouping")
+    # The duplicate check of line grouping compares 'name' and 'start_line', which function items
+    # lack once the line numbers are dropped, so it kept only the first function or method per file
+    print(f"functions: {len(new_result.functions)} found, line grouping keeps {len(old_result.functions)} "
+          "(it dropped every function after the first as a duplicate)")
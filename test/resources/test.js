@@ -0,0 +1,15 @@
+import React, { useState, useEffect as ue } from "react";
+import * as path from 'path';
+import './side.css';
+class Animal extends Base {
+  constructor(name) { this.name = name; function inner() {} }
+  speak(loud, times) { return 1; }
+}
+export class Dog { bark() {} }
+function top(a, b) { const nested = () => 1; }
+export function exported(x) {}
+var arrow = (p, q) => p;
+const single = z => z;
+export const c = (k) => k, notFn = 3;
+export { top as alias, arrow };
+export default Animal;
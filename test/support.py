@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+
+# Sample sources shared by the tests; the parsers skip files named like tests, so copy them
+# under another name to index them
+RESOURCES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resources')
+
+# A small project index in the ProjectIndex.json schema, spread over several top-level directories
+PROJECT_INDEX = {
+    'main.py': {
+        'py_classes': [{'name': 'UserService', 'methods': ['get_user(self, user_id) -> User']}],
+        'py_functions': ['get_user(user_id) -> User', 'get_users() -> list'],
+    },
+    os.path.join('api', 'users.py'): {
+        'py_classes': [{'name': 'UserRepository', 'methods': ['get_user(self, user_id) -> User']},
+                       {'name': 'UserRepo'}],
+        'py_functions': ['get_usr() -> User'],
+    },
+    os.path.join('src', 'Orders', 'OrderService.cs'): {
+        'classes': [{'name': 'OrderService', 'namespace': 'Shop.Orders',
+                     'methods': [{'name': 'Submit', 'return_type': 'void', 'parameters': 'Order order'},
+                                 {'name': 'GetUser', 'return_type': 'User'}]}],
+        'interfaces': [{'name': 'IOrderService', 'namespace': 'Shop.Orders'}],
+    },
+    os.path.join('src', 'Users', 'UserService.cs'): {
+        'classes': [{'name': 'UserService', 'namespace': 'Shop.Users'}],
+    },
+    os.path.join('web', 'orders.ts'): {
+        'classes': [{'name': 'OrderList', 'methods': ['render(): void']}],
+        'interfaces': ['OrderDto'],
+        'functions': ['getUser(id: string): User'],
+    },
+}
+
+
+class ProjectTestCase(unittest.TestCase):
+    """A test case with an empty project directory in self.root, deleted after every test."""
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.root = temp_dir.name
+
+    def path(self, relative_path: str) -> str:
+        return os.path.join(self.root, relative_path)
+
+    def write_file(self, relative_path: str, content='', mtime_ns: int = None) -> str:
+        """Write a file below self.root, creating its directories, and return its path.
+
+        Args:
+            relative_path: '/' separated path of the file
+            content: Text, or bytes written as they are
+            mtime_ns: Optional modification time to give the file
+        """
+        file_path = self.path(relative_path)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        if isinstance(content, bytes):
+            with open(file_path, 'wb') as f:
+                f.write(content)
+        else:
+            with open(file_path, 'w', encoding='utf-8', newline='') as f:
+                f.write(content)
+        if mtime_ns is not None:
+            os.utime(file_path, ns=(mtime_ns, mtime_ns))
+        return file_path
+
+    def write_files(self, files: dict):
+        """Write {relative path: content} below self.root."""
+        for relative_path, content in files.items():
+            self.write_file(relative_path, content)
+
+    def copy_resources(self, extensions=('cs', 'js', 'ts', 'tsx'), name: str = 'sample'):
+        """Copy test/resources/test.<extension> to <name>.<extension> below self.root."""
+        for extension in extensions:
+            with open(os.path.join(RESOURCES, f'test.{extension}'), 'rb') as f:
+                self.write_file(f'{name}.{extension}', f.read())
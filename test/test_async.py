@@ -0,0 +1,52 @@
+import os
+import asyncio
+import builtins
+import unittest
+from unittest import mock
+
+from Project_Indexer import index_project_structure, index_project_structure_async
+
+from support import ProjectTestCase
+
+
+def _open_denying(file_name: str):
+    """Return a stand-in for open that raises PermissionError for files named file_name."""
+    def open_file(file, *args, **kwargs):
+        if os.path.basename(file) == file_name:
+            raise PermissionError(13, 'Permission denied', file)
+        return builtins.open(file, *args, **kwargs)
+    return open_file
+
+
+class AsyncIndexingTest(ProjectTestCase):
+    def setUp(self):
+        super().setUp()
+        self.copy_resources()
+        self.write_file('pkg/models.py', "class Model:\n    def save(self) -> None:\n        pass\n")
+
+    def test_same_index_as_serial_run(self):
+        expected = index_project_structure(self.root)
+        self.assertIn('sample.tsx', expected)
+        for readers in (1, 2, 64):
+            with self.subTest(readers=readers):
+                # 64 readers is more than there are files: most of them only see the end of the queue
+                self.assertEqual(asyncio.run(index_project_structure_async(self.root, readers=readers)), expected)
+        self.assertEqual(asyncio.run(index_project_structure_async(self.root, jobs=2, ranges=True)),
+                         index_project_structure(self.root, ranges=True))
+
+    def test_unreadable_file_is_left_out(self):
+        expected = index_project_structure(self.root)
+        self.write_file('locked.py', "def locked():\n    pass\n")
+        with mock.patch('Project_Indexer.open', _open_denying('locked.py'), create=True), \
+                self.assertLogs('Project_Indexer', 'WARNING') as logs:
+            project_index = asyncio.run(index_project_structure_async(self.root, readers=2))
+        self.assertEqual(project_index, expected)
+        self.assertTrue(any('locked.py' in line and 'PermissionError' in line for line in logs.output))
+
+    def test_empty_project(self):
+        os.makedirs(self.path('empty'))
+        self.assertEqual(asyncio.run(index_project_structure_async(self.path('empty'), readers=4)), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
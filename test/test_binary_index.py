@@ -0,0 +1,104 @@
+import os
+import json
+import unittest
+from unittest import mock
+
+from Project_Indexer import index_project_structure, write_project_index
+from indexer.binary_index import BinaryIndex, encode_binary_index, read_binary_index, write_binary_index
+from indexer.lookup import ProjectIndex
+
+from support import PROJECT_INDEX, RESOURCES, ProjectTestCase
+
+
+class BinaryIndexTest(ProjectTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.project_index = index_project_structure(RESOURCES)
+
+    def setUp(self):
+        super().setUp()
+        self.bin_path = self.path('ProjectIndex.bin')
+
+    def test_smaller_than_json(self):
+        json_path = self.path('ProjectIndex.json')
+        write_project_index(self.project_index, json_path)
+        write_binary_index(self.project_index, self.bin_path)
+        self.assertLess(os.path.getsize(self.bin_path), os.path.getsize(json_path))
+        # Without the trigram index it is smaller than even the compact JSON
+        compact = json.dumps(self.project_index, separators=(',', ':')).encode('utf8')
+        self.assertLess(len(encode_binary_index(self.project_index, trigram_index=False)), len(compact))
+
+    def test_round_trip(self):
+        for trigram_index in (True, False):
+            write_binary_index(self.project_index, self.bin_path, trigram_index)
+            self.assertEqual(read_binary_index(self.bin_path), self.project_index)
+            self.assertEqual(encode_binary_index(read_binary_index(self.bin_path), trigram_index),
+                             encode_binary_index(self.project_index, trigram_index))
+
+    def test_empty_index(self):
+        write_binary_index({}, self.bin_path)
+        with BinaryIndex(self.bin_path) as index:
+            self.assertEqual(len(index), 0)
+            self.assertEqual(index.lookup('Anything'), [])
+            self.assertEqual(index.fuzzy_search('Anything'), [])
+            self.assertEqual(index.to_dict(), {})
+
+    def test_queries_match_project_index(self):
+        expected = ProjectIndex(self.project_index)
+        names = sorted({symbol.name for symbol in expected.symbols})
+        self.assertTrue(names)
+        for trigram_index in (True, False):
+            write_binary_index(self.project_index, self.bin_path, trigram_index)
+            with BinaryIndex(self.bin_path) as index:
+                self.assertEqual(list(index.paths()), list(self.project_index))
+                self.assertIn('test.cs', index)
+                self.assertNotIn('missing.cs', index)
+                for path, details in self.project_index.items():
+                    self.assertEqual(index.file_details(path), details)
+                for name in names + ['Missing']:
+                    self.assertEqual(index.lookup(name), expected.lookup(name), name)
+                for query in ('Greting', 'animl', 'ExampleClas', 'speak', 'zz'):
+                    self.assertEqual(index.fuzzy_search(query, limit=5), expected.fuzzy_search(query, limit=5),
+                                     query)
+                self.assertEqual(index.fuzzy_search('Greting', kind='method', language='csharp'),
+                                 expected.fuzzy_search('Greting', kind='method', language='csharp'))
+
+    def test_filtered_and_prefix_queries_match_project_index(self):
+        # Enough names in mixed case to span several string and name blocks
+        project_index = dict(PROJECT_INDEX)
+        project_index[os.path.join('gen', 'names.py')] = {'py_functions': [
+            f"{name}_{i}() -> None" for i in range(40) for name in ('get', 'Get', 'GET', 'order', 'x')]}
+        expected = ProjectIndex(project_index)
+        write_binary_index(project_index, self.bin_path)
+        filters = [{}, {'kind': 'class'}, {'kind': ('function', 'method')}, {'language': 'csharp'},
+                   {'path_prefix': 'src'}, {'path_prefix': 'src/Orders/OrderService.cs'}, {'limit': 3},
+                   {'kind': 'method', 'language': 'python', 'limit': 1}]
+        with BinaryIndex(self.bin_path) as index:
+            for options in filters:
+                for name in ('get_user', 'UserService', 'OrderService.Submit', 'Orders.OrderService',
+                             'Users.OrderService', 'GET_7', 'missing'):
+                    self.assertEqual(index.lookup(name, **options), expected.lookup(name, **options),
+                                     (name, options))
+                for prefix in ('', 'get', 'GET_1', 'gEt_', 'us', 'U', 'Order', 'x_3', 'zz'):
+                    options = dict({'limit': None}, **options)
+                    self.assertEqual(index.search_prefix(prefix, **options),
+                                     expected.search_prefix(prefix, **options), (prefix, options))
+            self.assertEqual(index.search_prefix('get'), expected.search_prefix('get'))
+
+    def test_filtered_lookup_only_decodes_matching_files(self):
+        write_binary_index(PROJECT_INDEX, self.bin_path)
+        with BinaryIndex(self.bin_path) as index, \
+                mock.patch.object(index, '_details', wraps=index._details) as details:
+            symbols = index.lookup('get_user', path_prefix='api')
+            self.assertEqual([symbol.path for symbol in symbols], [os.path.join('api', 'users.py')])
+            self.assertEqual(details.call_count, 1)
+
+    def test_rejects_other_files(self):
+        with open(self.bin_path, 'wb') as f:
+            f.write(b'{"not": "binary"}' * 8)
+        with self.assertRaises(ValueError):
+            BinaryIndex(self.bin_path)
+
+
+if __name__ == '__main__':
+    unittest.main()
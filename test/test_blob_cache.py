@@ -0,0 +1,91 @@
+import os
+import json
+import zlib
+import unittest
+from unittest import mock
+
+from indexer import blob_cache
+from indexer.blob_cache import BlobCache, TOUCH_INTERVAL
+from indexer.cache import ParseCache
+
+from support import ProjectTestCase
+
+
+def _details(name):
+    # Hex of random bytes barely compresses, so every blob has about the same size
+    return {'functions': [name + os.urandom(64).hex()]}
+
+
+def _stored_size(details):
+    return len(zlib.compress(json.dumps(details, separators=(',', ':')).encode('utf8')))
+
+
+class BlobCacheTest(ProjectTestCase):
+    def setUp(self):
+        super().setUp()
+        self.db_path = self.path('blobs.db')
+
+    def test_hit_before_and_after_flush(self):
+        details = _details('a')
+        with BlobCache(self.db_path) as blobs:
+            self.assertIsNone(blobs.get('a'))
+            blobs.put('a', details)
+            self.assertEqual(blobs.get('a'), details)
+        with BlobCache(self.db_path) as blobs:
+            self.assertEqual(blobs.get('a'), details)
+            self.assertIsNone(blobs.get('b'))
+
+    def test_identical_file_in_another_project_is_served_from_shared_cache(self):
+        details = {'py_functions': ['f() -> int']}
+        roots = [self.path(name) for name in ('one', 'two')]
+        for name in ('one', 'two'):
+            self.write_file(f'{name}/module.py', 'def f() -> int:\n    return 1\n')
+
+        with BlobCache(self.db_path) as blobs:
+            cache = ParseCache(os.path.join(roots[0], 'ProjectIndex.cache.json'), blobs=blobs)
+            file_path = os.path.join(roots[0], 'module.py')
+            self.assertIsNone(cache.lookup('module.py', file_path))
+            cache.store('module.py', file_path, details)
+            cache.save()
+
+        with BlobCache(self.db_path) as blobs:
+            cache = ParseCache(os.path.join(roots[1], 'ProjectIndex.cache.json'), blobs=blobs)
+            self.assertEqual(cache.lookup('module.py', os.path.join(roots[1], 'module.py')), details)
+            self.assertEqual((cache.shared_hits, cache.misses), (1, 0))
+
+            # The same content under other parse options is a different blob
+            cache = ParseCache(os.path.join(roots[1], 'ProjectIndex.cache.json'), blobs=blobs, extract_imports=True)
+            self.assertIsNone(cache.lookup('module.py', os.path.join(roots[1], 'module.py')))
+
+    def test_least_recently_used_blobs_are_evicted(self):
+        blobs_details = {key: _details(key) for key in ('a', 'b', 'c')}
+        # Room for two blobs, not three
+        max_size = int(max(map(_stored_size, blobs_details.values())) * 2.5)
+        with mock.patch.object(blob_cache.time, 'time') as now, BlobCache(self.db_path, max_size) as blobs:
+            now.return_value = 1000
+            blobs.put('a', blobs_details['a'])
+            blobs.flush()
+            now.return_value = 2000
+            blobs.put('b', blobs_details['b'])
+            blobs.flush()
+
+            # A hit long after the last use moves 'a' up, so 'b' is now the least recently used
+            now.return_value = 2000 + TOUCH_INTERVAL + 1
+            self.assertEqual(blobs.get('a'), blobs_details['a'])
+            blobs.put('c', blobs_details['c'])
+            blobs.flush()
+
+            self.assertEqual(blobs.get('a'), blobs_details['a'])
+            self.assertIsNone(blobs.get('b'))
+            self.assertEqual(blobs.get('c'), blobs_details['c'])
+
+    def test_blobs_within_the_size_cap_are_kept(self):
+        with BlobCache(self.db_path, max_size=1024 * 1024) as blobs:
+            for key in ('a', 'b', 'c'):
+                blobs.put(key, _details(key))
+            blobs.flush()
+            self.assertTrue(all(blobs.get(key) is not None for key in ('a', 'b', 'c')))
+
+
+if __name__ == '__main__':
+    unittest.main()
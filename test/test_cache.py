@@ -0,0 +1,62 @@
+import unittest
+from unittest import mock
+
+import indexer.cache
+from indexer.cache import ParseCache, buffer_hash
+
+from support import ProjectTestCase
+
+DETAILS = {'py_functions': ['f() -> int']}
+
+
+class ParseCacheTest(ProjectTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cache_path = self.path('ProjectIndex.cache.json')
+        self.file_path = self.write_file('module.py', b'def f():\n    return 1\n', mtime_ns=1_000_000_000)
+        self._run()
+
+    def _run(self):
+        """Index module.py like Project_Indexer does and return what the cache served, or None."""
+        cache = ParseCache(self.cache_path)
+        details = cache.lookup('module.py', self.file_path)
+        if details is None:
+            with open(self.file_path, 'rb') as f:
+                cache.store('module.py', self.file_path, DETAILS, digest=buffer_hash(f.read()))
+        cache.save()
+        return details
+
+    def test_unchanged_file_is_served_from_cache(self):
+        self.assertEqual(self._run(), DETAILS)
+
+    def test_touched_file_with_same_content_is_served_from_cache(self):
+        self.write_file('module.py', b'def f():\n    return 1\n', mtime_ns=2_000_000_000)
+        self.assertEqual(self._run(), DETAILS)
+
+    def test_mtime_and_content_change_invalidates(self):
+        self.write_file('module.py', b'def f():\n    return 2\n', mtime_ns=2_000_000_000)
+        self.assertIsNone(self._run())
+        self.assertEqual(self._run(), DETAILS)
+
+    def test_size_change_invalidates(self):
+        # Same mtime, so only the size tells the file changed
+        self.write_file('module.py', b'def f():\n    return 10\n', mtime_ns=1_000_000_000)
+        self.assertIsNone(self._run())
+
+    def test_deleted_file_is_dropped(self):
+        cache = ParseCache(self.cache_path)
+        cache.save()
+        self.assertEqual(ParseCache(self.cache_path).entries, {})
+
+    def test_parser_version_bump_discards_cache(self):
+        with mock.patch.object(indexer.cache, 'PARSER_VERSION', indexer.cache.PARSER_VERSION + 1):
+            self.assertIsNone(self._run())
+            self.assertEqual(self._run(), DETAILS)
+
+    def test_extract_imports_is_part_of_the_key(self):
+        cache = ParseCache(self.cache_path, extract_imports=True)
+        self.assertIsNone(cache.lookup('module.py', self.file_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import shutil
+import subprocess
+import unittest
+
+from indexer.cache import ParseCache
+from indexer.git import changes_since, git_source_files, head_commit
+
+from support import ProjectTestCase
+
+GIT_ENV = {'GIT_AUTHOR_NAME': 'test', 'GIT_AUTHOR_EMAIL': 'test@example.com',
+           'GIT_COMMITTER_NAME': 'test', 'GIT_COMMITTER_EMAIL': 'test@example.com'}
+
+
+@unittest.skipIf(shutil.which('git') is None, "git is not installed")
+class ChangesSinceTest(ProjectTestCase):
+    def setUp(self):
+        super().setUp()
+        self._git('init', '-q')
+        for name in ('moved.py', 'deleted.py', 'modified.py', 'edited.py'):
+            self.write_file(name, ''.join(f"def {name[:-3]}_{i}():\n    return {i}\n" for i in range(20)))
+        self._git('add', '.')
+        self._git('commit', '-q', '-m', 'initial')
+        self.commit = head_commit(self.root)
+
+    def _git(self, *args):
+        subprocess.run(['git', '-C', self.root, *args], check=True, capture_output=True,
+                       env=dict(os.environ, **GIT_ENV))
+
+    def _change_tree(self):
+        os.makedirs(self.path('pkg'))
+        self._git('mv', 'moved.py', 'pkg/moved.py')
+        self._git('rm', '-q', 'deleted.py')
+        with open(self.path('modified.py'), 'a', encoding='utf-8') as f:
+            f.write("def added():\n    pass\n")
+        self._git('mv', 'edited.py', 'renamed.py')
+        with open(self.path('renamed.py'), 'a', encoding='utf-8') as f:
+            f.write("def added():\n    pass\n")
+
+    def test_no_changes(self):
+        self.assertEqual(changes_since(self.root, self.commit), (set(), {}))
+
+    def test_renames_and_deletes(self):
+        self._change_tree()
+        changed, renames = changes_since(self.root, self.commit)
+        # An unmodified rename (R100) is only a rename, an edited one changes both paths
+        self.assertEqual(renames, {'moved.py': 'pkg/moved.py'})
+        self.assertEqual(changed, {'deleted.py', 'modified.py', 'edited.py', 'renamed.py'})
+
+    def test_committed_changes(self):
+        self._change_tree()
+        self._git('commit', '-q', '-m', 'change')
+        changed, renames = changes_since(self.root, self.commit)
+        self.assertEqual(renames, {'moved.py': 'pkg/moved.py'})
+        self.assertEqual(changed, {'deleted.py', 'modified.py', 'edited.py', 'renamed.py'})
+
+    def test_unknown_commit(self):
+        self.assertIsNone(changes_since(self.root, '0' * 40))
+
+    def test_renamed_file_keeps_its_cache_entry(self):
+        cache_path = self.path('ProjectIndex.cache.json')
+        cache = ParseCache(cache_path)
+        for file_path, relative_path, stat_result in git_source_files(self.root, cache=cache):
+            cache.store(relative_path, file_path, {'functions': [relative_path]}, stat_result)
+        cache.save()
+
+        self._change_tree()
+        cache = ParseCache(cache_path)
+        files = git_source_files(self.root, cache=cache)
+        self.assertEqual([relative_path for _, relative_path, _ in files],
+                         ['modified.py', 'renamed.py', os.path.join('pkg', 'moved.py')])
+        self.assertEqual(cache.unchanged, {os.path.join('pkg', 'moved.py')})
+        served = {relative_path: cache.lookup(relative_path, file_path, stat_result)
+                  for file_path, relative_path, stat_result in files}
+        self.assertEqual(served[os.path.join('pkg', 'moved.py')], {'functions': ['moved.py']})
+        self.assertIsNone(served['modified.py'])
+        self.assertIsNone(served['renamed.py'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import unittest
+
+from indexer.ignore import IgnoreEngine, IgnoreRule, _translate
+from indexer.walker import walk_source_files
+
+from support import ProjectTestCase
+
+
+class TranslateTest(unittest.TestCase):
+    def test_star_stays_within_a_directory(self):
+        self.assertRegex('foo.py', _translate('*.py'))
+        self.assertIsNone(IgnoreRule('src/*.py').regex.match('src/sub/foo.py'))
+
+    def test_double_star_matches_any_depth(self):
+        rule = IgnoreRule('src/**/gen.cs')
+        self.assertTrue(rule.matches('src/gen.cs', 'gen.cs', False))
+        self.assertTrue(rule.matches('src/a/b/gen.cs', 'gen.cs', False))
+        self.assertFalse(rule.matches('lib/gen.cs', 'gen.cs', False))
+
+    def test_character_class_and_negated_class(self):
+        self.assertTrue(IgnoreRule('file[0-9].py').matches('file3.py', 'file3.py', False))
+        self.assertFalse(IgnoreRule('file[!0-9].py').matches('file3.py', 'file3.py', False))
+
+    def test_directory_pattern_does_not_match_files_or_substrings(self):
+        rule = IgnoreRule('build/')
+        self.assertTrue(rule.matches('build', 'build', True))
+        self.assertFalse(rule.matches('build', 'build', False))
+        self.assertFalse(rule.matches('rebuild_cache.py', 'rebuild_cache.py', False))
+        self.assertFalse(rule.matches('rebuild', 'rebuild', True))
+
+
+class IgnoreEngineTest(ProjectTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write_files({relative_path: 'pass\n' for relative_path in (
+            'main.py', 'rebuild_cache.py', 'build/out.py', 'src/build/gen.py',
+            'src/app.py', 'src/keep.log.py', 'logs/debug.py', 'logs/important.py')})
+
+    def _gitignore(self, relative_dir, *lines):
+        self.write_file(os.path.join(relative_dir, '.gitignore'), '\n'.join(lines) + '\n')
+
+    def _walk(self, **options):
+        ignore = IgnoreEngine(self.root, **options)
+        return sorted(relative_path.replace(os.sep, '/')
+                      for _, relative_path, _ in walk_source_files(self.root, ignore))
+
+    def test_build_directories_are_pruned_but_not_similar_names(self):
+        self.assertEqual(self._walk(), ['logs/debug.py', 'logs/important.py', 'main.py', 'rebuild_cache.py',
+                                        'src/app.py', 'src/keep.log.py'])
+
+    def test_negation_re_includes_a_file(self):
+        self._gitignore('', 'logs/*', '!logs/important.py')
+        self.assertEqual([path for path in self._walk() if path.startswith('logs/')], ['logs/important.py'])
+
+    def test_nested_gitignore_is_relative_to_its_directory(self):
+        self._gitignore('src', '/app.py')
+        self.assertNotIn('src/app.py', self._walk())
+        self.assertIn('src/keep.log.py', self._walk())
+
+    def test_excludes_override_gitignore(self):
+        self._gitignore('', '*.py')
+        self.assertEqual(self._walk(excludes=['!main.py']), ['main.py'])
+
+    def test_is_path_ignored_checks_parent_directories(self):
+        ignore = IgnoreEngine(self.root)
+        self.assertTrue(ignore.is_path_ignored('src/build/gen.py'))
+        self.assertFalse(ignore.is_path_ignored('rebuild_cache.py'))
+
+    def test_without_default_excludes_build_is_walked(self):
+        self.assertIn('build/out.py', self._walk(use_default_excludes=False))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+
+from Project_Indexer import _index_file, index_project_structure
+from indexer.cache import ParseCache
+from parser.limits import GENERATED_HEADER_SIZE, MINIFIED_MIN_SIZE, TIMEOUT_REASON, ParseLimits, SkippedFile, \
+    generated_reason
+
+from support import ProjectTestCase
+
+# A single line long enough to look minified in a script
+LONG_LINE = 'const values = [' + ', '.join(str(i) for i in range(MINIFIED_MIN_SIZE)) + '];\n'
+
+# (path, header, expected reason)
+GENERATED_CASES = [
+    ('Forms/MainForm.Designer.cs', b'', 'generated (*.designer.cs)'),
+    ('Forms/MainForm.designer.cs', b'', 'generated (*.designer.cs)'),
+    ('obj/Debug/App.g.cs', b'', 'generated (*.g.cs)'),
+    ('obj/Debug/App.g.i.cs', b'', 'generated (*.g.i.cs)'),
+    ('Models/Order.Generated.cs', b'', 'generated (*.generated.cs)'),
+    ('vendor/jquery/jquery.min.js', b'', 'generated (*.min.js)'),
+    ('node_modules/@types/node/index.d.ts', b'', 'generated (*.d.ts)'),
+    ('Models/Order.cs', b'// <auto-generated>\n//     This code was generated by a tool.\n',
+     'generated (<auto-generated marker)'),
+    ('api/client.py', b'# @generated by protoc, do not edit\n', 'generated (@generated marker)'),
+    # Hand-written files that merely look alike
+    ('reports/generated_report.py', b'', None),
+    ('src/Generated.cs', b'', None),
+    ('src/generated/Order.cs', b'', None),
+    ('Designer.cs', b'', None),
+    ('vendor/jquery/jquery.js', b'', None),
+    ('src/min.js', b'', None),
+    ('src/types.ts', b'', None),
+    ('Models/Order.cs', b'// Regenerate the schema with tools/schema.py when the model changes\n', None),
+]
+
+
+class GeneratedReasonTest(unittest.TestCase):
+    def test_generated_reason(self):
+        for path, header, expected in GENERATED_CASES:
+            with self.subTest(path=path, header=header):
+                self.assertEqual(generated_reason(path, header), expected)
+
+    def test_only_the_header_is_searched_for_markers(self):
+        limits = ParseLimits()
+        with self.assertRaises(SkippedFile):
+            limits.check_source('Order.cs', b'// <auto-generated/>\nclass Order {}\n')
+        limits.check_source('Order.cs', b' ' * GENERATED_HEADER_SIZE + b'// <auto-generated/>\n')
+        ParseLimits(skip_generated=False).check_source('Order.g.cs', b'// <auto-generated/>\n')
+
+
+class ParseLimitsTest(ProjectTestCase):
+    def _skipped(self, relative_path: str, limits: ParseLimits):
+        """Return the skip reason of a file indexed under limits, or None if it was indexed."""
+        details, error, _, _ = _index_file(self.path(relative_path), False, limits)
+        self.assertIsNone(error)
+        return details.get('skipped')
+
+    def test_oversized_file_is_skipped(self):
+        self.write_file('large.py', 'def f():\n    pass\n' * 100)
+        self.assertEqual(self._skipped('large.py', ParseLimits(max_file_size=1000)),
+                         "larger than 1000 bytes (1800 bytes)")
+        self.assertIsNone(self._skipped('large.py', ParseLimits(max_file_size=1800)))
+        self.assertIsNone(self._skipped('large.py', ParseLimits(max_file_size=0)))
+
+    def test_long_lines_only_skip_scripts(self):
+        self.write_files({'bundle.js': LONG_LINE, 'data.py': LONG_LINE.replace('const ', ''),
+                          'short.js': 'function f() {}\n' * (MINIFIED_MIN_SIZE // 16 + 1)})
+        self.assertTrue(self._skipped('bundle.js', ParseLimits()).startswith('minified'))
+        self.assertIsNone(self._skipped('bundle.js', ParseLimits(skip_minified=False)))
+        self.assertIsNone(self._skipped('data.py', ParseLimits()))
+        self.assertIsNone(self._skipped('short.js', ParseLimits()))
+
+    def test_parse_timeout_skip_is_not_cached(self):
+        self.write_file('slow.py', ''.join(f"def f{i}(a, b):\n    return a + b * {i}\n" for i in range(20000)))
+        self.write_file('fast.py', 'def f():\n    pass\n')
+        # A microsecond is too short to parse the large file
+        limits = ParseLimits(parse_timeout=1e-6)
+        cache_path = self.path('ProjectIndex.cache.json')
+        cache = ParseCache(cache_path, limits=limits)
+        project_index = index_project_structure(self.root, cache=cache, limits=limits)
+        self.assertTrue(project_index['slow.py']['skipped'].startswith(TIMEOUT_REASON))
+        self.assertNotIn('slow.py', cache.updated)
+
+        # The next run parses it again instead of serving the skip from the cache
+        cache = ParseCache(cache_path, limits=limits)
+        self.assertIsNone(cache.lookup('slow.py', self.path('slow.py')))
+        self.assertIsNotNone(cache.lookup('fast.py', self.path('fast.py')))
+        self.assertNotIn('skipped', index_project_structure(self.root, limits=ParseLimits())['slow.py'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import unittest
+
+from indexer.fuzzy import fuzzy_distance
+from indexer.lookup import ProjectIndex
+
+from support import PROJECT_INDEX
+
+
+def _describe(symbols):
+    return [(symbol.name, symbol.kind, symbol.path) for symbol in symbols]
+
+
+class ProjectIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = ProjectIndex(PROJECT_INDEX)
+
+    def test_lookup_by_name_and_qualified_name(self):
+        self.assertEqual(_describe(self.index.lookup('UserService')),
+                         [('UserService', 'class', 'main.py'),
+                          ('UserService', 'class', os.path.join('src', 'Users', 'UserService.cs'))])
+        submit, = self.index.lookup('OrderService.Submit')
+        self.assertEqual((submit.container, submit.signature),
+                         ('Shop.Orders.OrderService', 'void Submit(Order order)'))
+        self.assertEqual(self.index.lookup('Missing'), [])
+
+    def test_lookup_filters(self):
+        self.assertEqual(_describe(self.index.lookup('get_user', kind='function')),
+                         [('get_user', 'function', 'main.py')])
+        self.assertEqual(_describe(self.index.lookup('UserService', language='csharp')),
+                         [('UserService', 'class', os.path.join('src', 'Users', 'UserService.cs'))])
+        self.assertEqual(len(self.index.lookup('get_user', path_prefix='api')), 1)
+
+    def test_search_prefix_ignores_case_and_sorts_names(self):
+        self.assertEqual([symbol.name for symbol in self.index.search_prefix('order')],
+                         ['OrderDto', 'OrderList', 'OrderService'])
+        self.assertEqual([symbol.name for symbol in self.index.search_prefix('get_u', kind='function')],
+                         ['get_user', 'get_users', 'get_usr'])
+        self.assertEqual(_describe(self.index.search_prefix('User', kind='class', language='csharp')),
+                         [('UserService', 'class', os.path.join('src', 'Users', 'UserService.cs'))])
+        self.assertEqual(len(self.index.search_prefix('', limit=3)), 3)
+        self.assertEqual(self.index.names_with_prefix('userr'), ['UserRepo', 'UserRepository'])
+
+    def test_fuzzy_search_ranks_closest_names_first(self):
+        results = self.index.fuzzy_search('UserRepo')
+        self.assertEqual([(symbol.name, distance) for symbol, distance in results[:2]],
+                         [('UserRepo', 0), ('UserRepository', fuzzy_distance('UserRepo', 'UserRepository'))])
+        distances = [distance for _, distance in results]
+        self.assertEqual(distances, sorted(distances))
+
+    def test_fuzzy_search_finds_typos(self):
+        names = [symbol.name for symbol, _ in self.index.fuzzy_search('get_usre', limit=5)]
+        self.assertIn('get_user', names)
+        symbol, distance = self.index.fuzzy_search('OrderServce', kind='interface', limit=1)[0]
+        self.assertEqual((symbol.name, distance), ('IOrderService', fuzzy_distance('OrderServce', 'IOrderService')))
+
+
+if __name__ == '__main__':
+    unittest.main()
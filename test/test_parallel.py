@@ -0,0 +1,49 @@
+import os
+import json
+import unittest
+import multiprocessing
+from unittest import mock
+
+import Project_Indexer
+from Project_Indexer import index_project_structure
+
+from support import ProjectTestCase
+
+_index_file = Project_Indexer._index_file
+
+
+def _crashing_index_file(file_path, *args):
+    """Stand-in for Project_Indexer._index_file that kills its worker process on crash.py."""
+    if os.path.basename(file_path) == 'crash.py':
+        os._exit(1)
+    return _index_file(file_path, *args)
+
+
+class ParallelIndexingTest(ProjectTestCase):
+    def setUp(self):
+        super().setUp()
+        self.copy_resources()
+        self.write_files({f'pkg/module_{i}.py': f"class Model{i}:\n    def save(self) -> None:\n        pass\n"
+                          for i in range(8)})
+
+    def test_parallel_output_is_identical_to_serial(self):
+        serial = json.dumps(index_project_structure(self.root, jobs=1), indent=4)
+        self.assertIn('"sample.tsx"', serial)
+        self.assertEqual(json.dumps(index_project_structure(self.root, jobs=2), indent=4), serial)
+        self.assertEqual(json.dumps(index_project_structure(self.root, jobs=3, ranges=True), indent=4),
+                         json.dumps(index_project_structure(self.root, jobs=1, ranges=True), indent=4))
+
+    @unittest.skipIf(multiprocessing.get_start_method() != 'fork',
+                     "workers only see the patched function when they are forked")
+    def test_crashing_worker_loses_only_its_file(self):
+        expected = index_project_structure(self.root, jobs=1)
+        self.write_file('crash.py', "def crash():\n    pass\n")
+        with mock.patch.object(Project_Indexer, '_index_file', _crashing_index_file), \
+                self.assertLogs('Project_Indexer', 'WARNING') as logs:
+            project_index = index_project_structure(self.root, jobs=2)
+        self.assertEqual(project_index, expected)
+        self.assertTrue(any('crash.py' in line and 'worker process crashed' in line for line in logs.output))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,7 @@ import time
 from parser.python_parser import extract_types_and_members_from_file_for_python
 from parser.csharp_parser import extract_types_and_members_from_file_for_csharp
 from parser.typescript_parser import extract_types_and_members_from_file_for_typescript
+from parser.javascript_parser import extract_types_and_members_from_file_for_javascript
 
 def test_python_parser(file_path):
     print(f"\nTesting Python parser on: {file_path}")
@@ -91,9 +92,39 @@ def test_typescript_parser(file_path):
     print(result.__to_dict__())
 
 
+def test_javascript_parser(file_path):
+    print(f"\nTesting JavaScript parser on: {file_path}")
+    
+    start_time = time.time()
+    result = extract_types_and_members_from_file_for_javascript(file_path, extract_imports=True)
+    elapsed_time = time.time() - start_time
+    
+    print(f"\nParsing completed in {elapsed_time:.4f} seconds")
+    
+    print("\nClasses found:")
+    for cls in result.classes:
+        print(f"- {cls['name']}")
+        if 'methods' in cls:
+            print(f"  Methods: {len(cls['methods'])}")
+            for method in cls['methods']:
+                print(f"    - {method}")
+
+    print("\nFunctions found:")
+    for func in result.functions:
+        print(f"- {func}")
+
+    print("\nExports found:")
+    for export in result.exports:
+        print(f"- {export}")
+
+    print("\nRaw dictionary:")
+    print(result.__to_dict__())
+
+
 if __name__ == "__main__":
     test_python_parser("./Project_Indexer.py")
     test_python_parser("parser/python_parser.py")
     test_csharp_parser("test/resources/test.cs")
     test_typescript_parser("test/resources/test.ts")
-    test_typescript_parser("test/resources/test.tsx")
\ No newline at end of file
+    test_typescript_parser("test/resources/test.tsx")
+    test_javascript_parser("test/resources/test.js")
\ No newline at end of file
@@ -0,0 +1,43 @@
+import os
+import unittest
+
+from indexer.lookup import ProjectIndex
+from indexer.shards import ShardedIndex, write_sharded_index, shard_key
+
+from support import PROJECT_INDEX, ProjectTestCase
+
+
+class ShardedIndexTest(ProjectTestCase):
+    def setUp(self):
+        super().setUp()
+        self.shard_dir = self.path('ProjectIndex.shards')
+        self.assertEqual(write_sharded_index(PROJECT_INDEX, self.shard_dir, 1), (4, 4))
+        self.sharded = ShardedIndex(self.shard_dir)
+        self.index = ProjectIndex(PROJECT_INDEX)
+
+    def test_shard_keys(self):
+        self.assertEqual(shard_key('main.py', 1), '')
+        self.assertEqual(shard_key(os.path.join('src', 'Orders', 'OrderService.cs'), 1), 'src')
+        self.assertEqual(shard_key(os.path.join('src', 'Orders', 'OrderService.cs'), 2), os.path.join('src', 'Orders'))
+
+    def test_unchanged_shards_are_not_rewritten(self):
+        self.assertEqual(write_sharded_index(PROJECT_INDEX, self.shard_dir, 1), (0, 4))
+        self.assertEqual(self.sharded.to_dict(), PROJECT_INDEX)
+
+    def test_lookup_only_loads_shards_that_may_hold_the_name(self):
+        self.assertEqual(self.sharded.lookup('IOrderService'), self.index.lookup('IOrderService'))
+        self.assertEqual(self.sharded.loaded_shard_count, 1)
+
+    def test_merged_results_match_the_unsharded_index(self):
+        for name in ('UserService', 'get_user', 'OrderService.Submit', 'Missing'):
+            self.assertEqual(self.sharded.lookup(name), self.index.lookup(name), name)
+        for prefix in ('', 'user', 'get', 'Order'):
+            self.assertEqual(self.sharded.search_prefix(prefix), self.index.search_prefix(prefix), prefix)
+        for query in ('UserRepo', 'get_usre', 'OrderServce', 'usr', 'getuser'):
+            for limit in (1, 3, 10):
+                self.assertEqual(self.sharded.fuzzy_search(query, limit=limit),
+                                 self.index.fuzzy_search(query, limit=limit), (query, limit))
+
+
+if __name__ == '__main__':
+    unittest.main()
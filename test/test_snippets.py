@@ -0,0 +1,103 @@
+import unittest
+
+from Project_Indexer import index_project_structure
+from indexer.lookup import ProjectIndex
+from indexer.snippets import MMAP_MIN_SIZE, SnippetError, read_snippet, read_source_range
+from indexer.symbols import Symbol
+
+from support import ProjectTestCase
+
+PYTHON_SOURCE = '''import os
+
+
+class Greeter:
+    """Says hello."""
+
+    def greet(self, name: str) -> str:
+        return f"Héllo, {name}"
+
+
+@staticmethod
+def shout(text):
+    return text.upper()
+'''
+
+
+class SnippetTest(ProjectTestCase):
+    def setUp(self):
+        super().setUp()
+        self.copy_resources()
+        self.write_file('sample.py', PYTHON_SOURCE)
+        self.index = ProjectIndex(index_project_structure(self.root, ranges=True))
+
+    def _snippet(self, name, path):
+        symbol, = self.index.lookup(name, path_prefix=path)
+        return read_snippet(self.root, symbol)
+
+    def test_every_symbol_has_a_range_holding_its_name(self):
+        for extension in ('cs', 'js', 'ts', 'tsx', 'py'):
+            symbols = [symbol for symbol in self.index.symbols if symbol.path == f'sample.{extension}']
+            self.assertTrue(symbols, extension)
+            with open(self.path(f'sample.{extension}'), 'rb') as f:
+                lines = f.read().split(b'\n')
+            for symbol in symbols:
+                start_line, end_line, start_byte, end_byte = symbol.range
+                self.assertLessEqual(start_line, end_line)
+                self.assertLess(start_byte, end_byte)
+                snippet = read_snippet(self.root, symbol)
+                self.assertIn(symbol.name, snippet)
+                self.assertEqual(snippet.count('\n'), end_line - start_line)
+                self.assertIn(snippet.split('\n')[0].encode('utf8'), lines[start_line - 1])
+
+    def test_python(self):
+        self.assertEqual(self._snippet('greet', 'sample.py'),
+                         'def greet(self, name: str) -> str:\n        return f"Héllo, {name}"')
+        self.assertTrue(self._snippet('Greeter', 'sample.py').startswith('class Greeter:\n'))
+        self.assertTrue(self._snippet('shout', 'sample.py').endswith('return text.upper()'))
+
+    def test_csharp(self):
+        self.assertEqual(self._snippet('GetGreeting', 'sample.cs'),
+                         'public string GetGreeting(string name)\n        {\n'
+                         '            return $"Hello, {name}";\n        }')
+        self.assertTrue(self._snippet('Point', 'sample.cs').startswith('public struct Point\n'))
+
+    def test_javascript(self):
+        self.assertEqual(self._snippet('speak', 'sample.js'), 'speak(loud, times) { return 1; }')
+        self.assertEqual(self._snippet('Dog', 'sample.js'), 'class Dog { bark() {} }')
+
+    def test_typescript(self):
+        self.assertEqual(self._snippet('add', 'sample.ts'),
+                         'function add(x: number, y: number): number {\n  return x + y;\n}')
+        self.assertTrue(self._snippet('Color', 'sample.ts').startswith('enum Color {\n'))
+        self.assertEqual(self._snippet('SimpleDiv', 'sample.tsx'),
+                         'function SimpleDiv() {\n  return <div>Just a simple div.</div>;\n}')
+
+    def test_index_without_ranges(self):
+        symbol = Symbol('Greeter', 'class', 'sample.py')
+        with self.assertRaises(SnippetError):
+            read_snippet(self.root, symbol)
+
+    def test_missing_file(self):
+        symbol = Symbol('Gone', 'class', 'gone.py', range=[1, 1, 0, 10])
+        with self.assertRaises(SnippetError):
+            read_snippet(self.root, symbol)
+
+
+class ReadSourceRangeTest(ProjectTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = bytes(range(256)) * (MMAP_MIN_SIZE // 256 + 8)
+        self.file_path = self.write_file('large.py', self.content)
+
+    def test_mapped_file(self):
+        start = MMAP_MIN_SIZE - 100
+        self.assertEqual(read_source_range(self.file_path, start, start + 300), self.content[start:start + 300])
+
+    def test_range_past_the_end_is_cut(self):
+        size = len(self.content)
+        self.assertEqual(read_source_range(self.file_path, size - 10, size + 50), self.content[-10:])
+        self.assertEqual(read_source_range(self.file_path, size + 1, size + 50), b'')
+
+
+if __name__ == '__main__':
+    unittest.main()
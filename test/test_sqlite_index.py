@@ -0,0 +1,148 @@
+import os
+import sqlite3
+import unittest
+
+from indexer.sqlite_index import SCHEMA_VERSION, SqliteIndex, _split_bases
+
+from support import PROJECT_INDEX, ProjectTestCase
+
+ORDER_PATH = os.path.join('src', 'Orders', 'OrderService.cs')
+
+SAMPLE_INDEX = dict(PROJECT_INDEX, **{
+    ORDER_PATH: {
+        'classes': [{'name': 'OrderService', 'namespace': 'Shop.Orders',
+                     'bases': 'Dictionary<string, int>, IOrderService',
+                     'methods': [{'name': 'Submit', 'return_type': 'void', 'parameters': 'Order order',
+                                  'docstring': 'Submits an order to the warehouse.'}]}],
+        'interfaces': [{'name': 'IOrderService', 'namespace': 'Shop.Orders'}],
+    },
+    'parser.py': {
+        'py_classes': [{'name': 'Parser', 'bases': ['Base'], 'methods': ['parse(self, text) -> Tree']}],
+        'py_functions': ['parse_file(path) -> Tree'],
+        'py_imports': ['import os', 'from typing import List, Optional'],
+    },
+})
+
+
+class SqliteIndexTest(ProjectTestCase):
+    def setUp(self):
+        super().setUp()
+        self.db_path = self.path('ProjectIndex.db')
+        self.database = self._open()
+        if not self.database.has_fts:
+            self.skipTest("SQLite is built without FTS5")
+        self.database.sync(SAMPLE_INDEX)
+
+    def _open(self) -> SqliteIndex:
+        database = SqliteIndex(self.db_path)
+        self.addCleanup(database.close)
+        return database
+
+    def _query(self, sql: str, *parameters) -> list:
+        return self.database.connection.execute(sql, parameters).fetchall()
+
+    def _count(self, table: str) -> int:
+        return self._query(f"SELECT COUNT(*) FROM {table}")[0][0]
+
+    def _file_id(self, relative_path: str) -> int:
+        return self._query("SELECT id FROM files WHERE path = ?", relative_path)[0][0]
+
+    def _fts_rowids(self) -> set:
+        return {rowid for (rowid,) in self._query("SELECT rowid FROM symbols_fts")}
+
+    def test_unchanged_rerun_writes_nothing(self):
+        self.assertEqual(self._count('files'), len(SAMPLE_INDEX))
+        changes = self.database.connection.total_changes
+        self.assertEqual(self.database.sync(SAMPLE_INDEX), (0, 0))
+        self.assertEqual(self.database.connection.total_changes, changes)
+
+    def test_sync_writes_changed_and_removes_stale_files(self):
+        project_index = dict(SAMPLE_INDEX, **{'parser.py': {'py_functions': ['parse_file(path) -> Tree']}})
+        del project_index['main.py']
+        self.assertEqual(self.database.sync(project_index), (1, 1))
+        self.assertEqual({path for (path,) in self._query("SELECT path FROM files")}, set(project_index))
+
+    def test_update_file_only_rewrites_changed_entries(self):
+        changes = self.database.connection.total_changes
+        self.assertFalse(self.database.update_file('parser.py', dict(SAMPLE_INDEX['parser.py'])))
+        self.assertEqual(self.database.connection.total_changes, changes)
+
+        details = dict(SAMPLE_INDEX['parser.py'], py_functions=['parse_text(text) -> Tree'])
+        self.assertTrue(self.database.update_file('parser.py', details))
+        self.assertGreater(self.database.connection.total_changes, changes)
+        self.assertFalse(self.database.update_file('parser.py', details))
+        names = self._query("SELECT name FROM functions WHERE file_id = ? AND class_id IS NULL",
+                            self._file_id('parser.py'))
+        self.assertEqual(names, [('parse_text',)])
+        self.assertEqual(self.database.search('parse_file'), [])
+
+    def test_remove_file_deletes_all_its_rows(self):
+        file_id = self._file_id(ORDER_PATH)
+        class_ids = [class_id for (class_id,) in self._query("SELECT id FROM classes WHERE file_id = ?", file_id)]
+        function_ids = [function_id for (function_id,)
+                        in self._query("SELECT id FROM functions WHERE file_id = ?", file_id)]
+        self.assertEqual((len(class_ids), len(function_ids)), (2, 1))
+        self.assertTrue(self._fts_rowids().issuperset(class_ids + [-function_id for function_id in function_ids]))
+
+        self.assertTrue(self.database.remove_file(ORDER_PATH))
+        self.assertFalse(self.database.remove_file(ORDER_PATH))
+        for table in ('classes', 'functions', 'imports'):
+            self.assertEqual(self._query(f"SELECT COUNT(*) FROM {table} WHERE file_id = ?", file_id), [(0,)], table)
+        self.assertEqual(self._query("SELECT name FROM bases ORDER BY name"), [('Base',)])
+        # Every remaining full-text row belongs to a class (rowid id) or a function (rowid -id)
+        remaining = {class_id for (class_id,) in self._query("SELECT id FROM classes")} | \
+                    {-function_id for (function_id,) in self._query("SELECT id FROM functions")}
+        self.assertEqual(self._fts_rowids(), remaining)
+        self.assertEqual(self.database.search('Submit'), [])
+
+    def test_rows(self):
+        file_id = self._file_id('parser.py')
+        self.assertEqual(self._query("SELECT source, name FROM imports WHERE file_id = ? ORDER BY rowid", file_id),
+                         [('os', None), ('typing', 'List'), ('typing', 'Optional')])
+        self.assertEqual(self._query("SELECT name, parameters, return_type FROM functions "
+                                     "WHERE name = 'Submit'"), [('Submit', 'Order order', 'void')])
+        self.assertEqual(self._query("SELECT bases.name FROM bases JOIN classes ON classes.id = class_id "
+                                     "WHERE classes.name = 'OrderService' ORDER BY bases.rowid"),
+                         [('Dictionary<string, int>',), ('IOrderService',)])
+
+    def test_split_bases(self):
+        self.assertEqual(_split_bases("Dictionary<string, int>, IDisposable"),
+                         ['Dictionary<string, int>', 'IDisposable'])
+        self.assertEqual(_split_bases("Base<Func<int, (string, int)>>, IComparable<T> ,"),
+                         ['Base<Func<int, (string, int)>>', 'IComparable<T>'])
+        self.assertEqual(_split_bases(""), [])
+
+    def test_search_ranks_names_above_docstrings(self):
+        # Inserted after the method whose docstring mentions it, so only the rank puts it first
+        self.database.update_file('Warehouse.cs', {'classes': [{'name': 'Warehouse', 'namespace': 'Shop'}]})
+        self.assertEqual([(kind, name) for kind, name, _, _ in self.database.search('warehouse')],
+                         [('class', 'Warehouse'), ('method', 'Submit')])
+        self.assertEqual(self.database.search('warehouse', limit=1), [('class', 'Warehouse', None, 'Warehouse.cs')])
+        self.assertEqual(self.database.search('signature:Tree'),
+                         [('method', 'parse', 'parse(self, text) -> Tree', 'parser.py'),
+                          ('function', 'parse_file', 'parse_file(path) -> Tree', 'parser.py')])
+
+    def test_schema_version_mismatch_rebuilds_the_database(self):
+        with self.database.connection:
+            self.database.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION - 1}")
+        self.database.close()
+
+        self.database = self._open()
+        self.assertEqual(self._query("PRAGMA user_version"), [(SCHEMA_VERSION,)])
+        for table in ('files', 'classes', 'functions', 'bases', 'imports', 'symbols_fts'):
+            self.assertEqual(self._count(table), 0, table)
+        self.assertEqual(self.database.sync(SAMPLE_INDEX), (len(SAMPLE_INDEX), 0))
+
+    def test_database_from_another_version_is_not_reused(self):
+        self.database.close()
+        os.remove(self.db_path)
+        connection = sqlite3.connect(self.db_path)
+        with connection:
+            connection.execute("CREATE TABLE files (id INTEGER PRIMARY KEY, path TEXT)")
+        connection.close()
+        self.database = self._open()
+        self.assertEqual(self.database.sync(SAMPLE_INDEX), (len(SAMPLE_INDEX), 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
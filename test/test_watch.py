@@ -0,0 +1,164 @@
+import os
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from Project_Indexer import _index_file, index_project_structure
+from indexer.watch import TreeCache, WatchIndexer
+
+from support import ProjectTestCase
+
+PYTHON_SOURCE = '''def first():
+    return 1
+
+
+class Middle:
+    def method(self):
+        return 2
+
+
+def last():
+    return 3
+'''
+
+CSHARP_SOURCE = '''namespace Shop.Orders;
+
+public class Order
+{
+    public void Submit() { }
+}
+
+public class Invoice
+{
+    public int Total() { return 0; }
+}
+'''
+
+
+class TreeCacheTest(unittest.TestCase):
+    def test_evicts_least_recently_used_trees_beyond_the_budget(self):
+        trees = TreeCache(max_bytes=250)
+        for name in ('a', 'b'):
+            trees.put(name, SimpleNamespace(size=100))
+        # 'a' was used last, so 'b' goes when 'c' exceeds the budget
+        self.assertIsNotNone(trees.get('a'))
+        trees.put('c', SimpleNamespace(size=100))
+        self.assertEqual(list(trees.entries), ['a', 'c'])
+        self.assertEqual(trees.total_bytes, 200)
+
+    def test_keeps_the_newest_tree_even_if_it_alone_exceeds_the_budget(self):
+        trees = TreeCache(max_bytes=50)
+        trees.put('a', SimpleNamespace(size=40))
+        trees.put('b', SimpleNamespace(size=100))
+        self.assertEqual(list(trees.entries), ['b'])
+        self.assertEqual(trees.total_bytes, 100)
+
+    def test_replacing_and_popping_update_the_total(self):
+        trees = TreeCache()
+        trees.put('a', SimpleNamespace(size=40))
+        trees.put('a', SimpleNamespace(size=60))
+        self.assertEqual(trees.total_bytes, 60)
+        trees.pop('a')
+        trees.pop('missing')
+        self.assertEqual((trees.total_bytes, len(trees.entries)), (0, 0))
+
+
+class WatchIndexerTest(ProjectTestCase):
+    def setUp(self):
+        super().setUp()
+        self.file_path = self.write_file('module.py', PYTHON_SOURCE)
+        self.write_file('orders.cs', CSHARP_SOURCE)
+        self.watcher = self._watcher()
+
+    def _watcher(self, **options):
+        project_index = index_project_structure(self.root, ranges=True)
+        return WatchIndexer(self.root, project_index, write_index=None, ranges=True, **options)
+
+    def _update(self, relative_path, content, watcher=None):
+        """Write a file, let the watcher update it and return the source of every unit it extracted."""
+        watcher = watcher or self.watcher
+        file_path = self.write_file(relative_path, content)
+        with mock.patch.object(watcher, '_extract', wraps=watcher._extract) as extract:
+            watcher.update_file(file_path)
+        # The incremental result has to equal parsing the new content from scratch
+        self.assertEqual(watcher.project_index[relative_path], _index_file(file_path, False, ranges=True)[0])
+        return [call.args[0].text.decode('utf8').split('\n')[0] for call in extract.call_args_list]
+
+    def test_first_change_parses_the_whole_file(self):
+        # The initial index comes from a full run, no tree is retained for the file yet
+        extracted = self._update('module.py', PYTHON_SOURCE.replace('return 1', 'return 10'))
+        self.assertEqual(extracted, ['def first():', 'class Middle:', 'def last():'])
+
+    def test_edited_function_body_is_the_only_unit_extracted(self):
+        self._update('module.py', PYTHON_SOURCE.replace('return 1', 'return 10'))
+        before = self.watcher.project_index['module.py']['ranges']
+        extracted = self._update('module.py', PYTHON_SOURCE.replace('return 1', 'return 1000'))
+        self.assertEqual(extracted, ['def first():'])
+        after = self.watcher.project_index['module.py']['ranges']
+        # The reused units after the edit moved by the two inserted bytes, on the same lines
+        self.assertEqual(after[-1], [before[-1][0], before[-1][1], before[-1][2] + 2, before[-1][3] + 2])
+
+    def test_lines_inserted_above_a_class_shift_the_units_after_them(self):
+        self._update('module.py', PYTHON_SOURCE)
+        before = self.watcher.project_index['module.py']['ranges']
+        inserted = 'TIMEOUT = 30\nRETRIES = 3\n\n\n'
+        extracted = self._update('module.py', PYTHON_SOURCE.replace('class Middle', inserted + 'class Middle'))
+        self.assertEqual(extracted, ['TIMEOUT = 30', 'RETRIES = 3'])
+        after = self.watcher.project_index['module.py']['ranges']
+        self.assertEqual(after[-1], [before[-1][0] + 4, before[-1][1] + 4,
+                                     before[-1][2] + len(inserted), before[-1][3] + len(inserted)])
+
+    def test_deleted_blank_line_only_shifts_the_units_after_it(self):
+        self._update('module.py', PYTHON_SOURCE)
+        before = self.watcher.project_index['module.py']['ranges']
+        self.assertEqual(self._update('module.py', PYTHON_SOURCE.replace('\n\n\nclass', '\n\nclass')), [])
+        after = self.watcher.project_index['module.py']['ranges']
+        # Ranges list the class and its method before the functions: only first() is above the deletion
+        self.assertEqual(after[2], before[2])
+        for index in (0, 1, 3):
+            self.assertEqual(after[index], [value - 1 for value in before[index]])
+
+    def test_changed_file_scoped_namespace_extracts_every_unit_again(self):
+        self._update('orders.cs', CSHARP_SOURCE.replace('{ }', '{ return; }'))
+        extracted = self._update('orders.cs', CSHARP_SOURCE.replace('Shop.Orders', 'Shop.Billing'))
+        self.assertEqual(extracted, ['namespace Shop.Billing;', 'public class Order', 'public class Invoice'])
+        classes = self.watcher.project_index['orders.cs']['classes']
+        self.assertEqual({cls['namespace'] for cls in classes}, {'Shop.Billing'})
+
+    def test_unchanged_content_is_not_parsed(self):
+        self._update('module.py', PYTHON_SOURCE.replace('return 1', 'return 10'))
+        with mock.patch.object(self.watcher, '_extract') as extract:
+            self.assertFalse(self.watcher.update_file(self.file_path))
+        extract.assert_not_called()
+
+    def test_deleted_file_and_directory_are_removed(self):
+        self._update('module.py', PYTHON_SOURCE)
+        os.remove(self.file_path)
+        self.assertTrue(self.watcher.update_path(self.file_path))
+        self.assertNotIn('module.py', self.watcher.project_index)
+        self.assertIsNone(self.watcher.trees.get(self.file_path))
+        self.assertFalse(self.watcher.update_path(self.file_path))
+
+        self.write_file('pkg/a.py', PYTHON_SOURCE)
+        self.write_file('pkg/sub/b.py', PYTHON_SOURCE)
+        self.assertTrue(self.watcher.update_path(self.path('pkg')))
+        self.assertIn(os.path.join('pkg', 'sub', 'b.py'), self.watcher.project_index)
+        for relative_path in ('pkg/sub/b.py', 'pkg/a.py'):
+            os.remove(self.path(relative_path))
+        os.rmdir(self.path('pkg/sub'))
+        os.rmdir(self.path('pkg'))
+        self.assertTrue(self.watcher.update_path(self.path('pkg')))
+        self.assertEqual(sorted(self.watcher.project_index), ['orders.cs'])
+
+    def test_file_whose_tree_was_evicted_is_parsed_again(self):
+        # Room for a single tree: updating orders.cs evicts the tree of module.py
+        watcher = self._watcher(memory_limit=1)
+        self._update('module.py', PYTHON_SOURCE, watcher)
+        self._update('orders.cs', CSHARP_SOURCE.replace('{ }', '{ return; }'), watcher)
+        self.assertEqual(list(watcher.trees.entries), [self.path('orders.cs')])
+        extracted = self._update('module.py', PYTHON_SOURCE.replace('return 1', 'return 10'), watcher)
+        self.assertEqual(extracted, ['def first():', 'class Middle:', 'def last():'])
+
+
+if __name__ == '__main__':
+    unittest.main()